@@ -1,14 +1,25 @@
 import os
-import io
-import mimetypes
+import click
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from extensions import supabase, supabase_admin
-from utils import admin_required, check_transparency, send_status_email
+from utils import admin_required, check_transparency, send_status_email, send_status_emails, REVIEW_ACTIONS, build_review_decision, content_hash, versioned_filename, upload_options, remove_superseded, discard_uploads
 from datetime import datetime
 from config import Config
 import pytz
-from image_optimizer import compress_image_bytes
+from review_queue import fetch_review_queue, cursor_from_args
+from archive_scheduler import group_key, archive_group_name, archive_members, hit_rate, compression_summary, run_semester_archive, summarize_archive
+from storage_gc import GC_BUCKETS, collect_garbage, summarize_gc, format_size
+from image_backfill import backfill_images, summarize_backfill
+from fanout import gather
+from upload_intake import upload_size, read_head, rewound, upload_body
+from direct_upload import get_job, queue_attach, open_jobs
+from bulk_delete import DELETE_FILTERS, find_delete_targets, delete_students
+from perf import route_stats, call_stats, coalesce_stats, call_budget
+from profile_replica import local_profiles, profiles_replica
+from page_cache import cached, invalidate, cache_stats
+from rollover import build_rollover_plan, preview_rollover, apply_rollover, summarize_rollover, current_academic_year
 
 admin_bp = Blueprint('admin', __name__,
                      template_folder='../templates/admin')
@@ -33,18 +44,32 @@ def get_verified_user_ids():
         print(f"Error fetching verified users: {e}")
     return verified_ids
 
+def get_admin_display_name(admin_id):
+    # login() keeps the signed-in user's name in the session; only other users need a lookup
+    if admin_id == session.get('user_id') and (session.get('full_name') or '').strip():
+        return session['full_name'].strip()
+    admin_res = supabase.table("profiles").select("first_name, last_name, email").eq("id", admin_id).single().execute()
+    admin_name = "Unknown Admin"
+    if admin_res.data:
+        admin_name = f"{admin_res.data.get('first_name', '')} {admin_res.data.get('last_name', '')}".strip()
+        if not admin_name:
+            admin_name = admin_res.data.get('email', 'Unknown Admin')
+    return admin_name
+
+def cached_print_settings():
+    """
+    Print settings row 1 ({} if missing), through the page cache.
+    """
+    return cached(('print_settings',),
+                  lambda: supabase.table("print_settings").select("*").eq("id", 1).single().execute().data or {})
+
 def log_activity(action, target_user_id=None, target_user_name=None, details=None):
     try:
         admin_id = session.get('user_id')
         if not admin_id:
             return 
 
-        admin_res = supabase.table("profiles").select("first_name, last_name, email").eq("id", admin_id).single().execute()
-        admin_name = "Unknown Admin"
-        if admin_res.data:
-            admin_name = f"{admin_res.data.get('first_name', '')} {admin_res.data.get('last_name', '')}".strip()
-            if not admin_name:
-                admin_name = admin_res.data.get('email', 'Unknown Admin')
+        admin_name = get_admin_display_name(admin_id)
 
         # Get current time in Philippines timezone
         ph_tz = pytz.timezone('Asia/Manila')
@@ -60,9 +85,38 @@ def log_activity(action, target_user_id=None, target_user_name=None, details=Non
             "created_at": timestamp_ph
         }
         supabase.table("activity_logs").insert(log_data).execute()
+        invalidate('activity_logs')
     except Exception as e:
         print(f"Failed to log activity: {e}")
 
+def log_activities(entries):
+    """
+    Writes many activity log rows with one admin lookup and one multi-row insert.
+    Each entry is a dict with 'action' and optional 'target_user_id', 'target_user_name', 'details'.
+    """
+    try:
+        admin_id = session.get('user_id')
+        if not admin_id or not entries:
+            return
+
+        admin_name = get_admin_display_name(admin_id)
+        ph_tz = pytz.timezone('Asia/Manila')
+        timestamp_ph = datetime.now(ph_tz).isoformat()
+
+        rows = [{
+            "admin_id": admin_id,
+            "admin_name": admin_name,
+            "action": entry.get('action'),
+            "target_user_id": entry.get('target_user_id'),
+            "target_user_name": entry.get('target_user_name'),
+            "details": entry.get('details'),
+            "created_at": timestamp_ph
+        } for entry in entries]
+        supabase.table("activity_logs").insert(rows).execute()
+        invalidate('activity_logs')
+    except Exception as e:
+        print(f"Failed to log activities: {e}")
+
 @admin_bp.route('/')
 @admin_bp.route('/dashboard')
 @admin_required
@@ -93,6 +147,7 @@ def lock_all_students():
     try:
         # Update all profiles where account_type is NOT admin
         supabase.table("profiles").update({"is_locked": True}).neq("account_type", "admin").execute()
+        invalidate('students')
         
         log_activity("Global Lock", details="Locked all student accounts.")
         flash("All student accounts have been locked.", "success")
@@ -105,6 +160,7 @@ def lock_all_students():
 def unlock_all_students():
     try:
         supabase.rpc("unlock_all_profiles").execute()
+        invalidate('students')
         
         log_activity("Global Unlock", details="Unlocked all student accounts.")
         flash("All student accounts have been unlocked.", "success")
@@ -115,6 +171,7 @@ def unlock_all_students():
 # ... (admin_students remains same) ...
 @admin_bp.route('/students')
 @admin_required
+@call_budget(3)
 def admin_students():
     try:
         search_name = request.args.get('search_name', '')
@@ -132,49 +189,26 @@ def admin_students():
         page = request.args.get('page', 1, type=int)
         per_page = 10 
 
-        # Build Query
-        query = supabase.table("profiles").select("*")
-        query = query.eq('email_verified', True) # Verified filter
-
-        if search_name:
-            query = query.or_(f"first_name.ilike.%{search_name}%,last_name.ilike.%{search_name}%,middle_name.ilike.%{search_name}%,student_id.ilike.%{search_name}%,email.ilike.%{search_name}%")
-        if filter_program: query = query.eq('program', filter_program)
-        if filter_section: query = query.eq('section', filter_section)
-        if filter_year_level: query = query.eq('year_level', filter_year_level) 
-        if filter_major: query = query.eq('major', filter_major) 
-
-        query = query.order(sort_by, desc=is_desc)
-        if sort_by != 'last_name': query = query.order('last_name', desc=False) 
-
-        start = (page - 1) * per_page
-        end = start + per_page - 1
-        
-        # Get count
-        count_query = supabase.table("profiles").select("*", count='exact', head=True).eq('email_verified', True)
-        if search_name: 
-             count_query = count_query.or_(f"first_name.ilike.%{search_name}%,last_name.ilike.%{search_name}%,middle_name.ilike.%{search_name}%,student_id.ilike.%{search_name}%,email.ilike.%{search_name}%")
-        if filter_program: count_query = count_query.eq('program', filter_program)
-        if filter_section: count_query = count_query.eq('section', filter_section)
-        if filter_year_level: count_query = count_query.eq('year_level', filter_year_level) 
-        if filter_major: count_query = count_query.eq('major', filter_major)
-
-        count_res = count_query.execute()
-        total_students = count_res.count if count_res.count is not None else 0
+        replica = local_profiles()
+        if replica:
+            # Same page, count and facets from the local copy, without a round trip
+            where = {'email_verified': True}
+            for column, value in (('program', filter_program), ('section', filter_section),
+                                  ('year_level', filter_year_level), ('major', filter_major)):
+                if value: where[column] = value
+            order = [(sort_by, is_desc)] + ([('last_name', False)] if sort_by != 'last_name' else [])
+            total_students = replica.count(where, search_name)
+            students = replica.select(where, search_name, order, limit=per_page, offset=(page - 1) * per_page)
+            facets = replica.distinct(('program', 'section', 'year_level', 'major'))
+        else:
+            args = (search_name, filter_program, filter_section, filter_year_level, filter_major, sort_by, is_desc, page, per_page)
+            total_students, students, facets = cached(('students',) + args, lambda: _remote_students_page(*args))
         total_pages = (total_students + per_page - 1) // per_page
-        
-        query = query.range(start, end)
-        response = query.execute()
-        students = response.data
-        
-        programs_res = supabase.table("profiles").select("program").execute()
-        sections_res = supabase.table("profiles").select("section").execute()
-        years_res = supabase.table("profiles").select("year_level").execute()
-        majors_res = supabase.table("profiles").select("major").execute() 
-        
-        programs = sorted(list(set(p['program'] for p in programs_res.data if p.get('program'))))
-        sections = sorted(list(set(s['section'] for s in sections_res.data if s.get('section'))))
-        all_years = sorted(list(set(y['year_level'] for y in years_res.data if y.get('year_level'))), key=lambda x: (x or "Z")[0])
-        all_majors = sorted(list(set(m['major'] for m in majors_res.data if m.get('major')))) 
+
+        programs = sorted(list(set(p['program'] for p in facets if p.get('program'))))
+        sections = sorted(list(set(s['section'] for s in facets if s.get('section'))))
+        all_years = sorted(list(set(y['year_level'] for y in facets if y.get('year_level'))), key=lambda x: (x or "Z")[0])
+        all_majors = sorted(list(set(m['major'] for m in facets if m.get('major')))) 
 
         return render_template(
             'students.html', 
@@ -198,12 +232,51 @@ def admin_students():
         flash(f"Error fetching students: {str(e)}", "error")
         return render_template('students.html', students=[], page=1, total_pages=1, total_students=0)
 
+def _remote_students_page(search_name, filter_program, filter_section, filter_year_level, filter_major, sort_by, is_desc, page, per_page):
+    """
+    (total, page of students, facet rows) for the student list, read from Supabase.
+    """
+    # Build Query
+    query = supabase.table("profiles").select("*")
+    query = query.eq('email_verified', True) # Verified filter
+
+    if search_name:
+        query = query.or_(f"first_name.ilike.%{search_name}%,last_name.ilike.%{search_name}%,middle_name.ilike.%{search_name}%,student_id.ilike.%{search_name}%,email.ilike.%{search_name}%")
+    if filter_program: query = query.eq('program', filter_program)
+    if filter_section: query = query.eq('section', filter_section)
+    if filter_year_level: query = query.eq('year_level', filter_year_level) 
+    if filter_major: query = query.eq('major', filter_major) 
+
+    query = query.order(sort_by, desc=is_desc)
+    if sort_by != 'last_name': query = query.order('last_name', desc=False) 
+
+    start = (page - 1) * per_page
+    end = start + per_page - 1
+    
+    # Get count
+    count_query = supabase.table("profiles").select("*", count='exact', head=True).eq('email_verified', True)
+    if search_name: 
+         count_query = count_query.or_(f"first_name.ilike.%{search_name}%,last_name.ilike.%{search_name}%,middle_name.ilike.%{search_name}%,student_id.ilike.%{search_name}%,email.ilike.%{search_name}%")
+    if filter_program: count_query = count_query.eq('program', filter_program)
+    if filter_section: count_query = count_query.eq('section', filter_section)
+    if filter_year_level: count_query = count_query.eq('year_level', filter_year_level) 
+    if filter_major: count_query = count_query.eq('major', filter_major)
+
+    query = query.range(start, end)
+    # One select for all four facet columns instead of one per column
+    facets_query = supabase.table("profiles").select("program, section, year_level, major")
+
+    # Count, page and facets are independent: fetch them together
+    count_res, response, facets_res = gather(count_query.execute, query.execute, facets_query.execute)
+    total_students = count_res.count if count_res.count is not None else 0
+    return total_students, response.data, facets_res.data or []
+
 @admin_bp.route('/edit_student/<student_id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_student(student_id):
     if request.method == 'POST':
         try:
-            user_res = supabase.table("profiles").select("student_id, picture_disapproval_reason, signature_disapproval_reason, picture_status, signature_status").eq("id", student_id).single().execute()
+            user_res = supabase.table("profiles").select("student_id, picture_disapproval_reason, signature_disapproval_reason, picture_status, signature_status, picture_url, signature_url, picture_hash, signature_hash").eq("id", student_id).single().execute()
             if not user_res.data:
                 flash("Student profile not found.", "error")
                 return redirect(url_for('admin.admin_students'))
@@ -263,56 +336,89 @@ def admin_edit_student(student_id):
 
             picture_file = request.files.get('picture')
             signature_file = request.files.get('signature')
+            unchanged = []
+            uploaded = []
+
+            # Images uploaded straight to storage are validated and attached in the background
+            direct_jobs = []
+            for kind in ('picture', 'signature'):
+                job = get_job(supabase_admin, request.form.get(f'{kind}_upload'), student_id, kind)
+                if job and job['status'] == 'signed':
+                    direct_jobs.append(job)
 
             # ... (rest of the file logic for image/signature processing remains exactly the same) ...
             if picture_file and picture_file.filename:
-                picture_bytes = picture_file.read()
-                if len(picture_bytes) > Config.MAX_FILE_SIZE: 
+                if upload_size(picture_file) > Config.MAX_FILE_SIZE: 
                     flash(f"Picture file size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
                     student_data = supabase.table("profiles").select("*").eq("id", student_id).single().execute().data
                     return render_template('edit_student.html', student=student_data)
                     
-                file_ext = os.path.splitext(picture_file.filename)[1]
-                file_name = f"{student_num}_picture{file_ext}"
-                supabase.storage.from_("pictures").upload(
-                    file_name, picture_bytes, {"content-type": picture_file.mimetype, "upsert": "true"}
-                )
-                update_data["picture_url"] = supabase.storage.from_("pictures").get_public_url(file_name)
-                update_data["picture_status"] = "approved"
-                update_data["picture_disapproval_reason"] = None 
+                picture_hash = content_hash(picture_file.stream)
+                if picture_hash == student_profile.get('picture_hash'):
+                    unchanged.append("Picture")
+                else:
+                    file_ext = os.path.splitext(picture_file.filename)[1]
+                    file_name = versioned_filename(student_num, "picture", picture_hash, file_ext)
+                    supabase.storage.from_("pictures").upload(file_name, upload_body(picture_file), upload_options(picture_file.mimetype))
+                    uploaded.append(("pictures", file_name))
+                    update_data["picture_url"] = supabase.storage.from_("pictures").get_public_url(file_name)
+                    update_data["picture_hash"] = picture_hash
+                    update_data["picture_status"] = "approved"
+                    update_data["picture_disapproval_reason"] = None 
 
             if signature_file and signature_file.filename:
-                signature_bytes = signature_file.read()
-                if len(signature_bytes) > Config.MAX_FILE_SIZE:
+                if upload_size(signature_file) > Config.MAX_FILE_SIZE:
+                    discard_uploads(supabase, uploaded)
                     flash(f"Signature file size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
                     student_data = supabase.table("profiles").select("*").eq("id", student_id).single().execute().data
                     return render_template('edit_student.html', student=student_data)
 
-                if not signature_bytes.startswith(b'\x89PNG\r\n\x1a\n'):
+                if not read_head(signature_file, 8).startswith(b'\x89PNG\r\n\x1a\n'):
+                    discard_uploads(supabase, uploaded)
                     flash("Signature must be a valid PNG file.")
                     student_data = supabase.table("profiles").select("*").eq("id", student_id).single().execute().data
                     return render_template('edit_student.html', student=student_data)
                 
-                signature_stream = io.BytesIO(signature_bytes)
-                if not check_transparency(signature_stream):
-                    flash("Signature PNG must have a transparent background.")
-                    student_data = supabase.table("profiles").select("*").eq("id", student_id).single().execute().data
-                    return render_template('edit_student.html', student=student_data)
-                    
-                file_ext = os.path.splitext(signature_file.filename)[1]
-                file_name = f"{student_num}_signature{file_ext}"
-                supabase.storage.from_("signatures").upload(
-                    file_name, signature_bytes, {"content-type": signature_file.mimetype, "upsert": "true"}
-                )
-                update_data["signature_url"] = supabase.storage.from_("signatures").get_public_url(file_name)
-                update_data["signature_status"] = "approved"
-                update_data["signature_disapproval_reason"] = None
+                signature_hash = content_hash(signature_file.stream)
+                if signature_hash == student_profile.get('signature_hash'):
+                    unchanged.append("Signature")
+                else:
+                    if not check_transparency(rewound(signature_file)):
+                        discard_uploads(supabase, uploaded)
+                        flash("Signature PNG must have a transparent background.")
+                        student_data = supabase.table("profiles").select("*").eq("id", student_id).single().execute().data
+                        return render_template('edit_student.html', student=student_data)
+
+                    file_ext = os.path.splitext(signature_file.filename)[1]
+                    file_name = versioned_filename(student_num, "signature", signature_hash, file_ext)
+                    supabase.storage.from_("signatures").upload(file_name, upload_body(signature_file), upload_options(signature_file.mimetype))
+                    uploaded.append(("signatures", file_name))
+                    update_data["signature_url"] = supabase.storage.from_("signatures").get_public_url(file_name)
+                    update_data["signature_hash"] = signature_hash
+                    update_data["signature_status"] = "approved"
+                    update_data["signature_disapproval_reason"] = None
 
-            supabase.table("profiles").update(update_data).eq("id", student_id).execute()
+            try:
+                supabase.table("profiles").update(update_data).eq("id", student_id).execute()
+                invalidate('students')
+            except Exception:
+                discard_uploads(supabase, uploaded)
+                raise
+
+            remove_superseded(supabase, "pictures", student_profile.get('picture_url'), update_data.get('picture_url'))
+            remove_superseded(supabase, "signatures", student_profile.get('signature_url'), update_data.get('signature_url'))
+
+            for job in direct_jobs:
+                queue_attach(supabase_admin, job)
             
             log_activity("Update Student", target_user_id=student_id, target_user_name=f"{first_name} {last_name}", details="Updated student profile details via admin edit.")
 
-            flash('Student profile updated successfully.')
+            if unchanged:
+                flash(f"Student profile updated successfully. {' and '.join(unchanged)} unchanged, upload skipped.")
+            elif direct_jobs:
+                flash(f"Student profile updated successfully. The new {' and '.join(j['kind'] for j in direct_jobs)} {'are' if len(direct_jobs) > 1 else 'is'} being checked and will appear shortly.")
+            else:
+                flash('Student profile updated successfully.')
             return redirect(url_for('admin.admin_students'))
 
         except Exception as e:
@@ -326,7 +432,7 @@ def admin_edit_student(student_id):
             flash("Student profile not found.", "error")
             return redirect(url_for('admin.admin_students'))
         
-        return render_template('edit_student.html', student=response.data)
+        return render_template('edit_student.html', student=response.data, upload_jobs=open_jobs(supabase_admin, student_id))
     except Exception as e:
         flash(f"Error fetching profile: {str(e)}", "error")
         return redirect(url_for('admin.admin_students'))
@@ -369,6 +475,7 @@ def admin_delete_student(student_id):
         log_activity("Delete Student", target_user_id=auth_user_id, target_user_name=student_name, details=f"Deleted student {profile.get('student_id')}.")
 
         supabase.table("profiles").delete().eq("id", auth_user_id).execute()
+        invalidate('students')
         
         try:
              supabase_admin.auth.admin.delete_user(auth_user_id)
@@ -380,11 +487,112 @@ def admin_delete_student(student_id):
         flash("Student deleted successfully (Auth, Profile, and Files).")
     except Exception as e:
         flash(f"Error during student deletion process: {str(e)}.", "error")
-        
+
     return redirect(url_for('admin.admin_students'))
 
+@admin_bp.route('/bulk_delete', methods=['POST'])
+@admin_required
+def admin_bulk_delete():
+    """
+    Deletes many students at once, either the selected ids or every student matching a filter.
+    Profiles, storage files and auth users are removed in batches (see bulk_delete.delete_students)
+    and the run is recorded as one activity-log entry. Accepts a form post or a JSON body
+    {student_ids} / {filters, search_name, verified, confirm_count}.
+
+    A filter-based delete only runs when confirm_count equals the number of students it matches now;
+    otherwise the form gets a confirmation page showing that count, and JSON a 409 with it.
+    """
+    wants_json = request.is_json
+    if wants_json:
+        payload = request.get_json(silent=True) or {}
+        student_ids = payload.get('student_ids') or []
+        raw_filters = payload.get('filters') or {}
+        search = (payload.get('search_name') or '').strip()
+        verified_choice = payload.get('verified', 'verified')
+        confirm_count = payload.get('confirm_count')
+    else:
+        student_ids = request.form.getlist('student_ids')
+        raw_filters = request.form
+        search = request.form.get('search_name', '').strip()
+        verified_choice = request.form.get('verified', 'verified')
+        confirm_count = request.form.get('confirm_count', type=int)
+    back_url = request.form.get('next') or ''
+    if not back_url.startswith('/') or back_url.startswith('//'):
+        back_url = url_for('admin.admin_students')
+
+    def respond(message, category, status=200, **extra):
+        if wants_json:
+            return jsonify({"success": category != "error", "message": message, **extra}), status
+        flash(message, category)
+        return redirect(back_url)
+
+    student_ids = list(dict.fromkeys(str(i) for i in student_ids if i))
+    filters = {column: raw_filters.get(field) for field, column in DELETE_FILTERS.items() if raw_filters.get(field)}
+    verified = {'verified': True, 'unverified': False}.get(verified_choice)
+
+    if not student_ids and not filters and not search:
+        # Deleting "everyone" is never what a bulk delete means
+        return respond("Select students or at least one filter to delete.", "error", 400)
+    if len(student_ids) > Config.BULK_DELETE_MAX:
+        return respond(f"You can delete at most {Config.BULK_DELETE_MAX} students at once.", "error", 400)
+
+    try:
+        if student_ids:
+            profiles = find_delete_targets(supabase, student_ids=student_ids)
+        else:
+            profiles = find_delete_targets(supabase, filters=filters, verified=verified, search=search)
+        profiles = [p for p in profiles if p['id'] != session.get('user_id')]
+        if not profiles:
+            return respond("No matching students found.", "error", 404)
+        if len(profiles) > Config.BULK_DELETE_MAX:
+            return respond(f"More than {Config.BULK_DELETE_MAX} students match these filters. Narrow them down and try again.", "error", 400)
+        if not student_ids and confirm_count != len(profiles):
+            # The admin confirms the count computed here, so only the students they were told about are deleted
+            message = f"{len(profiles)} student(s) match. Confirm this count to delete them."
+            if confirm_count is not None:
+                message = f"The matching students changed: {len(profiles)} now match, not {confirm_count}. Confirm again to delete them."
+            if wants_json:
+                return jsonify({"success": False, "message": message, "confirm_count": len(profiles)}), 409
+            fields = {field: raw_filters.get(field) for field in DELETE_FILTERS if raw_filters.get(field)}
+            fields.update(search_name=search, verified=verified_choice, next=back_url)
+            return render_template('bulk_delete_confirm.html', message=message, count=len(profiles),
+                                   sample=profiles[:10], fields=fields, back_url=back_url)
+
+        result = delete_students(supabase, supabase_admin, profiles)
+        invalidate('students')
+        names = {p['id']: f"{p.get('first_name')} {p.get('last_name')} ({p.get('student_id')})" for p in profiles}
+        missing = [i for i in student_ids if i not in names]
+
+        scope = f"{len(student_ids)} selected" if student_ids else ", ".join(
+            [f"{k}={v}" for k, v in filters.items()] + ([f"search={search}"] if search else []) + [f"verified={verified_choice}"])
+        details = f"Bulk deleted {len(result['deleted'])} of {len(profiles)} student(s) [{scope}]; {result['files_removed']} file(s) removed."
+        if result['failed']:
+            details += " Failed: " + "; ".join(f"{names[i]}: {reason}" for i, reason in result['failed'].items())
+        log_activity("Bulk Delete Students", details=details)
+
+        # An auth failure leaves the profile deleted but the account in place, so it is not counted as done
+        completed = [i for i in result['deleted'] if i not in result['failed']]
+        message = f"Deleted {len(completed)} student(s)."
+        category = "success"
+        if result['failed']:
+            shown = "; ".join(f"{names[i]}: {reason}" for i, reason in list(result['failed'].items())[:5])
+            more = f" (and {len(result['failed']) - 5} more)" if len(result['failed']) > 5 else ""
+            message += f" {len(result['failed'])} failed: {shown}{more}."
+            category = "warning"
+        if result['warnings']:
+            message += f" {len(result['warnings'])} student(s) left storage files behind; the storage GC will remove them."
+            category = "warning"
+        if missing:
+            message += f" {len(missing)} selected student(s) were not found."
+        return respond(message, category, deleted=result['deleted'], failed=result['failed'],
+                       warnings=result['warnings'], missing=missing)
+    except Exception as e:
+        print(f"Error in bulk delete: {str(e)}")
+        return respond(f"Error during bulk deletion: {str(e)}", "error", 500)
+
 @admin_bp.route('/archive')
 @admin_required
+@call_budget(2)
 def admin_archive():
     try:
         filter_ay = request.args.get('filter_ay', '')
@@ -415,10 +623,16 @@ def admin_archive():
         # --- Apply Pagination Range ---
         # We fetch the count and the data for the specific page
         query = query.order("created_at", desc=True).range(start, end)
-        archives_res = query.execute()
-        
-        archives = archives_res.data
-        total_items = archives_res.count if archives_res.count else 0
+        options_query = supabase.table("archived_groups").select("academic_year, semester, group_name")
+
+        def fetch_archives():
+            # The page and the filter options are independent: fetch them together
+            archives_res, all_options_res = gather(query.execute, options_query.execute)
+            return archives_res.data, archives_res.count, all_options_res.data
+
+        archives, total_items, all_data = cached(
+            ('archive', filter_ay, filter_semester, filter_program, filter_major, page), fetch_archives)
+        total_items = total_items if total_items else 0
         total_pages = (total_items + per_page - 1) // per_page
         
         ph_tz = pytz.timezone('Asia/Manila')
@@ -431,9 +645,6 @@ def admin_archive():
             except Exception as parse_e:
                 archive['created_at_display'] = str(archive.get('created_at', ''))
 
-        all_options_res = supabase.table("archived_groups").select("academic_year, semester, group_name").execute()
-        all_data = all_options_res.data
-        
         all_academic_years = sorted(list(set(d['academic_year'] for d in all_data if d.get('academic_year'))))
         all_semesters = sorted(list(set(d['semester'] for d in all_data if d.get('semester'))))
         
@@ -467,6 +678,7 @@ def admin_archive():
     
 @admin_bp.route('/printing')
 @admin_required
+@call_budget(3)
 def admin_printing():
     try:
         current_program = request.args.get('program', '')
@@ -474,10 +686,6 @@ def admin_printing():
         current_section = request.args.get('section', '')
         current_semester = request.args.get('semester', '')
 
-        # Fetch print settings
-        settings_res = supabase.table("print_settings").select("*").eq("id", 1).single().execute()
-        print_settings = settings_res.data if settings_res.data else {}
-
         # Added 'graduating_year' to the select list
         query = supabase.table("profiles").select("program, year_level, section, major, semester, graduating_year")
         
@@ -494,49 +702,33 @@ def admin_printing():
         if current_semester:
             query = query.eq('semester', current_semester)
             
-        profiles = query.execute().data
-        
         # --- UPDATE: Filter dropdown options to only show valid data ---
         all_profiles_query = supabase.table("profiles").select("program, year_level, section, semester")
         all_profiles_query = all_profiles_query.eq('email_verified', True)
-        all_profiles_res = all_profiles_query.execute()
         # ---------------------------------------------------------------
-        
-        all_profiles_data = all_profiles_res.data
+
+        replica = local_profiles()
+        if replica:
+            # Distinct groups and dropdown options straight from the local copy; only the settings are remote
+            where = {'email_verified': True}
+            for column, value in (('program', current_program), ('year_level', current_year),
+                                  ('section', current_section), ('semester', current_semester)):
+                if value: where[column] = value
+            print_settings = cached_print_settings()
+            profiles = replica.distinct(('program', 'year_level', 'section', 'major', 'semester', 'graduating_year'), where)
+            all_profiles_data = replica.distinct(('program', 'year_level', 'section', 'semester'), {'email_verified': True})
+        else:
+            # Print settings, the filtered groups and the dropdown options are independent: fetch them together
+            print_settings, profiles_res, all_profiles_res = gather(cached_print_settings, query.execute, all_profiles_query.execute)
+            profiles = profiles_res.data
+            all_profiles_data = all_profiles_res.data
         
         all_programs = sorted(list(set(p['program'] for p in all_profiles_data if p.get('program'))))
         all_years = sorted(list(set(p['year_level'] for p in all_profiles_data if p.get('year_level'))), key=lambda x: (x or "Z")[0])
         all_sections = sorted(list(set(p['section'] for p in all_profiles_data if p.get('section'))))
         all_semesters = sorted(list(set(p['semester'] for p in all_profiles_data if p.get('semester'))))
 
-        unique_groups = set()
-        for profile in profiles:
-            # Ensure mandatory fields exist
-            if not all([profile.get('program'), profile.get('year_level'), profile.get('section'), profile.get('semester')]):
-                continue
-            
-            major_val = profile.get('major') or 'None'
-            grad_year = profile.get('graduating_year') or 'None'
-            semester_val = profile.get('semester')
-            if profile.get('year_level') == 'Graduate':
-                # Structure: (Program, "Graduate", Section, "AY 2024-2025", Semester)
-                key = (
-                    profile.get('program'), 
-                    profile.get('year_level'), 
-                    profile.get('section'),
-                    f"AY {grad_year}", # Use Grad Year as the distinguishing factor
-                    semester_val
-                )
-            else:
-                # Structure: (Program, Year, Section, Major, Semester)
-                key = (
-                    profile.get('program'), 
-                    profile.get('year_level'), 
-                    profile.get('section'),
-                    major_val,
-                    semester_val
-                )
-            unique_groups.add(key)
+        unique_groups = set(filter(None, (group_key(profile) for profile in profiles)))
 
         sorted_groups = sorted(list(unique_groups))
         
@@ -577,6 +769,7 @@ def admin_save_print_settings():
         }
         settings_data['id'] = 1 
         supabase.table("print_settings").upsert(settings_data).execute()
+        invalidate('print_settings')
         flash("Print settings saved successfully.", "success")
         return redirect(url_for('admin.admin_printing'))
     except Exception as e:
@@ -585,6 +778,7 @@ def admin_save_print_settings():
 
 @admin_bp.route('/print_preview')
 @admin_required
+@call_budget(3)
 def admin_print_preview():
     program = request.args.get('program')
     year_level = request.args.get('year_level')
@@ -605,8 +799,7 @@ def admin_print_preview():
 
     if not adviser1_name:
         try:
-            settings_res = supabase.table("print_settings").select("*").eq("id", 1).single().execute()
-            s = settings_res.data
+            s = cached_print_settings()
             if s:
                 adviser1_name = s.get('adviser1_name')
                 adviser1_title = s.get('adviser1_title')
@@ -642,8 +835,17 @@ def admin_print_preview():
             if major == 'None' or major is None: query = query.is_("major", None)
             else: query = query.eq("major", major)
 
-        response = query.execute()
-        group_profiles = response.data
+        replica = local_profiles()
+        if replica:
+            where = {'program': program, 'year_level': year_level, 'section': section, 'semester': semester,
+                     'email_verified': True}
+            if year_level == 'Graduate':
+                where['graduating_year'] = major.replace("AY ", "").strip() if major else ""
+            else:
+                where['major'] = None if major in ('None', None) else major
+            group_profiles = replica.select(where)
+        else:
+            group_profiles = query.execute().data
 
         members = []
         for p in group_profiles:
@@ -712,13 +914,7 @@ def admin_archive_group():
         academic_year_form = request.form.get('academic_year') 
 
         # 1. Logic for Group Name
-        if year_level == 'Graduate':
-             grad_year_val = major.replace("AY ", "").strip() if major else ""
-             group_name = f"{program} - Graduate - Batch {grad_year_val} - {section}"
-        else:
-            group_name_parts = [program, f"{year_level}{section}"]
-            if major != 'None' and major: group_name_parts.append(major)
-            group_name = " - ".join(group_name_parts)
+        group_name = archive_group_name(program, year_level, section, major)
 
         # 2. Check if exists
         check_query = supabase.table("archived_groups").select("id").eq("group_name", group_name).eq("academic_year", academic_year_form).eq("semester", semester)
@@ -767,86 +963,9 @@ def admin_archive_group():
             flash("Cannot archive an empty group. No verified students found matching the criteria.", "warning")
             return redirect(url_for('admin.admin_printing'))
 
-        members = []
-        for p in group_profiles:
-            last_name = p.get('last_name', '')
-            first_name = p.get('first_name', '')
-            middle_name = p.get('middle_name', '')
-            suffix_name = p.get('suffix_name', '')
-            full_name_parts = [last_name]
-            if suffix_name: full_name_parts.append(suffix_name)
-            full_name_str = " ".join(full_name_parts) + ","
-            full_name = f"{full_name_str} {first_name} {middle_name}".strip()
-            full_name = " ".join(full_name.split())
-            if full_name == ',': full_name = "Name Missing"
-
-            # 4. Construct Course String (Ensure this logic matches Print Preview)
-            if p.get('year_level') == 'Graduate':
-                course = f"{p.get('program')} - Graduate {p.get('section')} (AY {p.get('graduating_year')})"
-            else:
-                course_parts = [p.get('program', 'N/A'), f"{p.get('year_level', 'N/A')}{p.get('section', 'N/A')}"]
-                if p.get('major'): course_parts.append(p.get('major'))
-                course = " - ".join(filter(None, course_parts)).strip()
-            
-            # 5. Handle Images 
-            archived_pic_url = p.get('picture_url') 
-            if p.get('picture_url'):
-                try:
-                    src_filename = p['picture_url'].split('/')[-1].split('?')[0]
-                    file_data = supabase_admin.storage.from_("pictures").download(src_filename)
-                    if file_data:
-                        compressed_data = compress_image_bytes(file_data)
-                        if compressed_data:
-                            file_data = compressed_data
-                            ext = ".jpg"
-                            content_type = "image/jpeg"
-                        else:
-                            ext = os.path.splitext(src_filename)[1]
-                            content_type = mimetypes.guess_type(src_filename)[0] or 'application/octet-stream'
-
-                        safe_ay = academic_year_form.replace('/', '-').replace('\\', '-')
-                        safe_sem = semester.replace(' ', '_')
-                        dest_path = f"{safe_ay}/{safe_sem}/{p['student_id']}_picture{ext}"
-                        
-                        upload_res = supabase_admin.storage.from_("archive").upload(
-                            dest_path, file_data, {"upsert": "true", "content-type": content_type}
-                        )
-                        if hasattr(upload_res, 'status_code') and not str(upload_res.status_code).startswith('2'):
-                             print(f"Failed to upload picture")
-                        else:
-                             archived_pic_url = supabase_admin.storage.from_("archive").get_public_url(dest_path)
-                except Exception as e:
-                    print(f"Error archiving picture for {p['student_id']}: {e}")
-
-            archived_sig_url = p.get('signature_url') 
-            if p.get('signature_url'):
-                try:
-                    src_filename = p['signature_url'].split('/')[-1].split('?')[0]
-                    file_data = supabase_admin.storage.from_("signatures").download(src_filename)
-                    if file_data:
-                        ext = os.path.splitext(src_filename)[1]
-                        safe_ay = academic_year_form.replace('/', '-').replace('\\', '-')
-                        safe_sem = semester.replace(' ', '_')
-                        dest_path = f"{safe_ay}/{safe_sem}/{p['student_id']}_signature{ext}"
-                        content_type = mimetypes.guess_type(dest_path)[0] or 'application/octet-stream'
-                        upload_res = supabase_admin.storage.from_("archive").upload(dest_path, file_data, {"upsert": "true", "content-type": content_type})
-                        if hasattr(upload_res, 'status_code') and not str(upload_res.status_code).startswith('2'):
-                             print(f"Failed to upload signature")
-                        else:
-                             archived_sig_url = supabase_admin.storage.from_("archive").get_public_url(dest_path)
-                except Exception as e:
-                    print(f"Error archiving signature for {p['student_id']}: {e}")
-
-            member = {
-                'full_name': full_name,
-                'student_id': p.get('student_id', 'N/A'),
-                'course': course,
-                'picture_url': archived_pic_url, 
-                'signature_url': archived_sig_url
-            }
-            members.append(member)
-        
-        sorted_members = sorted(members, key=lambda m: m.get('full_name', '').lower())
+        # 4-5. Course strings and images (downloads/compression/uploads run on a bounded pool)
+        with ThreadPoolExecutor(max_workers=Config.ARCHIVE_CONCURRENCY) as executor:
+            sorted_members, image_stats = archive_members(supabase_admin, group_profiles, executor)
         today = datetime.now()
         generation_date = today.strftime("%B %d, %Y")
         
@@ -860,14 +979,125 @@ def admin_archive_group():
         }
         
         supabase_admin.table("archived_groups").insert(insert_data).execute()
-        log_activity("Archive Group", details=f"Archived group {group_name} for AY {academic_year_form}.")
-        flash(f"Successfully archived group '{group_name}' for {academic_year_form}.", "success")
+        invalidate('archive')
+        image_report = (f"{image_stats['reused']} images reused, {image_stats['processed']} processed "
+                        f"({hit_rate(image_stats)}% hit rate)")
+        if compression_summary(image_stats):
+            image_report += f"; {compression_summary(image_stats)}"
+        log_activity("Archive Group", details=f"Archived group {group_name} for AY {academic_year_form}; {image_report}.")
+        flash(f"Successfully archived group '{group_name}' for {academic_year_form} ({image_report}).", "success")
     except Exception as e:
         print(f"Error archiving group: {str(e)}") 
         flash(f"Error creating archive: {str(e)}", "error")
         
     return redirect(url_for('admin.admin_printing'))
 
+@admin_bp.route('/archive_semester', methods=['POST'])
+@admin_required
+def admin_archive_semester():
+    """
+    Archives every group of a semester. Stops starting new groups after Config.ARCHIVE_TIME_BUDGET
+    seconds; running it again resumes with the groups that are still missing.
+    """
+    academic_year = request.form.get('academic_year', '').strip()
+    semester = request.form.get('semester', '').strip()
+    if not academic_year or not semester:
+        flash("Academic year and semester are required.", "error")
+        return redirect(url_for('admin.admin_printing'))
+
+    try:
+        summary = run_semester_archive(supabase_admin, academic_year, semester,
+                                       time_budget=Config.ARCHIVE_TIME_BUDGET)
+        log_activity("Archive Semester", details=summarize_archive(summary))
+        return render_template('archive_summary.html', summary=summary)
+    except Exception as e:
+        print(f"Error archiving semester: {str(e)}")
+        flash(f"Error archiving semester: {str(e)}", "error")
+        return redirect(url_for('admin.admin_printing'))
+
+@admin_bp.cli.command('archive-semester')
+@click.option('--academic-year', required=True, help='Academic year label, e.g. "AY 2025-2026".')
+@click.option('--semester', type=click.Choice(['1st', '2nd']), required=True)
+@click.option('--concurrency', type=int, default=None, help="Parallel image workers (default: ARCHIVE_CONCURRENCY).")
+def archive_semester_command(academic_year, semester, concurrency):
+    """Archive every group of a semester; safe to re-run after an interruption."""
+    def checkpoint(result):
+        line = f"[{result['status']}] {result['group_name']} ({result['students']} students)"
+        if result.get('error'):
+            line += f": {result['error']}"
+        click.echo(line)
+
+    summary = run_semester_archive(supabase_admin, academic_year, semester,
+                                   concurrency=concurrency, on_checkpoint=checkpoint)
+    details = summarize_archive(summary)
+    supabase_admin.table("activity_logs").insert({
+        "admin_name": "System (CLI)",
+        "action": "Archive Semester",
+        "details": details,
+        "created_at": datetime.now(pytz.timezone(Config.TIMEZONE)).isoformat()
+    }).execute()
+    click.echo(details)
+
+@admin_bp.cli.command('storage-gc')
+@click.option('--apply', 'apply_changes', is_flag=True, help="Delete the orphans (default is a dry run).")
+@click.option('--bucket', 'buckets', multiple=True, type=click.Choice(GC_BUCKETS), help="Limit to a bucket (repeatable).")
+@click.option('--min-age-hours', type=int, default=None, help="Keep objects newer than this (default: STORAGE_GC_MIN_AGE_HOURS).")
+def storage_gc_command(apply_changes, buckets, min_age_hours):
+    """Find (and with --apply remove) storage objects no profile or archive references."""
+    dry_run = not apply_changes
+    report = collect_garbage(supabase_admin, dry_run=dry_run, min_age_hours=min_age_hours, buckets=buckets or GC_BUCKETS)
+    for bucket, stats in report.items():
+        click.echo(f"{bucket}: scanned {stats['scanned']} ({format_size(stats['scanned_bytes'])}), "
+                   f"orphans {stats['orphans']} ({format_size(stats['orphan_bytes'])}), removed {stats['removed']}, errors {stats['errors']}")
+        for path in stats['sample']:
+            click.echo(f"  {path}")
+
+    details = summarize_gc(report, dry_run)
+    if not dry_run:
+        supabase_admin.table("activity_logs").insert({
+            "admin_name": "System (CLI)",
+            "action": "Storage GC",
+            "details": details,
+            "created_at": datetime.now(pytz.timezone(Config.TIMEZONE)).isoformat()
+        }).execute()
+    click.echo(details)
+
+@admin_bp.cli.command('backfill-images')
+@click.option('--checkpoint', default='image-backfill.jsonl', show_default=True, help="Progress file; re-run with the same file to resume.")
+@click.option('--derivatives', 'derivative_prefix', default=None, help="Write compressed copies under this folder instead of replacing the pictures.")
+@click.option('--quality', type=click.IntRange(1, 95), default=75, show_default=True)
+@click.option('--max-side', type=int, default=1024, show_default=True, help="Longest side in pixels.")
+@click.option('--target-kb', type=int, default=None, help="Search quality down to fit this size (floor: ARCHIVE_IMAGE_MIN_QUALITY).")
+@click.option('--min-kb', type=int, default=200, show_default=True, help="Leave smaller pictures alone.")
+@click.option('--concurrency', type=int, default=None, help="Parallel downloads/uploads (default: BACKFILL_CONCURRENCY).")
+@click.option('--limit', type=int, default=None, help="Stop after this many pictures.")
+@click.option('--dry-run', is_flag=True, help="Compress and report, but write nothing (no checkpoint either).")
+def backfill_images_command(checkpoint, derivative_prefix, quality, max_side, target_kb, min_kb, concurrency, limit, dry_run):
+    """Recompress existing profile pictures; stop any time with Ctrl-C and re-run to resume."""
+    progress = {'done': 0}
+
+    def report(entry, total):
+        progress['done'] += 1
+        line = f"[{progress['done']}/{total}] {entry['status']} {entry['path']}"
+        if entry['status'] == 'compressed':
+            line += f": {format_size(entry['before'])} -> {format_size(entry['after'])}"
+        elif entry.get('reason'):
+            line += f": {entry['reason']}"
+        click.echo(line)
+
+    totals = backfill_images(supabase_admin, checkpoint, concurrency=concurrency, quality=quality, max_side=max_side,
+                             target_kb=target_kb, min_kb=min_kb, derivative_prefix=derivative_prefix,
+                             limit=limit, dry_run=dry_run, on_progress=report)
+    details = summarize_backfill(totals, dry_run)
+    if not dry_run and totals['compressed']:
+        supabase_admin.table("activity_logs").insert({
+            "admin_name": "System (CLI)",
+            "action": "Image Backfill",
+            "details": details,
+            "created_at": datetime.now(pytz.timezone(Config.TIMEZONE)).isoformat()
+        }).execute()
+    click.echo(details)
+
 @admin_bp.route('/archive_preview/<archive_id>')
 @admin_required
 def admin_archive_preview(archive_id):
@@ -904,6 +1134,7 @@ def admin_delete_archive(archive_id):
         archive_details = "Unknown Archive"
         if archive_res.data: archive_details = f"{archive_res.data.get('group_name')} ({archive_res.data.get('academic_year')})"
         supabase.table("archived_groups").delete().eq("id", archive_id).execute()
+        invalidate('archive')
         log_activity("Delete Archive", details=f"Deleted archive: {archive_details}.")
         flash("Archive deleted successfully.", "success")
     except Exception as e:
@@ -935,82 +1166,30 @@ def admin_review_student(student_id):
     if request.method == 'POST':
         try:
             action = request.form.get('action')
-            update_data = {}
-            email_subject = ""
-            email_body = ""
+            reason = None
 
             # ============================
             #   APPROVAL / DISAPPROVAL
             # ============================
-            if action == 'approve_picture':
-                update_data = {
-                    'picture_status': 'approved',
-                    'picture_disapproval_reason': None,
-                    'is_locked': True
-                }
-                email_subject = "CCS SBO: Picture Approved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    "Your profile picture has been APPROVED by the Admin."
-                )
-
-            elif action == 'approve_signature':
-                update_data = {
-                    'signature_status': 'approved',
-                    'signature_disapproval_reason': None,
-                    'is_locked': True
-                }
-                email_subject = "CCS SBO: Signature Approved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    "Your digital signature has been APPROVED by the Admin."
-                )
-
-            elif action == 'disapprove_picture':
-                reason = request.form.get('picture_disapproval_reason', '').strip()
-                if not reason:
-                    flash("A reason is required.", "error")
-                    return render_template('review_student.html', student=student)
-
-                update_data = {
-                    'picture_status': 'disapproved',
-                    'picture_disapproval_reason': reason,
-                    'is_locked': False
-                }
-                email_subject = "CCS SBO: Picture Disapproved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    f"Your profile picture was DISAPPROVED.\nReason: {reason}\n\n"
-                    "Please login and update your picture."
-                )
+            if action not in REVIEW_ACTIONS:
+                flash("Invalid action.", "error")
+                return render_template('review_student.html', student=student)
 
-            elif action == 'disapprove_signature':
-                reason = request.form.get('signature_disapproval_reason', '').strip()
+            if action.startswith('disapprove_'):
+                field = action.replace('disapprove_', '')
+                reason = request.form.get(f'{field}_disapproval_reason', '').strip()
                 if not reason:
                     flash("A reason is required.", "error")
                     return render_template('review_student.html', student=student)
 
-                update_data = {
-                    'signature_status': 'disapproved',
-                    'signature_disapproval_reason': reason,
-                    'is_locked': False
-                }
-                email_subject = "CCS SBO: Signature Disapproved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    f"Your digital signature was DISAPPROVED.\nReason: {reason}\n\n"
-                    "Please login and update your signature."
-                )
-
-            else:
-                flash("Invalid action.", "error")
-                return render_template('review_student.html', student=student)
+            update_data, email_subject, email_body = build_review_decision(action, student.get('first_name'), reason)
 
             # ============================
             #   UPDATE DB & SEND EMAIL
             # ============================
             if update_data:
                 supabase.table("profiles").update(update_data).eq("id", student_id).execute()
+                invalidate('students')
 
                 # Send email notification & Capture result
                 email_sent = False
@@ -1044,12 +1223,263 @@ def admin_review_student(student_id):
     # --- DEFAULT GET REQUEST ---
     return render_template('review_student.html', student=student)
 
+# --- Bulk Review: grid of students + one-shot decisions ---
+@admin_bp.route('/bulk_review')
+@admin_required
+@call_budget(2)
+def admin_bulk_review():
+    filter_program = request.args.get('filter_program', '')
+    filter_year_level = request.args.get('filter_year_level', '')
+    filter_section = request.args.get('filter_section', '')
+    filter_status = request.args.get('filter_status', 'pending')
+    page = request.args.get('page', 1, type=int)
+    per_page = Config.BULK_REVIEW_PAGE_SIZE
+    start = (page - 1) * per_page
+    end = start + per_page - 1
+
+    try:
+        # Projection only: the grid never needs the full profile row
+        query = supabase.table("profiles").select(
+            "id, first_name, last_name, student_id, program, year_level, section, major, "
+            "picture_url, signature_url, picture_status, signature_status",
+            count='exact'
+        )
+        query = query.eq('email_verified', True)
+        if filter_program: query = query.eq('program', filter_program)
+        if filter_year_level: query = query.eq('year_level', filter_year_level)
+        if filter_section: query = query.eq('section', filter_section)
+        if filter_status in ('pending', 'disapproved'):
+            query = query.or_(f"picture_status.eq.{filter_status},signature_status.eq.{filter_status}")
+
+        query = query.order('program').order('year_level').order('section').order('last_name')
+        students_res = query.range(start, end).execute()
+        students = students_res.data
+        total_students = students_res.count if students_res.count else 0
+        total_pages = (total_students + per_page - 1) // per_page
+
+        # One facet scan instead of one per column
+        facets = supabase.table("profiles").select("program, year_level, section").eq('email_verified', True).execute().data
+        programs = sorted(list(set(f['program'] for f in facets if f.get('program'))))
+        all_years = sorted(list(set(f['year_level'] for f in facets if f.get('year_level'))), key=lambda x: (x or "Z")[0])
+        sections = sorted(list(set(f['section'] for f in facets if f.get('section'))))
+
+        return render_template(
+            'bulk_review.html',
+            students=students,
+            programs=programs,
+            all_years=all_years,
+            sections=sections,
+            filter_program=filter_program,
+            filter_year_level=filter_year_level,
+            filter_section=filter_section,
+            filter_status=filter_status,
+            page=page,
+            total_pages=total_pages,
+            total_students=total_students,
+            bulk_max=Config.BULK_REVIEW_MAX
+        )
+    except Exception as e:
+        flash(f"Error fetching students: {str(e)}", "error")
+        return render_template('bulk_review.html', students=[], programs=[], all_years=[], sections=[],
+                               filter_status=filter_status, page=1, total_pages=1, total_students=0,
+                               bulk_max=Config.BULK_REVIEW_MAX)
+
+@admin_bp.route('/bulk_review', methods=['POST'])
+@admin_required
+def admin_bulk_review_apply():
+    """
+    Applies one review action to many students: one select, one in_() update,
+    one multi-row activity-log insert and one SMTP session for all notifications.
+    Accepts a form post from the grid or a JSON body {student_ids, action, reason}.
+    """
+    wants_json = request.is_json
+    if wants_json:
+        payload = request.get_json(silent=True) or {}
+        student_ids = payload.get('student_ids') or []
+        action = payload.get('action')
+        reason = (payload.get('reason') or '').strip()
+    else:
+        student_ids = request.form.getlist('student_ids')
+        action = request.form.get('action')
+        reason = request.form.get('reason', '').strip()
+    back_url = request.form.get('next') or ''
+    if not back_url.startswith('/') or back_url.startswith('//'):
+        back_url = url_for('admin.admin_bulk_review')
+
+    def respond(message, category, status=200, **extra):
+        if wants_json:
+            return jsonify({"success": category != "error", "message": message, **extra}), status
+        flash(message, category)
+        return redirect(back_url)
+
+    # Keep order, drop blanks and duplicates
+    student_ids = list(dict.fromkeys(str(i) for i in student_ids if i))
+
+    if action not in REVIEW_ACTIONS:
+        return respond("Invalid action.", "error", 400)
+    if not student_ids:
+        return respond("No students selected.", "error", 400)
+    if len(student_ids) > Config.BULK_REVIEW_MAX:
+        return respond(f"You can review at most {Config.BULK_REVIEW_MAX} students at once.", "error", 400)
+    if action.startswith('disapprove_') and not reason:
+        return respond("A reason is required.", "error", 400)
+
+    try:
+        students_res = supabase.table("profiles").select("id, first_name, last_name, email").in_("id", student_ids).execute()
+        students = students_res.data or []
+        found_ids = [s['id'] for s in students]
+        missing_ids = [i for i in student_ids if i not in set(found_ids)]
+        if not found_ids:
+            return respond("None of the selected students were found.", "error", 404, missing=missing_ids)
+
+        # The status columns do not depend on the student, so one update covers the whole set
+        update_data, email_subject, _ = build_review_decision(action, None, reason)
+        supabase.table("profiles").update(update_data).in_("id", found_ids).execute()
+        invalidate('students')
+
+        log_activities([{
+            "action": f"{action.replace('_', ' ').title()}",
+            "target_user_id": s['id'],
+            "target_user_name": f"{s.get('first_name')} {s.get('last_name')}",
+            "details": f"Updated student status: {action} (bulk review)."
+        } for s in students])
+
+        messages = []
+        for s in students:
+            if s.get('email'):
+                _, subject, body = build_review_decision(action, s.get('first_name'), reason)
+                messages.append((s['email'], subject, body))
+        email_failed = send_status_emails(messages)
+
+        message = f"Updated {len(found_ids)} student(s): {action.replace('_', ' ')}."
+        category = "success"
+        if email_failed:
+            message += f" {len(email_failed)} email notification(s) failed. Check logs."
+            category = "warning"
+        if missing_ids:
+            message += f" {len(missing_ids)} selected student(s) were not found."
+        return respond(message, category, updated=found_ids, missing=missing_ids, email_failed=email_failed)
+    except Exception as e:
+        print(f"Error in bulk review: {str(e)}")
+        return respond(f"Error updating student statuses: {str(e)}", "error", 500)
+
+# --- Review Queue: walk pending students without going back to the list ---
+@admin_bp.route('/review_queue')
+@admin_required
+@call_budget(1)
+def admin_review_queue():
+    try:
+        queue = fetch_review_queue(supabase)
+    except Exception as e:
+        flash(f"Error loading review queue: {str(e)}", "error")
+        queue = []
+    return render_template(
+        'review_queue.html',
+        queue=queue,
+        queue_window=Config.REVIEW_QUEUE_PREFETCH,
+        next_url=url_for('admin.admin_review_queue_next'),
+        decide_url=url_for('admin.admin_bulk_review_apply'),
+        back_url=url_for('admin.admin_students')
+    )
+
+@admin_bp.route('/review_queue/next')
+@admin_required
+@call_budget(1)
+def admin_review_queue_next():
+    limit = min(request.args.get('limit', Config.REVIEW_QUEUE_PREFETCH, type=int), Config.BULK_REVIEW_PAGE_SIZE)
+    try:
+        students = fetch_review_queue(supabase, after=cursor_from_args(request.args), limit=limit)
+        return jsonify({"success": True, "students": students, "has_more": len(students) == limit}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@admin_bp.route('/rollover', methods=['GET'])
+@admin_required
+def admin_rollover():
+    """
+    Semester rollover page. Shows a dry-run diff for the selected semester before anything is written.
+    """
+    from_semester = request.args.get('from_semester', '')
+    graduating_year = request.args.get('graduating_year', '').strip() or current_academic_year()
+    unlock = request.args.get('unlock', '1') == '1'
+
+    diff = None
+    if from_semester:
+        try:
+            plan = build_rollover_plan(from_semester, graduating_year, unlock)
+            diff = preview_rollover(supabase, plan)
+        except ValueError as e:
+            flash(str(e), "error")
+        except Exception as e:
+            flash(f"Error building rollover preview: {str(e)}", "error")
+
+    return render_template('rollover.html',
+                           from_semester=from_semester,
+                           graduating_year=graduating_year,
+                           unlock=unlock,
+                           diff=diff,
+                           total=sum(d['count'] for d in diff) if diff else 0)
+
+@admin_bp.route('/rollover', methods=['POST'])
+@admin_required
+def admin_rollover_apply():
+    from_semester = request.form.get('from_semester', '')
+    graduating_year = request.form.get('graduating_year', '').strip()
+    unlock = request.form.get('unlock') == '1'
+
+    try:
+        plan = build_rollover_plan(from_semester, graduating_year, unlock)
+        try:
+            results = apply_rollover(supabase, plan)
+        finally:
+            # A step that fails still leaves the earlier steps applied
+            invalidate('students')
+        summary = summarize_rollover(from_semester, results, graduating_year)
+        log_activity("Semester Rollover", details=summary)
+        flash(summary, "success")
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for('admin.admin_rollover'))
+    except Exception as e:
+        flash(f"Error applying rollover: {str(e)}", "error")
+        return redirect(url_for('admin.admin_rollover'))
+
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin_bp.cli.command('rollover')
+@click.option('--from-semester', type=click.Choice(['1st', '2nd']), required=True, help="Semester being closed.")
+@click.option('--graduating-year', default=None, help="Academic year stored on new graduates (default: current).")
+@click.option('--keep-locks', is_flag=True, help="Do not unlock rolled-over students.")
+@click.option('--dry-run', is_flag=True, help="Only print how many students each step would move.")
+def rollover_command(from_semester, graduating_year, keep_locks, dry_run):
+    """Close a semester and promote students (flask --app main admin rollover)."""
+    graduating_year = graduating_year or current_academic_year()
+    plan = build_rollover_plan(from_semester, graduating_year, unlock=not keep_locks)
+
+    if dry_run:
+        for step in preview_rollover(supabase_admin, plan):
+            line = f"{step['label']}: {step['count']} students"
+            if step['needs_major']:
+                line += f" ({step['needs_major']} must select a major)"
+            click.echo(line)
+        return
+
+    results = apply_rollover(supabase_admin, plan)
+    summary = summarize_rollover(from_semester, results, graduating_year)
+    supabase_admin.table("activity_logs").insert({
+        "admin_name": "System (CLI)",
+        "action": "Semester Rollover",
+        "details": summary,
+        "created_at": datetime.now(pytz.timezone(Config.TIMEZONE)).isoformat()
+    }).execute()
+    click.echo(summary)
+
 @admin_bp.route('/activity_logs')
 @admin_required
+@call_budget(1)
 def activity_logs():
     try:
-        response = supabase.table("activity_logs").select("*").order("created_at", desc=True).limit(50).execute()
-        logs = response.data
+        logs = cached(('activity_logs',), lambda: supabase.table("activity_logs").select("*").order("created_at", desc=True).limit(50).execute().data)
         
         # Set Philippines timezone
         ph_tz = pytz.timezone('Asia/Manila')
@@ -1070,3 +1500,14 @@ def activity_logs():
     except Exception as e:
         flash(f"Error fetching activity logs: {str(e)}", "error")
         return render_template('activity_logs.html', logs=[])
+
+@admin_bp.route('/_perf')
+@admin_required
+def admin_perf():
+    """
+    p50/p95 per route and per backend call over the recent requests this process served, the reads concurrent
+    requests shared, and the state of this process's profile replica and page cache.
+    """
+    return render_template('perf.html', routes=route_stats(), calls=call_stats(), replica=profiles_replica.status(), cache=cache_stats(),
+                           coalesced=coalesce_stats(),
+                           samples=Config.PERF_SAMPLES, slow_ms=Config.PERF_SLOW_REQUEST_MS, enabled=Config.PERF_TRACING)
@@ -0,0 +1,382 @@
+import os
+import time
+import hashlib
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+from image_optimizer import compress_image_with_report
+import image_worker
+from utils import upload_options
+from storage_gc import scan_table
+
+
+def group_key(profile):
+    """
+    Printable group of a profile, as listed on the printing page.
+    Graduates are grouped by "AY <graduating_year>" instead of major.
+    Returns None when a mandatory field is missing.
+    """
+    if not all([profile.get('program'), profile.get('year_level'), profile.get('section'), profile.get('semester')]):
+        return None
+    if profile.get('year_level') == 'Graduate':
+        second = f"AY {profile.get('graduating_year') or 'None'}"
+    else:
+        second = profile.get('major') or 'None'
+    return (profile.get('program'), profile.get('year_level'), profile.get('section'), second, profile.get('semester'))
+
+
+def archive_group_name(program, year_level, section, major):
+    if year_level == 'Graduate':
+        grad_year_val = major.replace("AY ", "").strip() if major else ""
+        return f"{program} - Graduate - Batch {grad_year_val} - {section}"
+    group_name_parts = [program, f"{year_level}{section}"]
+    if major != 'None' and major: group_name_parts.append(major)
+    return " - ".join(group_name_parts)
+
+
+def member_display(p):
+    """
+    Returns (full_name, course) exactly as printed on the archive sheet.
+    """
+    last_name = p.get('last_name', '')
+    first_name = p.get('first_name', '')
+    middle_name = p.get('middle_name', '')
+    suffix_name = p.get('suffix_name', '')
+    full_name_parts = [last_name]
+    if suffix_name: full_name_parts.append(suffix_name)
+    full_name_str = " ".join(full_name_parts) + ","
+    full_name = f"{full_name_str} {first_name} {middle_name}".strip()
+    full_name = " ".join(full_name.split())
+    if full_name == ',': full_name = "Name Missing"
+
+    if p.get('year_level') == 'Graduate':
+        course = f"{p.get('program')} - Graduate {p.get('section')} (AY {p.get('graduating_year')})"
+    else:
+        course_parts = [p.get('program', 'N/A'), f"{p.get('year_level', 'N/A')}{p.get('section', 'N/A')}"]
+        if p.get('major'): course_parts.append(p.get('major'))
+        course = " - ".join(filter(None, course_parts)).strip()
+    return full_name, course
+
+
+def _with_retry(fn, *args, **kwargs):
+    """
+    Calls fn, retrying with exponential backoff so a burst of storage 429s/timeouts does not fail the group.
+    """
+    attempts = max(1, Config.ARCHIVE_RETRIES)
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(Config.ARCHIVE_RETRY_DELAY * (2 ** attempt))
+
+
+# Source bucket and whether the archived copy is recompressed, per image kind
+ARCHIVE_SOURCES = {
+    'picture': ('pictures', True),
+    'signature': ('signatures', False),
+}
+
+# Members whose source images are held in memory at once while archiving a group
+ARCHIVE_BATCH = 25
+
+# Compression totals kept in archive stats (see compression_summary)
+COMPRESSION_KEYS = ('compressed', 'compressed_bytes', 'quality_total', 'encodes', 'over_target')
+
+
+def _source_filename(url):
+    return url.split('/')[-1].split('?')[0]
+
+
+def _fetch_source(client, p, kind):
+    """
+    Downloads one source image and returns (bytes, sha256 hex), or (None, None) if it is empty.
+    """
+    bucket, _ = ARCHIVE_SOURCES[kind]
+    file_data = _with_retry(client.storage.from_(bucket).download, _source_filename(p[f'{kind}_url']))
+    if not file_data:
+        return None, None
+    return file_data, hashlib.sha256(file_data).hexdigest()
+
+
+def _store_object(client, kind, source_hash, src_filename, file_data):
+    """
+    Compresses (pictures only, to ARCHIVE_IMAGE_TARGET_KB when set) and uploads one image under its content hash.
+    Returns (archive_objects row or None if the upload was rejected, compression report or None).
+    """
+    _, compress = ARCHIVE_SOURCES[kind]
+    ext = os.path.splitext(src_filename)[1]
+    content_type = mimetypes.guess_type(src_filename)[0] or 'application/octet-stream'
+    report = None
+    if compress:
+        # Archive threads only wait here; the compression itself runs on the image worker processes
+        compressed_data, report = image_worker.run(
+            compress_image_with_report, file_data, wait=None,
+            target_bytes=Config.ARCHIVE_IMAGE_TARGET_KB * 1024,
+            min_quality=Config.ARCHIVE_IMAGE_MIN_QUALITY, min_side=Config.ARCHIVE_IMAGE_MIN_SIDE)
+        if not compressed_data:
+            report = None
+        else:
+            file_data, ext, content_type = compressed_data, ".jpg", "image/jpeg"
+
+    dest_path = f"objects/{kind}/{source_hash[:2]}/{source_hash}{ext}"
+    upload_res = _with_retry(client.storage.from_("archive").upload,
+                             dest_path, file_data, upload_options(content_type))
+    if hasattr(upload_res, 'status_code') and not str(upload_res.status_code).startswith('2'):
+        return None, report
+    return {
+        "source_hash": source_hash,
+        "kind": kind,
+        "path": dest_path,
+        "url": client.storage.from_("archive").get_public_url(dest_path),
+        "size": len(file_data)
+    }, report
+
+
+def lookup_archive_objects(client, keys):
+    """
+    Maps (source_hash, kind) -> archived URL for the keys already in archive_objects.
+    """
+    found = {}
+    hashes = sorted(set(h for h, _ in keys))
+    for i in range(0, len(hashes), 100):
+        res = client.table("archive_objects").select("source_hash, kind, url").in_("source_hash", hashes[i:i + 100]).execute()
+        for row in res.data or []:
+            found[(row['source_hash'], row['kind'])] = row['url']
+    return found
+
+
+def _archive_batch(client, profiles, executor, stats):
+    """
+    Returns {(index, kind): archived URL} for one batch of members, updating stats in place.
+    """
+    jobs = [(i, kind) for i, p in enumerate(profiles) for kind in ARCHIVE_SOURCES if p.get(f'{kind}_url')]
+
+    # 1. Images whose upload hash is on the profile and already archived need no download
+    hinted = {job: profiles[job[0]].get(f'{job[1]}_hash') for job in jobs if profiles[job[0]].get(f'{job[1]}_hash')}
+    known = lookup_archive_objects(client, [(h, kind) for (_, kind), h in hinted.items()]) if hinted else {}
+    resolved = {job: known[(h, job[1])] for job, h in hinted.items() if (h, job[1]) in known}
+
+    # 2. Download and hash every other source image
+    futures = {
+        (i, kind): executor.submit(_fetch_source, client, profiles[i], kind)
+        for i, kind in jobs if (i, kind) not in resolved
+    }
+    fetched = {}
+    for (i, kind), future in futures.items():
+        try:
+            file_data, source_hash = future.result()
+            if source_hash:
+                fetched[(i, kind)] = (file_data, source_hash)
+        except Exception as e:
+            stats['errors'] += 1
+            print(f"Error downloading {kind} for {profiles[i].get('student_id')}: {e}")
+
+    # 3. One lookup for the rest of what was archived before, then process each new image once
+    known.update(lookup_archive_objects(client, [(h, kind) for (_, kind), (_, h) in fetched.items() if (h, kind) not in known]))
+    pending = {}
+    for (i, kind), (file_data, source_hash) in fetched.items():
+        key = (source_hash, kind)
+        if key not in known and key not in pending:
+            src_filename = _source_filename(profiles[i][f'{kind}_url'])
+            pending[key] = executor.submit(_store_object, client, kind, source_hash, src_filename, file_data)
+
+    new_rows = []
+    for key, future in pending.items():
+        try:
+            row, report = future.result()
+        except Exception as e:
+            row, report = None, None
+            print(f"Error archiving {key[1]} {key[0][:12]}: {e}")
+        if report:
+            stats['compressed'] += 1
+            stats['compressed_bytes'] += report['bytes']
+            stats['quality_total'] += report['quality']
+            stats['encodes'] += report['encodes']
+            stats['over_target'] += not report['on_target']
+        if row:
+            known[key] = row['url']
+            new_rows.append(row)
+        else:
+            stats['errors'] += 1
+
+    if new_rows:
+        try:
+            client.table("archive_objects").upsert(new_rows, on_conflict="source_hash,kind").execute()
+        except Exception as e:
+            # Objects are uploaded; they are only re-processed next time
+            print(f"Error recording archive objects: {e}")
+
+    stats['processed'] += len(pending)
+    stats['reused'] += len(resolved) + len(fetched) - len(pending)
+    urls = {(i, kind): known.get((h, kind)) for (i, kind), (_, h) in fetched.items()}
+    urls.update(resolved)
+    return urls
+
+
+def archive_members(client, profiles, executor):
+    """
+    Archives every member's images on the shared executor (which bounds storage I/O and compression).
+
+    Images are content-addressed: an image whose bytes were archived before (any semester) reuses the
+    stored object and URL instead of being compressed and uploaded again.
+    Returns (members sorted by name, stats) where stats counts 'reused', 'processed' and 'errors',
+    plus the compression totals read by compression_summary().
+    """
+    stats = dict({'reused': 0, 'processed': 0, 'errors': 0}, **{key: 0 for key in COMPRESSION_KEYS})
+    members = []
+    for start in range(0, len(profiles), ARCHIVE_BATCH):
+        batch = profiles[start:start + ARCHIVE_BATCH]
+        urls = _archive_batch(client, batch, executor, stats)
+        for i, p in enumerate(batch):
+            full_name, course = member_display(p)
+            members.append({
+                'full_name': full_name,
+                'student_id': p.get('student_id', 'N/A'),
+                'course': course,
+                # Fall back to the live URL if the image could not be archived
+                'picture_url': urls.get((i, 'picture')) or p.get('picture_url'),
+                'signature_url': urls.get((i, 'signature')) or p.get('signature_url')
+            })
+    return sorted(members, key=lambda m: m.get('full_name', '').lower()), stats
+
+
+def hit_rate(stats):
+    total = stats['reused'] + stats['processed']
+    return round(100.0 * stats['reused'] / total, 1) if total else 0.0
+
+
+def compression_summary(stats):
+    """
+    "12 pictures compressed to 84 KB on average at quality 55 (2.3 encodes each), 1 over the 150 KB target",
+    or '' when no picture was compressed.
+    """
+    count = stats.get('compressed', 0)
+    if not count:
+        return ''
+    text = (f"{count} pictures compressed to {stats['compressed_bytes'] / count / 1024:.0f} KB on average "
+            f"at quality {stats['quality_total'] / count:.0f} ({stats['encodes'] / count:.1f} encodes each)")
+    if stats['over_target']:
+        text += f", {stats['over_target']} over the {Config.ARCHIVE_IMAGE_TARGET_KB} KB target"
+    return text
+
+
+def load_signatories(client):
+    """
+    Signatories saved on the printing page (print_settings row 1), in the archived_groups format.
+    """
+    s = client.table("print_settings").select("*").eq("id", 1).single().execute().data or {}
+    return {
+        "adviser1": {"name": s.get('adviser1_name'), "title": s.get('adviser1_title'), "date": None},
+        "adviser2": {"name": s.get('adviser2_name'), "title": s.get('adviser2_title'), "date": None},
+        "dean": {"name": s.get('dean_name'), "title": s.get('dean_title')},
+        "head": {"name": s.get('head_name'), "title": s.get('head_title')},
+        "director": {"name": s.get('director_name'), "title": s.get('director_title')}
+    }
+
+
+def run_semester_archive(client, academic_year, semester, signatories=None, concurrency=None,
+                         time_budget=None, on_checkpoint=None):
+    """
+    Archives every printable group of `semester` under `academic_year`.
+
+    - Profiles are read once and partitioned into groups in memory.
+    - Groups already in archived_groups are skipped, so an interrupted run resumes where it stopped.
+    - Image work for all groups shares one pool of `concurrency` workers.
+    - Each group's archived_groups row is inserted as soon as it finishes (the checkpoint).
+    - With `time_budget` (seconds), no new group is started once it is used up; the rest are reported as remaining.
+
+    Returns a summary dict with per-group results and totals.
+    """
+    started = time.monotonic()
+    concurrency = concurrency or Config.ARCHIVE_CONCURRENCY
+    signatories = signatories if signatories is not None else load_signatories(client)
+
+    # Every page is read before grouping: a group cut short would be checkpointed and never completed
+    profiles = scan_table(client, "profiles", "*", {"semester": semester, "email_verified": True})
+    groups = {}
+    for p in profiles:
+        key = group_key(p)
+        if key:
+            groups.setdefault(key, []).append(p)
+
+    existing_res = client.table("archived_groups").select("group_name").eq("academic_year", academic_year).eq("semester", semester).execute()
+    existing = set(row['group_name'] for row in (existing_res.data or []))
+
+    summary = {
+        'academic_year': academic_year,
+        'semester': semester,
+        'groups': [],
+        'archived': 0,
+        'skipped': 0,
+        'failed': 0,
+        'remaining': 0,
+        'students': 0,
+        'image_errors': 0,
+        'images_reused': 0,
+        'images_processed': 0,
+    }
+    summary.update({stat: 0 for stat in COMPRESSION_KEYS})
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for key in sorted(groups):
+            program, year_level, section, major, _ = key
+            group_name = archive_group_name(program, year_level, section, major)
+            result = {'group_name': group_name, 'students': len(groups[key]), 'image_errors': 0}
+
+            if group_name in existing:
+                result['status'] = 'skipped'
+            elif time_budget is not None and time.monotonic() - started >= time_budget:
+                result['status'] = 'remaining'
+            else:
+                try:
+                    members, stats = archive_members(client, groups[key], executor)
+                    client.table("archived_groups").insert({
+                        "academic_year": academic_year,
+                        "semester": semester,
+                        "group_name": group_name,
+                        "student_data": members,
+                        "generation_date": datetime.now().strftime("%B %d, %Y"),
+                        "signatories": signatories
+                    }).execute()
+                    result['status'] = 'archived'
+                    result['image_errors'] = stats['errors']
+                    result['hit_rate'] = hit_rate(stats)
+                    summary['students'] += len(members)
+                    summary['image_errors'] += stats['errors']
+                    summary['images_reused'] += stats['reused']
+                    summary['images_processed'] += stats['processed']
+                    for stat in COMPRESSION_KEYS:
+                        summary[stat] += stats[stat]
+                except Exception as e:
+                    print(f"Error archiving group {group_name}: {e}")
+                    result['status'] = 'failed'
+                    result['error'] = str(e)
+
+            summary[result['status']] += 1
+            summary['groups'].append(result)
+            if on_checkpoint:
+                on_checkpoint(result)
+
+    summary['elapsed'] = round(time.monotonic() - started, 1)
+    summary['hit_rate'] = hit_rate({'reused': summary['images_reused'], 'processed': summary['images_processed']})
+    return summary
+
+
+def summarize_archive(summary):
+    """
+    One-line audit summary for the activity log.
+    """
+    text = (f"Semester archive {summary['academic_year']} {summary['semester']} Sem: "
+            f"{summary['archived']} groups archived ({summary['students']} students), "
+            f"{summary['skipped']} already archived, {summary['failed']} failed")
+    if summary['remaining']:
+        text += f", {summary['remaining']} remaining"
+    text += f", {summary['images_reused']} images reused / {summary['images_processed']} processed ({summary['hit_rate']}% hit rate)"
+    if summary['image_errors']:
+        text += f", {summary['image_errors']} image errors"
+    if compression_summary(summary):
+        text += f"; {compression_summary(summary)}"
+    return text + f" in {summary['elapsed']}s."
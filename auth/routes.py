@@ -1,9 +1,11 @@
 import os
-import io
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from extensions import supabase, supabase_admin
+from extensions import supabase, supabase_admin, user_client
 from config import Config
-from utils import check_transparency
+from utils import check_transparency, content_hash, versioned_filename, upload_options
+from fanout import gather
+from upload_intake import upload_size, read_head, rewound, upload_body
+from direct_upload import upload_owner_id, get_job, validate_staged, promote, set_job_status
 import re
 
 auth_bp = Blueprint('auth', __name__,
@@ -44,7 +46,7 @@ def login():
             profile = profile_response.data
             email = profile['email']
 
-            auth_response = supabase.auth.sign_in_with_password({
+            auth_response = user_client().auth.sign_in_with_password({
                 'email': email,
                 'password': password,
             })
@@ -118,34 +120,51 @@ def register():
             flash("Please fill out all required fields.")
             return render_template("register.html")
             
-        if not picture_file or not picture_file.filename:
-            flash("1x1 Picture is required.")
-            return render_template("register.html")
-        
-        picture_bytes = picture_file.read()
-        
-        if len(picture_bytes) > Config.MAX_FILE_SIZE:
-            flash(f"Picture file size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
+        # Images the browser uploaded straight to storage are validated here, before the account exists
+        owner_id = upload_owner_id()
+        staged = {}
+        try:
+            for kind in ('picture', 'signature'):
+                job = get_job(supabase_admin, request.form.get(f'{kind}_upload'), owner_id, kind)
+                if job and job['status'] == 'signed':
+                    staged[kind] = (job,) + validate_staged(supabase_admin, job)
+        except ValueError as e:
+            flash(str(e))
             return render_template("register.html")
 
-        if not signature_file or not signature_file.filename:
-            flash("Signature is required.")
-            return render_template("register.html")
-        
-        signature_bytes = signature_file.read()
+        if 'picture' in staged:
+            picture_hash = staged['picture'][2]
+        else:
+            if not picture_file or not picture_file.filename:
+                flash("1x1 Picture is required.")
+                return render_template("register.html")
+            
+            if upload_size(picture_file) > Config.MAX_FILE_SIZE:
+                flash(f"Picture file size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
+                return render_template("register.html")
 
-        if len(signature_bytes) > Config.MAX_FILE_SIZE:
-            flash(f"Signature file size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
-            return render_template("register.html")
+            picture_hash = content_hash(picture_file.stream)
 
-        if not signature_bytes.startswith(b'\x89PNG\r\n\x1a\n'):
-            flash("Signature must be a valid PNG file.")
-            return render_template("register.html")
+        if 'signature' in staged:
+            signature_hash = staged['signature'][2]
+        else:
+            if not signature_file or not signature_file.filename:
+                flash("Signature is required.")
+                return render_template("register.html")
+            
+            if upload_size(signature_file) > Config.MAX_FILE_SIZE:
+                flash(f"Signature file size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
+                return render_template("register.html")
 
-        signature_stream = io.BytesIO(signature_bytes)
-        if not check_transparency(signature_stream):
-            flash("Signature PNG must have a transparent background.")
-            return render_template("register.html")
+            if not read_head(signature_file, 8).startswith(b'\x89PNG\r\n\x1a\n'):
+                flash("Signature must be a valid PNG file.")
+                return render_template("register.html")
+
+            if not check_transparency(rewound(signature_file)):
+                flash("Signature PNG must have a transparent background.")
+                return render_template("register.html")
+
+            signature_hash = content_hash(signature_file.stream)
             
         if year_level in ("3rd Year", "4th Year"):
             if program in ("BSIT", "BSCS"):
@@ -159,20 +178,23 @@ def register():
             
         try:
             # Step 1: Check if student ID already exists
-            existing_student = supabase.table("profiles").select("student_id").eq("student_id", student_id).execute()
+            # Both duplicate checks are independent, so they run together
+            existing_student, existing_email = gather(
+                supabase.table("profiles").select("student_id").eq("student_id", student_id).execute,
+                supabase.table("profiles").select("email").eq("email", email).execute
+            )
             if existing_student.data:
                 flash("This Student ID is already registered.", category="error")
                 return render_template("register.html")
             
             # --- NEW CHECK: Check if Email already exists ---
-            existing_email = supabase.table("profiles").select("email").eq("email", email).execute()
             if existing_email.data:
                 flash("This Email Address is already registered.")
                 return render_template("register.html")
             # ------------------------------------------------
 
             # Step 2: Create Auth User
-            auth_response = supabase.auth.sign_up({
+            auth_response = user_client().auth.sign_up({
                 "email": email,
                 "password": password,
                 "options": {
@@ -185,24 +207,39 @@ def register():
                 user_id = auth_response.user.id
                 
                 # Step 3: Upload files
-                try:
+                def store_picture():
+                    if 'picture' in staged:
+                        # Already in storage: move it to its versioned key instead of uploading again
+                        job, data, file_hash, content_type, ext = staged['picture']
+                        return promote(supabase_admin, job, student_id, data, file_hash, content_type, ext)
                     pic_ext = os.path.splitext(picture_file.filename)[1]
-                    pic_file_name = f"{student_id}_picture{pic_ext}"
+                    pic_file_name = versioned_filename(student_id, "picture", picture_hash, pic_ext)
                     supabase.storage.from_("pictures").upload(
                         pic_file_name, 
-                        picture_bytes, 
-                        {"content-type": picture_file.mimetype, "upsert": "true"}
+                        upload_body(picture_file), 
+                        upload_options(picture_file.mimetype)
                     )
-                    picture_url = supabase.storage.from_("pictures").get_public_url(pic_file_name)
+                    return pic_file_name, supabase.storage.from_("pictures").get_public_url(pic_file_name)
 
+                def store_signature():
+                    if 'signature' in staged:
+                        job, data, file_hash, content_type, ext = staged['signature']
+                        return promote(supabase_admin, job, student_id, data, file_hash, content_type, ext)
                     sig_ext = os.path.splitext(signature_file.filename)[1]
-                    sig_file_name = f"{student_id}_signature{sig_ext}"
+                    sig_file_name = versioned_filename(student_id, "signature", signature_hash, sig_ext)
                     supabase.storage.from_("signatures").upload(
                         sig_file_name, 
-                        signature_bytes, 
-                        {"content-type": signature_file.mimetype, "upsert": "true"}
+                        upload_body(signature_file), 
+                        upload_options(signature_file.mimetype)
                     )
-                    signature_url = supabase.storage.from_("signatures").get_public_url(sig_file_name)
+                    return sig_file_name, supabase.storage.from_("signatures").get_public_url(sig_file_name)
+
+                try:
+                    # The two uploads are independent, so they run together
+                    (pic_file_name, picture_url), (sig_file_name, signature_url) = gather(store_picture, store_signature)
+
+                    for job in (entry[0] for entry in staged.values()):
+                        set_job_status(supabase_admin, job['id'], 'attached')
                     
                 except Exception as upload_error:
                     supabase_admin.auth.admin.delete_user(user_id)
@@ -225,6 +262,8 @@ def register():
                     "major": major,
                     "picture_url": picture_url,
                     "signature_url": signature_url,
+                    "picture_hash": picture_hash,
+                    "signature_hash": signature_hash,
                     "account_type": "student",
                     "picture_status": "pending",
                     "signature_status": "pending",
@@ -278,7 +317,7 @@ def forgot_password():
             session['reset_email'] = email
             session['email_just_sent'] = True
 
-            supabase.auth.reset_password_for_email(
+            user_client().auth.reset_password_for_email(
                 email,
                 { "redirect_to": url_for("auth.login", _external=True) }
             )
@@ -302,7 +341,7 @@ def check_email():
 
     if request.method == 'POST':
         try:
-            supabase.auth.reset_password_for_email(
+            user_client().auth.reset_password_for_email(
                 email,
                 { "redirect_to": url_for("auth.login", _external=True) }
             )
@@ -335,7 +374,7 @@ def resend_verification():
         #    Note: Supabase's `resend` method handles checking if the user is already verified.
         #    If verified, it might not send, or will send a "password reset" style email depending on config.
         #    For unverified users, it sends the signup confirmation link again.
-        response = supabase.auth.resend({
+        response = user_client().auth.resend({
             "type": "signup",
             "email": email,
             "options": {
@@ -363,7 +402,7 @@ def resend_verification():
 
 @auth_bp.route('/logout')
 def logout():
+    # Supabase sessions only live in the per-request client used to sign in, so there is nothing to revoke here
     session.clear()
-    supabase.auth.sign_out()
     flash('You have been logged out.')
     return redirect(url_for('auth.login'))
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Route-level benchmarks against the in-memory Supabase stand-in (bench/standin.py).
+
+Loads synthetic datasets of each size, drives the real Flask routes in-process with concurrent clients and prints
+throughput and latency percentiles per route. No Supabase project or network is needed.
+
+    python -m bench                                        # 1k, 10k and 50k students, 20 ms injected latency
+    python -m bench --sizes 1000 --latency-ms 0 --scenario admin_students login
+    python -m bench --json before.json                     # save a run...
+    python -m bench --compare before.json                  # ...and compare a later one against it
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+
+# The stand-in answers every Supabase call; these only need to look valid
+STANDIN_URL = "https://bench.supabase.co"
+os.environ["SUPABASE_URL"] = STANDIN_URL
+os.environ["SUPABASE_KEY"] = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench"
+os.environ["SUPABASE_SERVICE_KEY"] = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+os.environ.setdefault("FLASK_SECRET_KEY", "bench")
+os.environ.setdefault("PERF_TRACING", "true")
+os.environ.setdefault("PERF_SLOW_REQUEST_MS", "600000")  # keep slow_request records out of the report
+os.environ.setdefault("PAGE_CACHE", "false")  # measure the queries, not repeated hits on cached pages
+
+from bench import dataset
+from bench.standin import StandIn
+
+SCENARIOS = ('login', 'register', 'admin_students', 'admin_printing', 'admin_print_preview',
+             'admin_archive_group', 'president_dashboard')
+# Account each scenario is signed in as (None: anonymous)
+SCENARIO_ACCOUNTS = {
+    'admin_students': dataset.ADMIN_ID,
+    'admin_printing': dataset.ADMIN_ID,
+    'admin_print_preview': dataset.ADMIN_ID,
+    'admin_archive_group': dataset.ADMIN_ID,
+    'president_dashboard': dataset.PRESIDENT_ID,
+}
+# Archiving compresses and uploads a whole group per request, so it runs fewer requests
+HEAVY_SCENARIOS = ('admin_archive_group',)
+
+STUDENT_PAGES = ('', '&page=3', '&filter_program=BSIT', '&search_name=san', '&sort_by=student_id&sort_order=desc',
+                 '&filter_program=BSCS&filter_year_level=3rd Year&page=2')
+PRINTING_PAGES = ('', '?program=BSIT', '?program=BSIS&year_level=2nd Year', '?semester=2nd')
+
+_local = threading.local()
+
+
+def printable_groups(profiles):
+    """
+    Verified groups as (program, year_level, section, major-or-AY, semester), largest first.
+    """
+    from archive_scheduler import group_key
+    sizes = {}
+    for p in profiles:
+        key = group_key(p) if p.get('email_verified') else None
+        if key:
+            sizes[key] = sizes.get(key, 0) + 1
+    return sorted(sizes, key=lambda k: (-sizes[k], k))
+
+
+def group_args(group):
+    program, year_level, section, major, semester = group
+    return {'program': program, 'year_level': year_level, 'section': section, 'major': major, 'semester': semester}
+
+
+def register_form(n):
+    import io
+    student_id = f"2099-{n:06d}"
+    return {
+        'email': f"bench-{n}@bench.example.edu", 'password': 'Bench-pass-1', 'confirm_password': 'Bench-pass-1',
+        'first_name': 'Bench', 'middle_name': 'Load', 'suffix_name': '', 'last_name': f"Student{n}",
+        'student_id': student_id, 'program': 'BSIT', 'semester': '1st', 'year_level': '1st Year', 'section': 'A',
+        'major': '',
+        'picture': (io.BytesIO(dataset.image_bytes('picture', student_id)), 'picture.jpg', 'image/jpeg'),
+        'signature': (io.BytesIO(dataset.image_bytes('signature', student_id)), 'signature.png', 'image/png'),
+    }
+
+
+def make_request(scenario, client, n, groups):
+    """
+    Sends request number `n` of `scenario`. Returns (response, check), where check(response, flashes) says
+    whether the route really succeeded (routes catch their errors and flash them instead of failing).
+    """
+    no_error = lambda res, flashes: res.status_code == 200 and not any(c == 'error' for c, _ in flashes)
+    if scenario == 'login':
+        res = client.post('/login', data={'student_id': dataset.STUDENT_ID, 'password': dataset.PASSWORD})
+        return res, lambda res, flashes: res.status_code == 302
+    if scenario == 'register':
+        res = client.post('/register', data=register_form(n), content_type='multipart/form-data')
+        return res, lambda res, flashes: any(m.startswith('Registration initiated') for _, m in flashes)
+    if scenario == 'admin_students':
+        return client.get('/admin/students?' + STUDENT_PAGES[n % len(STUDENT_PAGES)].lstrip('&')), no_error
+    if scenario == 'admin_printing':
+        return client.get('/admin/printing' + PRINTING_PAGES[n % len(PRINTING_PAGES)]), no_error
+    if scenario == 'admin_print_preview':
+        return client.get('/admin/print_preview', query_string=group_args(groups[n % len(groups)])), no_error
+    if scenario == 'admin_archive_group':
+        form = dict(group_args(groups[n % len(groups)]), academic_year=f"BENCH-{n}")
+        res = client.post('/admin/archive_group', data=form)
+        return res, lambda res, flashes: res.status_code == 302 and any(c == 'success' for c, _ in flashes)
+    if scenario == 'president_dashboard':
+        return client.get('/president/dashboard'), no_error
+    raise ValueError(scenario)
+
+
+def install_hooks(app):
+    """
+    Collects, per request and per thread, the messages flashed and the backend calls made.
+    """
+    from flask import g, message_flashed
+
+    def flashed(sender, message, category, **extra):
+        _local.flashes.append((category, message))
+    message_flashed.connect(flashed, app, weak=False)
+
+    @app.after_request
+    def count_calls(response):
+        if 'perf_calls' in g:
+            _local.calls = len([c for c in g.perf_calls if c[0] in ('table', 'rpc', 'storage', 'auth')])
+        return response
+
+
+def signed_in_client(app, student_id):
+    client = app.test_client()
+    if student_id:
+        res = client.post('/login', data={'student_id': student_id, 'password': dataset.PASSWORD})
+        if res.status_code != 302:
+            raise RuntimeError(f"could not sign in as {student_id}")
+    return client
+
+
+def run_scenario(app, standin, scenario, requests, concurrency, warmup, groups):
+    """
+    Sends `requests` requests from `concurrency` threads, each with its own signed-in client.
+    """
+    clients = [signed_in_client(app, SCENARIO_ACCOUNTS.get(scenario)) for _ in range(concurrency)]
+    lock = threading.Lock()
+    latencies, calls, failures = [], [], []
+
+    def send(client, n):
+        _local.flashes, _local.calls = [], 0
+        started = time.perf_counter()
+        res, check = make_request(scenario, client, n, groups)
+        elapsed = time.perf_counter() - started
+        return elapsed, check(res, _local.flashes), f"{res.status_code} {_local.flashes}"
+
+    # Warm-up requests run first on one client (template compilation, first connections) and are not measured
+    for n in range(warmup):
+        _, ok, detail = send(clients[0], n)
+        if not ok:
+            failures.append(f"warm-up: {detail}")
+
+    counter = iter(range(warmup, warmup + requests))
+
+    def worker(client):
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            elapsed, ok, detail = send(client, n)
+            with lock:
+                latencies.append(elapsed)
+                calls.append(_local.calls)
+                if not ok:
+                    failures.append(detail)
+
+    standin_requests, standin_busy = standin.requests, standin.busy
+    threads = [threading.Thread(target=worker, args=(c,)) for c in clients]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0.0
+    return {
+        "scenario": scenario,
+        "requests": len(latencies),
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": latencies[-1] * 1000 if latencies else 0.0,
+        "errors": len(failures),
+        "first_error": failures[0] if failures else None,
+        "calls": sum(calls) / len(calls) if calls else 0.0,
+        "standin_calls": standin.requests - standin_requests,
+        "standin_ms": (standin.busy - standin_busy) * 1000 / max(1, len(latencies)),
+    }
+
+
+def print_result(size, r):
+    print(f"{size:>7} {r['scenario']:<22} {r['rps']:8.1f} {r['p50']:8.1f} {r['p95']:8.1f} {r['p99']:8.1f} "
+          f"{r['calls']:6.1f} {r['standin_ms']:9.2f} {r['errors']:6}", flush=True)
+    if r['first_error']:
+        print(f"{'':>8}first error: {r['first_error']}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['size'], r['scenario']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path} (negative latency change is faster):")
+    print(f"{'size':>7} {'scenario':<22} {'req/s':>9} {'p50':>9} {'p95':>9}")
+    change = lambda new, old: f"{(new - old) / old * 100:+8.1f}%" if old else f"{'n/a':>9}"
+    for r in results:
+        old = baseline.get((r['size'], r['scenario']))
+        if old:
+            print(f"{r['size']:>7} {r['scenario']:<22} {change(r['rps'], old['rps'])} "
+                  f"{change(r['p50'], old['p50'])} {change(r['p95'], old['p95'])}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark the routes against an in-memory Supabase stand-in.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help="students per dataset")
+    parser.add_argument('--scenario', choices=SCENARIOS, nargs='+', default=list(SCENARIOS))
+    parser.add_argument('--latency-ms', type=float, default=20, help="injected latency per Supabase call")
+    parser.add_argument('--jitter', type=float, default=0.5, help="extra random latency, as a fraction of --latency-ms")
+    parser.add_argument('--requests', type=int, default=100, help="measured requests per scenario")
+    parser.add_argument('--heavy-requests', type=int, default=5, help="measured requests for archiving")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent clients")
+    parser.add_argument('--warmup', type=int, default=3, help="unmeasured requests before each scenario")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', metavar='PATH', help="write the results as JSON")
+    parser.add_argument('--compare', metavar='PATH', help="compare with the results of an earlier --json run")
+    args = parser.parse_args()
+
+    standin = StandIn(latency=args.latency_ms / 1000, jitter=args.jitter, seed=args.seed)
+    import supabase_clients
+    # Every Supabase client (anon, service and per-request) is built on this client, through the app's own transports
+    supabase_clients.http_client = supabase_clients.build_http_client(standin)
+    from main import app
+    app.config['TESTING'] = True
+    install_hooks(app)
+
+    print(f"Latency {args.latency_ms:g} ms (+{args.jitter:.0%} jitter), concurrency {args.concurrency}")
+    print(f"{'size':>7} {'scenario':<22} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'calls':>6} {'stand-in':>9} {'errors':>6}")
+    results = []
+    for size in args.sizes:
+        for scenario in args.scenario:
+            # A fresh dataset per scenario, so writes from one (register, archive) never change another's input
+            profiles = dataset.load(standin, size, STANDIN_URL, seed=args.seed)
+            groups = printable_groups(profiles)
+            requests = args.heavy_requests if scenario in HEAVY_SCENARIOS else args.requests
+            result = run_scenario(app, standin, scenario, requests, args.concurrency, args.warmup, groups)
+            result['size'] = size
+            results.append(result)
+            print_result(size, result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "settings": {k: v for k, v in vars(args).items() if k not in ('json', 'compare')},
+                "results": results,
+            }, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    return 1 if any(r['errors'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Synthetic, reproducible data for the benchmarks: students spread over the real programs, year levels, sections
+and majors, one admin and one class president, print settings, and lazily generated picture/signature files.
+"""
+import io
+import uuid
+import random
+from datetime import datetime, timedelta, timezone
+
+PROGRAMS = ('BSIT', 'BSIS', 'BSCS')
+YEAR_LEVELS = ('1st Year', '2nd Year', '3rd Year', '4th Year')
+SECTIONS = ('A', 'B', 'C', 'D')
+SEMESTERS = ('1st', '2nd')
+MAJORS = {'BSIT': ('WMAD - A', 'SMP - B', 'AMG - C', 'NETAD - D'), 'BSCS': ('GV', 'IS'), 'BSIS': ()}
+FIRST_NAMES = ('Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Angelica', 'John', 'Kristine', 'Paolo', 'Camille',
+               'Miguel', 'Patricia', 'Carlo', 'Nicole', 'Rafael', 'Bea', 'Joshua', 'Andrea', 'Vince', 'Sofia')
+LAST_NAMES = ('Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Garcia', 'Mendoza', 'Torres', 'Tomas', 'Andrada',
+              'Castillo', 'Flores', 'Villanueva', 'Ramos', 'Castro', 'Rivera', 'Aquino', 'Navarro', 'Salazar', 'Mercado')
+STATUSES = ('approved', 'approved', 'approved', 'pending', 'disapproved')
+
+PASSWORD = 'bench-password'
+ADMIN_ID = 'ADMIN-0001'
+PRESIDENT_ID = '2024-90001'
+STUDENT_ID = '2024-90002'
+# The president's class; the student account is one of its members
+PRESIDENT_CLASS = {'program': 'BSIT', 'year_level': '3rd Year', 'section': 'A', 'major': 'WMAD - A', 'semester': '1st'}
+
+# Distinct base images per kind; each student's file appends its own suffix so every file hashes differently
+BASE_IMAGES = 8
+
+
+def _image(kind, variant):
+    from PIL import Image, ImageDraw
+    rng = random.Random(f"{kind}-{variant}")
+    if kind == 'picture':
+        img = Image.new('RGB', (600, 600), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(40):
+            x, y = rng.randrange(600), rng.randrange(600)
+            draw.ellipse((x, y, x + rng.randrange(20, 200), y + rng.randrange(20, 200)),
+                         fill=tuple(rng.randrange(256) for _ in range(3)))
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG', quality=90)
+    else:
+        img = Image.new('RGBA', (400, 150), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        points = [(20 + i * 12, 75 + rng.randrange(-50, 50)) for i in range(30)]
+        draw.line(points, fill=(0, 0, 0, 255), width=4)
+        buf = io.BytesIO()
+        img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+_base_images = {}
+
+
+def image_bytes(kind, student_id):
+    """
+    The file of one student: a shared base image plus a per-student trailer (decoders ignore trailing bytes).
+    """
+    variant = sum(map(ord, student_id)) % BASE_IMAGES
+    if (kind, variant) not in _base_images:
+        _base_images[(kind, variant)] = _image(kind, variant)
+    return _base_images[(kind, variant)] + f"\n{student_id}".encode()
+
+
+def _profile(rng, student_id, host, created_at, **fields):
+    program = fields.get('program') or rng.choice(PROGRAMS)
+    year_level = fields.get('year_level') or (rng.choice(YEAR_LEVELS) if rng.random() > 0.05 else 'Graduate')
+    if 'major' in fields:
+        major = fields['major']
+    elif year_level in ('3rd Year', '4th Year') and MAJORS[program]:
+        major = rng.choice(MAJORS[program])
+    else:
+        major = None
+    picture, signature = f"{student_id}_picture.jpg", f"{student_id}_signature.png"
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "email": f"{student_id.lower()}@bench.example.edu",
+        "student_id": student_id,
+        "first_name": rng.choice(FIRST_NAMES),
+        "middle_name": rng.choice(LAST_NAMES),
+        "suffix_name": None,
+        "last_name": rng.choice(LAST_NAMES),
+        "program": program,
+        "year_level": year_level,
+        "section": fields.get('section') or rng.choice(SECTIONS),
+        "semester": fields.get('semester') or rng.choice(SEMESTERS),
+        "major": major,
+        "graduating_year": '2024-2025' if year_level == 'Graduate' else None,
+        "account_type": fields.get('account_type', 'student'),
+        "email_verified": fields.get('email_verified', rng.random() < 0.95),
+        "is_locked": False,
+        "picture_url": f"{host}/storage/v1/object/public/pictures/{picture}",
+        "signature_url": f"{host}/storage/v1/object/public/signatures/{signature}",
+        "picture_hash": None,  # rows from before upload hashing, so archiving downloads and hashes every image
+        "signature_hash": None,
+        "picture_status": rng.choice(STATUSES),
+        "signature_status": rng.choice(STATUSES),
+        "picture_disapproval_reason": None,
+        "signature_disapproval_reason": None,
+        "created_at": created_at.isoformat(),
+        "updated_at": created_at.isoformat(),
+    }
+
+
+def load(standin, students, host, seed=42):
+    """
+    Fills `standin` with `students` synthetic students plus the admin, president and student accounts
+    (all with password PASSWORD). Returns the profiles.
+    """
+    rng = random.Random(seed)
+    standin.users.clear()
+    standin.objects.clear()
+    start = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    profiles = [_profile(rng, f"{2021 + i % 4}-{i:05d}", host, start + timedelta(minutes=i)) for i in range(students)]
+    accounts = [
+        _profile(rng, ADMIN_ID, host, start, account_type='admin', email_verified=True,
+                 program='BSIT', year_level='4th Year', section='A', major=None, semester='1st'),
+        _profile(rng, PRESIDENT_ID, host, start, account_type='president', email_verified=True, **PRESIDENT_CLASS),
+        _profile(rng, STUDENT_ID, host, start, email_verified=True, **PRESIDENT_CLASS),
+    ]
+    profiles.extend(accounts)
+    for p in accounts:
+        standin.add_user(p['id'], p['email'], PASSWORD)
+
+    standin.load('profiles', profiles)
+    standin.load('activity_logs', [])
+    standin.load('archived_groups', [])
+    standin.load('archive_objects', [])
+    standin.load('upload_jobs', [])
+    standin.load('print_settings', [{
+        "id": 1, "academic_year": "2024-2025",
+        "adviser1_name": "Adviser One", "adviser1_title": "Class Adviser",
+        "adviser2_name": "Adviser Two", "adviser2_title": "Class Adviser",
+        "dean_name": "Dean Name", "dean_title": "Dean",
+        "head_name": "Head Name", "head_title": "Department Head",
+        "director_name": "Director Name", "director_title": "Campus Director",
+    }])
+    for p in profiles:
+        sid = p['student_id']
+        standin.objects[('pictures', f"{sid}_picture.jpg")] = lambda sid=sid: image_bytes('picture', sid)
+        standin.objects[('signatures', f"{sid}_signature.png")] = lambda sid=sid: image_bytes('signature', sid)
+    return profiles
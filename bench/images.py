@@ -0,0 +1,323 @@
+"""
+Encoder comparison for image_optimizer: output size, encode/decode time and SSIM for JPEG, progressive JPEG,
+WebP and AVIF over a sweep of quality settings, on a synthetic corpus (or your own images).
+
+Every source is prepared like compress_image_bytes does (EXIF rotation applied, downscaled to fit --max-size),
+then encoded with each format and quality. SSIM compares the decoded output with the prepared image, both
+flattened onto white, on luma (1.0 means identical).
+
+    python -m bench.images                                  # synthetic corpus, all formats, q 40-90
+    python -m bench.images --formats jpeg-progressive webp --quality 50 60 70 --json images.json
+    python -m bench.images --images ~/Pictures/samples --csv images.csv
+
+Needs NumPy for SSIM (pip install numpy); the app itself does not.
+"""
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import platform
+import statistics
+
+# Current compress_image_bytes defaults, marked in the summary
+DEFAULT_FORMAT, DEFAULT_QUALITY = 'jpeg-progressive', 60
+FORMATS = ('jpeg', 'jpeg-progressive', 'webp', 'avif')
+QUALITIES = (40, 50, 60, 70, 80, 90)
+# Pillow feature needed per format
+FORMAT_FEATURES = {'webp': 'webp', 'avif': 'avif'}
+
+
+# --- Synthetic corpus ---
+
+def _photo(rng, size):
+    """
+    Photo-like RGB content: smooth colour fields, hard-edged shapes and fine sensor-like noise.
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw
+    w, h = size
+    field = rng.random((max(2, h // 64), max(2, w // 64), 3)) * 255
+    img = Image.fromarray(field.astype(np.uint8)).resize(size, Image.Resampling.BICUBIC)
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x, y = int(rng.integers(0, w)), int(rng.integers(0, h))
+        box = (x, y, x + int(rng.integers(w // 40, w // 6)), y + int(rng.integers(h // 40, h // 6)))
+        colour = tuple(int(c) for c in rng.integers(0, 256, 3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=colour)
+    pixels = np.asarray(img, dtype=np.int16)
+    noise = np.tile(rng.normal(0, 6, (256, 256, 1)), (h // 256 + 1, w // 256 + 1, 1))[:h, :w].astype(np.int16)
+    return Image.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+
+
+def _graphic(rng, size, transparent):
+    """
+    Flat-colour artwork (logo, chart or signature-like strokes), RGBA on a transparent background when asked.
+    """
+    from PIL import Image, ImageDraw
+    w, h = size
+    img = Image.new('RGBA', size, (0, 0, 0, 0) if transparent else (255, 255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    palette = [tuple(int(c) for c in rng.integers(0, 256, 3)) + (255,) for _ in range(6)]
+    for _ in range(25):
+        x, y = int(rng.integers(0, w)), int(rng.integers(0, h))
+        box = (x, y, x + int(rng.integers(w // 20, w // 3)), y + int(rng.integers(h // 20, h // 3)))
+        draw.rounded_rectangle(box, radius=w // 50, fill=palette[int(rng.integers(0, len(palette)))])
+    points = [(int(x), int(h / 2 + rng.normal(0, h / 6))) for x in range(0, w, max(1, w // 60))]
+    draw.line(points, fill=(20, 20, 20, 255), width=max(2, w // 200), joint='curve')
+    return img
+
+
+def _encode(img, fmt, **params):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **params)
+    return buf.getvalue()
+
+
+def synthetic_corpus(seed=7):
+    """
+    [(name, kind, bytes)]: phone JPEGs with each EXIF rotation, an upload-sized ID photo, large alpha PNGs
+    and palette images (PNG and GIF with a transparent index).
+    """
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    corpus = []
+    # Phones store landscape pixels and an Orientation tag (274) saying how to rotate them for display
+    for name, orientation in (('phone_upright', 1), ('phone_rot90', 6), ('phone_rot270', 8), ('phone_rot180', 3)):
+        img = _photo(rng, (4032, 3024))
+        exif = Image.Exif()
+        exif[274] = orientation
+        corpus.append((name, 'phone_jpeg', _encode(img, 'JPEG', quality=92, exif=exif.tobytes())))
+    corpus.append(('id_photo', 'upload_jpeg', _encode(_photo(rng, (600, 600)), 'JPEG', quality=90)))
+    corpus.append(('logo_alpha', 'alpha_png', _encode(_graphic(rng, (2400, 2400), True), 'PNG')))
+    corpus.append(('signature_alpha', 'alpha_png', _encode(_graphic(rng, (2000, 800), True), 'PNG')))
+    chart = _graphic(rng, (1600, 1200), False).convert('RGB').quantize(64)
+    corpus.append(('chart_palette', 'palette_png', _encode(chart, 'PNG', optimize=True)))
+    sticker = _graphic(rng, (800, 800), True)
+    sticker_p = sticker.convert('RGB').quantize(31)
+    sticker_p.paste(31, mask=sticker.getchannel('A').point(lambda a: 255 if a < 128 else 0))
+    corpus.append(('sticker_palette', 'palette_gif', _encode(sticker_p, 'GIF', transparency=31)))
+    return corpus
+
+
+def folder_corpus(path):
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            with open(full, 'rb') as f:
+                corpus.append((name, os.path.splitext(name)[1].lstrip('.').lower() or 'file', f.read()))
+    return corpus
+
+
+# --- Preparation, encoding and SSIM ---
+
+def prepare(data, max_size):
+    """
+    Decodes, applies EXIF rotation and downscales like compress_image_bytes.
+    Returns (image in RGB or RGBA, the same image flattened onto white as the SSIM reference).
+    """
+    from PIL import Image, ImageOps
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    if img.mode == 'P' and 'transparency' in img.info:
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'A' in img.mode else 'RGB')
+    img.thumbnail(max_size, Image.Resampling.LANCZOS)
+    return img, flatten(img)
+
+
+def flatten(img):
+    from PIL import Image
+    if img.mode != 'RGBA':
+        return img.convert('RGB')
+    background = Image.new('RGB', img.size, (255, 255, 255))
+    background.paste(img, mask=img.getchannel('A'))
+    return background
+
+
+def encode(img, flat, fmt, quality, webp_method, avif_speed):
+    """
+    Encoded bytes of `img` in `fmt`. JPEG has no alpha, so it gets the image flattened onto white.
+    """
+    if fmt == 'jpeg':
+        return _encode(flat, 'JPEG', quality=quality, optimize=True)
+    if fmt == 'jpeg-progressive':
+        return _encode(flat, 'JPEG', quality=quality, optimize=True, progressive=True)
+    if fmt == 'webp':
+        return _encode(img, 'WEBP', quality=quality, method=webp_method)
+    if fmt == 'avif':
+        return _encode(img, 'AVIF', quality=quality, speed=avif_speed)
+    raise ValueError(fmt)
+
+
+def decode(data):
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+def _luma(img):
+    import numpy as np
+    rgb = np.asarray(img, dtype=np.float64)
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def _box_mean(x, window):
+    import numpy as np
+    c = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (c[window:, window:] - c[:-window, window:] - c[window:, :-window] + c[:-window, :-window]) / window ** 2
+
+
+def ssim(reference, candidate, window=7):
+    """
+    Mean structural similarity of two same-sized RGB images on luma, over a sliding window x window box
+    (the constants and sample covariance of Wang et al. 2004 / scikit-image's defaults).
+    """
+    a, b = _luma(reference), _luma(candidate)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    n = window * window
+    correction = n / (n - 1)
+    mu_a, mu_b = _box_mean(a, window), _box_mean(b, window)
+    var_a = (_box_mean(a * a, window) - mu_a * mu_a) * correction
+    var_b = (_box_mean(b * b, window) - mu_b * mu_b) * correction
+    cov = (_box_mean(a * b, window) - mu_a * mu_b) * correction
+    s = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(s.mean())
+
+
+def _timed(fn, repeat):
+    """
+    (result of the last call, median seconds over `repeat` calls)
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+# --- Running and reporting ---
+
+def run(corpus, formats, qualities, max_size, repeat, webp_method, avif_speed):
+    rows = []
+    for name, kind, data in corpus:
+        (img, flat), prepare_s = _timed(lambda: prepare(data, max_size), repeat)
+        for fmt in formats:
+            for quality in qualities:
+                output, encode_s = _timed(lambda: encode(img, flat, fmt, quality, webp_method, avif_speed), repeat)
+                decoded, decode_s = _timed(lambda: decode(output), repeat)
+                rows.append({
+                    "image": name,
+                    "kind": kind,
+                    "source_bytes": len(data),
+                    "width": img.width,
+                    "height": img.height,
+                    "prepare_ms": round(prepare_s * 1000, 2),
+                    "format": fmt,
+                    "quality": quality,
+                    "bytes": len(output),
+                    "encode_ms": round(encode_s * 1000, 2),
+                    "decode_ms": round(decode_s * 1000, 2),
+                    "ssim": round(ssim(flat, flatten(decoded)), 5),
+                })
+        print(f"  {name}: {img.width}x{img.height}, prepared in {prepare_s * 1000:.0f} ms", file=sys.stderr, flush=True)
+    return rows
+
+
+def summarize(rows):
+    """
+    Per (format, quality) over the corpus: mean bytes, size relative to the current default, times and SSIM.
+    """
+    baseline = {r['image']: r['bytes'] for r in rows if (r['format'], r['quality']) == (DEFAULT_FORMAT, DEFAULT_QUALITY)}
+    groups = {}
+    for r in rows:
+        groups.setdefault((r['format'], r['quality']), []).append(r)
+    summary = []
+    for (fmt, quality), items in groups.items():
+        relative = [r['bytes'] / baseline[r['image']] for r in items if baseline.get(r['image'])]
+        summary.append({
+            "format": fmt,
+            "quality": quality,
+            "default": (fmt, quality) == (DEFAULT_FORMAT, DEFAULT_QUALITY),
+            "mean_bytes": round(statistics.mean(r['bytes'] for r in items)),
+            "vs_default": round(statistics.mean(relative), 3) if relative else None,
+            "encode_ms": round(statistics.mean(r['encode_ms'] for r in items), 2),
+            "decode_ms": round(statistics.mean(r['decode_ms'] for r in items), 2),
+            "mean_ssim": round(statistics.mean(r['ssim'] for r in items), 4),
+            "min_ssim": round(min(r['ssim'] for r in items), 4),
+        })
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'format':<17} {'q':>3} {'mean KB':>9} {'vs default':>10} {'encode ms':>10} {'decode ms':>10} "
+          f"{'SSIM':>7} {'min SSIM':>9}")
+    for s in summary:
+        relative = f"{s['vs_default'] * 100:9.0f}%" if s['vs_default'] is not None else f"{'':>10}"
+        print(f"{s['format']:<17} {s['quality']:>3} {s['mean_bytes'] / 1024:9.1f} {relative} {s['encode_ms']:10.1f} "
+              f"{s['decode_ms']:10.1f} {s['mean_ssim']:7.4f} {s['min_ssim']:9.4f}" + ("  <- current default" if s['default'] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.images", description="Compare image encoders and quality settings.")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--quality', type=int, nargs='+', default=list(QUALITIES))
+    parser.add_argument('--max-size', type=int, default=1024, help="longest side after downscaling (compress_image_bytes uses 1024)")
+    parser.add_argument('--repeat', type=int, default=3, help="timings are the median of this many runs")
+    parser.add_argument('--webp-method', type=int, default=4, help="WebP effort, 0 (fast) to 6 (small)")
+    parser.add_argument('--avif-speed', type=int, default=6, help="AVIF speed, 0 (small) to 10 (fast)")
+    parser.add_argument('--images', metavar='DIR', help="benchmark the files in DIR instead of the synthetic corpus")
+    parser.add_argument('--save-corpus', metavar='DIR', help="also write the synthetic corpus to DIR")
+    parser.add_argument('--json', metavar='PATH', help="write every measurement and the summary as JSON")
+    parser.add_argument('--csv', metavar='PATH', help="write every measurement as CSV")
+    args = parser.parse_args()
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        parser.error("NumPy is needed for SSIM: pip install numpy")
+    import PIL
+    from PIL import features
+    formats = [f for f in args.formats if f not in FORMAT_FEATURES or features.check(FORMAT_FEATURES[f])]
+    for missing in sorted(set(args.formats) - set(formats)):
+        print(f"Skipping {missing}: this Pillow build has no {FORMAT_FEATURES[missing]} support", file=sys.stderr)
+
+    print("Building corpus...", file=sys.stderr, flush=True)
+    corpus = folder_corpus(args.images) if args.images else synthetic_corpus()
+    if args.save_corpus and not args.images:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        for name, kind, data in corpus:
+            ext = {'alpha_png': 'png', 'palette_png': 'png', 'palette_gif': 'gif'}.get(kind, 'jpg')
+            with open(os.path.join(args.save_corpus, f"{name}.{ext}"), 'wb') as f:
+                f.write(data)
+
+    rows = run(corpus, formats, args.quality, (args.max_size, args.max_size), args.repeat, args.webp_method, args.avif_speed)
+    summary = summarize(rows)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "settings": {k: v for k, v in vars(args).items() if k not in ('json', 'csv', 'save_corpus')},
+                "corpus": [{"image": name, "kind": kind, "bytes": len(data)} for name, kind, data in corpus],
+                "results": rows,
+                "summary": summary,
+            }, f, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
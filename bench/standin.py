@@ -0,0 +1,511 @@
+"""
+In-memory stand-in for the Supabase HTTP APIs the app uses, served as an httpx transport.
+
+The real supabase-py clients (and the app's retry/timing transports) run unchanged on top of it:
+PostgREST tables and RPCs, Storage objects and the Auth endpoints for sign-in, sign-up and user deletion.
+Only the subset of each API that this app calls is implemented.
+"""
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qsl, unquote
+import httpx
+
+# Supabase's default cap on rows returned by one PostgREST request (db-max-rows)
+MAX_ROWS = 1000
+
+# Generated primary keys: serial for logs, UUIDs elsewhere
+SERIAL_TABLES = ('activity_logs', 'archive_objects')
+# Tables whose updated_at is set on every insert and update, like the trigger in the README schema
+TOUCHED_TABLES = ('profiles',)
+LOGIC_KEYS = ('or', 'and', 'not.or', 'not.and')
+RESERVED_PARAMS = ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns')
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _json(status, body, headers=None):
+    return httpx.Response(status, content=json.dumps(body).encode(),
+                          headers={'content-type': 'application/json', **(headers or {})})
+
+
+def _pgrst_error(status, code, message):
+    return _json(status, {"code": code, "details": None, "hint": None, "message": message})
+
+
+def _storage_error(status, error, message):
+    return _json(status, {"statusCode": str(status), "error": error, "message": message})
+
+
+# --- PostgREST filters ---
+
+def _unquote_value(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return value
+
+
+def _split_top(text):
+    """
+    Splits "a.eq.1,and(b.gt.2,c.lt.3)" on the commas outside parentheses and double quotes.
+    """
+    parts, depth, quoted, current = [], 0, False, []
+    for i, ch in enumerate(text):
+        if ch == '"' and (i == 0 or text[i - 1] != '\\'):
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0 and not quoted:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(ch)
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def _text(value):
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    return None if value is None else str(value)
+
+
+def _ordered(a, b):
+    try:
+        return float(a), float(b)
+    except (TypeError, ValueError):
+        return a, b
+
+
+def _like(pattern, flags=0):
+    regex = ''.join('.*' if ch in '%*' else re.escape(ch) for ch in pattern)
+    return re.compile(f'^{regex}$', flags | re.DOTALL)
+
+
+def _condition(column, expression):
+    """
+    A row predicate for one "column=op.value" filter, e.g. ("status", "not.in.(a,b)").
+    """
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition('.')
+
+    if op == 'is':
+        target = {'null': None, 'true': True, 'false': False}[raw.lower()]
+        test = lambda row: row.get(column) is target
+    elif op == 'in':
+        values = {_unquote_value(v) for v in _split_top(raw.strip()[1:-1])} if raw.strip() != '()' else set()
+        test = lambda row: _text(row.get(column)) in values
+    elif op in ('like', 'ilike'):
+        pattern = _like(_unquote_value(raw), re.IGNORECASE if op == 'ilike' else 0)
+        test = lambda row: row.get(column) is not None and bool(pattern.match(str(row.get(column))))
+    else:
+        value = _unquote_value(raw)
+        compare = {
+            'eq': lambda a, b: a == b,
+            'neq': lambda a, b: a != b,
+            'gt': lambda a, b: a > b,
+            'gte': lambda a, b: a >= b,
+            'lt': lambda a, b: a < b,
+            'lte': lambda a, b: a <= b,
+        }[op]
+
+        def test(row):
+            current = _text(row.get(column))
+            if current is None:
+                return False  # SQL: comparisons with NULL are never true
+            if op in ('eq', 'neq'):
+                return compare(current, value)
+            return compare(*_ordered(current, value))
+    return (lambda row: not test(row)) if negate else test
+
+
+def _logic(operator, body):
+    """
+    A row predicate for an or()/and() tree such as or=(a.eq.1,and(b.gt.2,c.lt.3)).
+    """
+    negate = operator.startswith('not.')
+    combine = any if operator.endswith('or') else all
+    tests = []
+    for item in _split_top(body.strip()[1:-1]):
+        nested = re.match(r'^(not\.)?(and|or)\(', item)
+        if nested:
+            prefix = (nested.group(1) or '') + nested.group(2)
+            tests.append(_logic(prefix, item[len(prefix):]))
+        else:
+            column, _, expression = item.partition('.')
+            tests.append(_condition(column, expression))
+    test = lambda row: combine(t(row) for t in tests)
+    return (lambda row: not test(row)) if negate else test
+
+
+class Query:
+    """
+    The parsed query string of one PostgREST request.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.tests = []
+        self.equalities = []  # (column, value) pairs usable with an index
+        for key, value in params:
+            if key in RESERVED_PARAMS:
+                continue
+            if key in LOGIC_KEYS:
+                self.tests.append(_logic(key, value))
+                continue
+            self.tests.append(_condition(key, value))
+            if value.startswith('eq.'):
+                self.equalities.append((key, _unquote_value(value[3:])))
+        lookup = dict(params)
+        self.select = [c.strip() for c in lookup.get('select', '*').split(',') if c.strip()]
+        self.order = [o for o in lookup.get('order', '').split(',') if o]
+        self.limit = int(lookup['limit']) if 'limit' in lookup else None
+        self.offset = int(lookup.get('offset', 0))
+        self.on_conflict = [c.strip() for c in lookup.get('on_conflict', 'id').split(',')]
+
+    def matches(self, row):
+        return all(test(row) for test in self.tests)
+
+    def sort(self, rows):
+        for term in reversed(self.order):
+            column, *modifiers = term.split('.')
+            desc = 'desc' in modifiers
+            nulls_first = 'nullsfirst' in modifiers or (desc and 'nullslast' not in modifiers)
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r.get(column), reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+        return rows
+
+    def project(self, row):
+        if '*' in self.select:
+            return dict(row)
+        return {column: row.get(column) for column in self.select}
+
+
+class Table:
+    """
+    Rows of one table plus lazily built equality indexes (column -> value -> rows).
+    """
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = list(rows or [])
+        self._indexes = {}
+        self._serial = len(self.rows)
+
+    def _index(self, column):
+        if column not in self._indexes:
+            index = {}
+            for row in self.rows:
+                index.setdefault(_text(row.get(column)), []).append(row)
+            self._indexes[column] = index
+        return self._indexes[column]
+
+    def candidates(self, query):
+        if not query.equalities:
+            return self.rows
+        smallest = min((self._index(column).get(value, []) for column, value in query.equalities), key=len)
+        return smallest
+
+    def select(self, query):
+        return [row for row in self.candidates(query) if query.matches(row)]
+
+    def insert(self, row):
+        if 'id' not in row or row['id'] is None:
+            if self.name in SERIAL_TABLES:
+                self._serial += 1
+                row['id'] = self._serial
+            else:
+                row['id'] = str(uuid.uuid4())
+        row.setdefault('created_at', _now())
+        if self.name in TOUCHED_TABLES:
+            row['updated_at'] = _now()
+        self.rows.append(row)
+        for column, index in self._indexes.items():
+            index.setdefault(_text(row.get(column)), []).append(row)
+        return row
+
+    def update(self, row, values):
+        row.update(values)
+        if self.name in TOUCHED_TABLES:
+            row['updated_at'] = _now()
+
+    def changed(self):
+        self._indexes.clear()
+
+
+class StandIn(httpx.BaseTransport):
+    """
+    httpx transport answering PostgREST, Storage and Auth requests from memory.
+
+    `latency` seconds (plus up to `jitter` of it, at random) are added to every request to model the network.
+    `busy` accumulates the stand-in's own processing time, so reports can separate it from the app's.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, max_rows=MAX_ROWS, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.max_rows = max_rows
+        self.tables = {}
+        self.objects = {}   # (bucket, path) -> bytes, or a zero-argument callable producing them
+        self.users = {}     # email -> user dict (with 'password')
+        self.rpcs = {'unlock_all_profiles': self._unlock_all_profiles}
+        self.requests = 0
+        self.busy = 0.0
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+
+    # --- Loading data ---
+
+    def load(self, table, rows):
+        self.tables[table] = Table(table, rows)
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = Table(name)
+        return self.tables[name]
+
+    def add_user(self, user_id, email, password, confirmed=True):
+        self.users[email] = {
+            "id": user_id, "email": email, "password": password, "aud": "authenticated", "role": "authenticated",
+            "app_metadata": {"provider": "email"}, "user_metadata": {}, "created_at": _now(),
+            "email_confirmed_at": _now() if confirmed else None,
+        }
+
+    # --- Transport ---
+
+    def handle_request(self, request):
+        if self.latency:
+            time.sleep(self.latency + self._random.uniform(0, self.latency * self.jitter))
+        request.read()
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                return self._route(request)
+            finally:
+                self.requests += 1
+                self.busy += time.perf_counter() - started
+
+    def _route(self, request):
+        url = urlsplit(str(request.url))
+        segments = [unquote(s) for s in url.path.split('/') if s]
+        params = parse_qsl(url.query, keep_blank_values=True)
+        if segments[:3] == ['rest', 'v1', 'rpc']:
+            return self._rpc(segments[3], request)
+        if segments[:2] == ['rest', 'v1']:
+            return self._rest(request, segments[2], params)
+        if segments[:3] == ['storage', 'v1', 'object']:
+            return self._storage(request, segments[3:], params)
+        if segments[:2] == ['auth', 'v1']:
+            return self._auth(request, segments[2:], dict(params))
+        return _json(404, {"message": f"No stand-in for {url.path}"})
+
+    # --- PostgREST ---
+
+    def _rest(self, request, name, params):
+        table = self.table(name)
+        query = Query(params)
+        prefer = request.headers.get('prefer', '')
+        single = 'vnd.pgrst.object' in request.headers.get('accept', '')
+        method = request.method
+
+        if method in ('GET', 'HEAD'):
+            rows = table.select(query)
+            if method == 'GET':
+                rows = query.sort(rows)
+            total = len(rows)
+            limit = query.limit if query.limit is not None else self.max_rows
+            page = rows[query.offset:query.offset + min(limit, self.max_rows)]
+            headers = {}
+            if 'count=exact' in prefer:
+                end = query.offset + len(page) - 1
+                headers['content-range'] = f"{query.offset}-{end}/{total}" if page else f"*/{total}"
+            if method == 'HEAD':
+                return httpx.Response(200, headers=headers)
+            return self._result([query.project(r) for r in page], single, headers)
+
+        body = json.loads(request.content or b'null')
+        if method == 'POST':
+            items = body if isinstance(body, list) else [body]
+            upsert = 'resolution=merge-duplicates' in prefer
+            written = []
+            for item in items:
+                existing = None
+                if upsert:
+                    key = {c: _text(item.get(c)) for c in query.on_conflict}
+                    first = query.on_conflict[0]
+                    same = table._index(first).get(key[first], [])
+                    existing = next((r for r in same if all(_text(r.get(c)) == v for c, v in key.items())), None)
+                if existing is not None:
+                    table.update(existing, item)
+                    table.changed()
+                    written.append(existing)
+                else:
+                    written.append(table.insert(dict(item)))
+            return self._result([query.project(r) for r in written], single)
+        if method == 'PATCH':
+            rows = table.select(query)
+            for row in rows:
+                table.update(row, body)
+            table.changed()
+            return self._result([query.project(r) for r in rows], single)
+        if method == 'DELETE':
+            rows = table.select(query)
+            removed = {id(r) for r in rows}
+            table.rows = [r for r in table.rows if id(r) not in removed]
+            table.changed()
+            return self._result([query.project(r) for r in rows], single)
+        return _pgrst_error(405, "PGRST000", f"{method} is not supported")
+
+    def _result(self, rows, single, headers=None):
+        if single:
+            if len(rows) != 1:
+                return _pgrst_error(406, "PGRST116", f"JSON object requested, multiple (or no) rows returned ({len(rows)})")
+            return _json(200, rows[0], headers)
+        return _json(200, rows, headers)
+
+    def _rpc(self, name, request):
+        if name not in self.rpcs:
+            return _pgrst_error(404, "PGRST202", f"Could not find the function public.{name}")
+        return _json(200, self.rpcs[name](json.loads(request.content or b'{}')))
+
+    def _unlock_all_profiles(self, params):
+        table = self.table('profiles')
+        for row in table.rows:
+            if row.get('account_type') != 'admin':
+                table.update(row, {'is_locked': False})
+        table.changed()
+        return None
+
+    # --- Storage ---
+
+    def _object(self, bucket, path):
+        data = self.objects.get((bucket, path))
+        if callable(data):
+            data = self.objects[(bucket, path)] = data()
+        return data
+
+    def _storage(self, request, segments, params):
+        method = request.method
+        head = segments[0] if segments else ''
+
+        if method == 'POST' and head == 'list':
+            return self._list(segments[1], json.loads(request.content or b'{}'))
+        if method == 'POST' and head == 'move':
+            body = json.loads(request.content)
+            source, dest = (body['bucketId'], body['sourceKey']), (body['bucketId'], body['destinationKey'])
+            if self._object(*source) is None:
+                return _storage_error(404, "not_found", "Object not found")
+            if dest in self.objects:
+                return _storage_error(400, "Duplicate", "The resource already exists")
+            self.objects[dest] = self.objects.pop(source)
+            return _json(200, {"message": "Successfully moved"})
+        if method == 'POST' and segments[:2] == ['upload', 'sign']:
+            bucket, path = segments[2], '/'.join(segments[3:])
+            return _json(200, {"url": f"/object/upload/sign/{bucket}/{path}?token={uuid.uuid4().hex}"})
+        if method == 'PUT' and segments[:2] == ['upload', 'sign']:
+            self.objects[(segments[2], '/'.join(segments[3:]))] = self._file_content(request)
+            return _json(200, {"Key": f"{segments[2]}/{'/'.join(segments[3:])}"})
+        if method == 'GET' and head == 'info':
+            data = self._object(segments[1], '/'.join(segments[2:]))
+            if data is None:
+                return _storage_error(404, "not_found", "Object not found")
+            return _json(200, {"name": '/'.join(segments[2:]), "size": len(data), "content_type": "application/octet-stream"})
+        if method == 'DELETE' and len(segments) == 1:
+            removed = []
+            for path in json.loads(request.content).get('prefixes', []):
+                if self.objects.pop((head, path), None) is not None:
+                    removed.append({"name": path, "bucket_id": head})
+            return _json(200, removed)
+
+        if head in ('public', 'authenticated'):
+            segments = segments[1:]
+        bucket, path = segments[0], '/'.join(segments[1:])
+        if method == 'GET':
+            data = self._object(bucket, path)
+            if data is None:
+                return _storage_error(404, "not_found", "Object not found")
+            return httpx.Response(200, content=data, headers={'content-type': 'application/octet-stream'})
+        if method in ('POST', 'PUT'):
+            upsert = request.headers.get('x-upsert', 'false') == 'true' or method == 'PUT'
+            if (bucket, path) in self.objects and not upsert:
+                return _storage_error(400, "Duplicate", "The resource already exists")
+            self.objects[(bucket, path)] = self._file_content(request)
+            return _json(200, {"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())})
+        return _storage_error(405, "invalid_method", f"{method} is not supported")
+
+    def _file_content(self, request):
+        content_type = request.headers.get('content-type', '')
+        if not content_type.startswith('multipart/form-data'):
+            return request.content
+        boundary = content_type.split('boundary=')[1].encode()
+        for part in request.content.split(b'--' + boundary):
+            head, _, body = part.partition(b'\r\n\r\n')
+            if b'name="file"' in head:
+                return body[:-2] if body.endswith(b'\r\n') else body
+        return b''
+
+    def _list(self, bucket, options):
+        prefix = options.get('prefix', '').strip('/')
+        start = f"{prefix}/" if prefix else ''
+        entries = {}
+        for (b, path), data in self.objects.items():
+            if b != bucket or not path.startswith(start):
+                continue
+            name, _, rest = path[len(start):].partition('/')
+            if rest:
+                entries.setdefault(name, {"name": name, "id": None, "metadata": None})
+            else:
+                size = len(data) if isinstance(data, bytes) else 0
+                entries[name] = {"name": name, "id": str(uuid.uuid5(uuid.NAMESPACE_URL, path)),
+                                 "created_at": _now(), "updated_at": _now(),
+                                 "metadata": {"size": size, "mimetype": "application/octet-stream"}}
+        listed = sorted(entries.values(), key=lambda e: e['name'])
+        offset, limit = options.get('offset', 0), options.get('limit', 100)
+        return _json(200, listed[offset:offset + limit])
+
+    # --- Auth ---
+
+    def _public_user(self, user):
+        return {k: v for k, v in user.items() if k != 'password'}
+
+    def _auth(self, request, segments, params):
+        method = request.method
+        endpoint = '/'.join(segments)
+        body = json.loads(request.content or b'{}') if request.content else {}
+
+        if endpoint == 'health':
+            return _json(200, {"name": "GoTrue", "description": "stand-in"})
+        if endpoint == 'token' and params.get('grant_type') == 'password':
+            user = self.users.get(body.get('email'))
+            if not user or user['password'] != body.get('password'):
+                return _json(400, {"code": 400, "error_code": "invalid_credentials", "msg": "Invalid login credentials"})
+            return _json(200, {"access_token": uuid.uuid4().hex, "refresh_token": uuid.uuid4().hex, "expires_in": 3600,
+                               "expires_at": int(time.time()) + 3600, "token_type": "bearer", "user": self._public_user(user)})
+        if endpoint == 'signup':
+            if body.get('email') in self.users:
+                return _json(422, {"code": 422, "error_code": "user_already_exists", "msg": "User already registered"})
+            self.add_user(str(uuid.uuid4()), body['email'], body.get('password'), confirmed=False)
+            return _json(200, self._public_user(self.users[body['email']]))
+        if segments[:2] == ['admin', 'users'] and method == 'DELETE':
+            for email, user in list(self.users.items()):
+                if user['id'] == segments[2]:
+                    del self.users[email]
+            return _json(200, {})
+        if endpoint in ('logout', 'recover'):
+            return httpx.Response(204)
+        return _json(404, {"code": 404, "error_code": "not_found", "msg": f"No stand-in for /auth/v1/{endpoint}"})
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils import storage_filename
+from profile_replica import SEARCH_COLUMNS
+
+# Columns needed to delete a student and report on it
+DELETE_COLUMNS = "id, first_name, last_name, student_id, account_type, picture_url, signature_url"
+
+# Filters accepted for a filter-based delete (form field -> profiles column)
+DELETE_FILTERS = {
+    'filter_program': 'program',
+    'filter_year_level': 'year_level',
+    'filter_section': 'section',
+    'filter_major': 'major',
+    'filter_graduating_year': 'graduating_year',
+}
+
+# ids per in_() filter / remove() call, to keep URLs and request bodies small
+CHUNK_SIZE = 100
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def find_delete_targets(client, student_ids=None, filters=None, verified=None, search=None):
+    """
+    Profiles to delete, either the given ids or every profile matching `filters` (column -> value).
+    `verified` narrows a filter-based delete to verified (True) or unverified (False) accounts, and `search`
+    to names, student IDs and emails containing it, as the student list's search box does.
+    Admin accounts are never returned. At most Config.BULK_DELETE_MAX + 1 rows are fetched, so callers can detect overflow.
+    """
+    limit = Config.BULK_DELETE_MAX + 1
+    if student_ids:
+        profiles = []
+        for chunk in _chunks(student_ids):
+            res = client.table("profiles").select(DELETE_COLUMNS).in_("id", chunk).neq("account_type", "admin").execute()
+            profiles.extend(res.data or [])
+        return profiles[:limit]
+
+    query = client.table("profiles").select(DELETE_COLUMNS).neq("account_type", "admin")
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    if verified is not None:
+        query = query.eq("email_verified", verified)
+    if search:
+        query = query.or_(",".join(f"{column}.ilike.%{search}%" for column in SEARCH_COLUMNS))
+    return query.limit(limit).execute().data or []
+
+
+def delete_students(client, auth_client, profiles):
+    """
+    Deletes profiles, their storage objects and their auth users.
+
+    - Profiles go first, with one in_() delete per chunk, so no remaining row points at a removed file.
+    - Storage objects are removed with one remove() per bucket per chunk. A failed chunk is only a warning,
+      because the storage GC collects whatever is left behind.
+    - Auth users are deleted on a pool of Config.BULK_DELETE_AUTH_WORKERS threads.
+
+    Returns {'deleted': [ids], 'failed': {id: reason}, 'warnings': {id: reason}, 'files_removed': n}.
+    """
+    by_id = {p['id']: p for p in profiles}
+    result = {'deleted': [], 'failed': {}, 'warnings': {}, 'files_removed': 0}
+
+    # 1. Profiles
+    for chunk in _chunks(list(by_id)):
+        try:
+            res = client.table("profiles").delete().in_("id", chunk).execute()
+            deleted = set(row['id'] for row in (res.data or []))
+        except Exception as e:
+            print(f"Error deleting {len(chunk)} profiles: {e}")
+            deleted = set()
+            for student_id in chunk:
+                result['failed'][student_id] = f"profile not deleted: {e}"
+            continue
+        for student_id in chunk:
+            if student_id in deleted:
+                result['deleted'].append(student_id)
+            else:
+                result['failed'][student_id] = "profile not deleted"
+
+    # 2. Storage objects of the deleted profiles
+    for bucket, column in (("pictures", "picture_url"), ("signatures", "signature_url")):
+        owners = {}
+        for student_id in result['deleted']:
+            name = storage_filename(by_id[student_id].get(column))
+            if name:
+                owners[name] = student_id
+        for chunk in _chunks(list(owners)):
+            try:
+                client.storage.from_(bucket).remove(chunk)
+                result['files_removed'] += len(chunk)
+            except Exception as e:
+                print(f"Warning: failed to remove {len(chunk)} files from {bucket}: {e}")
+                for name in chunk:
+                    result['warnings'][owners[name]] = f"{bucket} file not removed"
+
+    # 3. Auth users
+    def _delete_auth(student_id):
+        try:
+            auth_client.auth.admin.delete_user(student_id)
+            return student_id, None
+        except Exception as e:
+            return student_id, str(e)
+
+    with ThreadPoolExecutor(max_workers=Config.BULK_DELETE_AUTH_WORKERS) as executor:
+        for student_id, error in executor.map(_delete_auth, result['deleted']):
+            if error:
+                print(f"CRITICAL ERROR: Profile {student_id} deleted, but failed to delete auth user: {error}")
+                result['failed'][student_id] = f"auth user not deleted: {error}"
+
+    return result
@@ -0,0 +1,167 @@
+"""
+Call-budget check for CI.
+
+Requests every page that declares a perf.call_budget, signed in as the role the page needs, and fails (exit code 1)
+when a page makes more Supabase calls than its budget, sends the same read twice, or queries once per row (N+1).
+In CI, run it against the in-memory Supabase stand-in (bench/standin.py) and the bench's synthetic accounts,
+which needs no project, credentials or network:
+
+    python call_budgets.py --standin
+
+Or against a staging Supabase project with real accounts (their student IDs):
+
+    python call_budgets.py --admin A-0001 --president 2021-0002 --student 2021-0003
+    python call_budgets.py ... --path "/admin/print_preview?program=BSIT&year_level=1st Year&section=A&semester=1st"
+
+The accounts can also come from CALL_BUDGET_ADMIN, CALL_BUDGET_PRESIDENT and CALL_BUDGET_STUDENT.
+"""
+import os
+import sys
+import argparse
+from flask import g
+
+# Blueprint of a page -> the account that can open it
+ROLES = {'admin': 'admin', 'president': 'president'}
+
+# Host the stand-in answers for; the keys only need to look valid
+STANDIN_URL = "https://bench.supabase.co"
+
+
+def use_standin(students):
+    """
+    Points the app at a stand-in loaded with `students` synthetic students, and returns the paths of the pages
+    that need query parameters, filled in from that data. Must run before config is imported.
+    """
+    os.environ["SUPABASE_URL"] = STANDIN_URL
+    os.environ["SUPABASE_KEY"] = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.standin"
+    os.environ["SUPABASE_SERVICE_KEY"] = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.standin"
+    os.environ.setdefault("FLASK_SECRET_KEY", "standin")
+    # Every page is requested once, so each one is measured on its own queries, not on another page's cache
+    os.environ["PAGE_CACHE"] = "false"
+    os.environ["PROFILE_REPLICA"] = "false"
+
+    from urllib.parse import urlencode
+    from bench import dataset
+    from bench.standin import StandIn
+    import supabase_clients
+    standin = StandIn()
+    supabase_clients.http_client = supabase_clients.build_http_client(standin)
+    dataset.load(standin, students, STANDIN_URL)
+    accounts = {'admin': dataset.ADMIN_ID, 'president': dataset.PRESIDENT_ID, 'student': dataset.STUDENT_ID}
+    return accounts, [f"/admin/print_preview?{urlencode(dataset.PRESIDENT_CLASS)}"]
+
+
+def session_for(client, student_id):
+    """
+    The session login() would create for this account.
+    """
+    profile = client.table("profiles").select("*").eq("student_id", student_id).single().execute().data
+    return {
+        'user_id': profile['id'],
+        'email': profile.get('email'),
+        'student_id': student_id,
+        'full_name': f"{profile.get('first_name', '')} {profile.get('last_name', '')}".strip(),
+        'account_type': profile.get('account_type'),
+        'program': profile.get('program'),
+        'year_level': profile.get('year_level'),
+        'section': profile.get('section'),
+        'major': profile.get('major'),
+    }
+
+
+def budgeted_pages(app):
+    """
+    (endpoint, path, budget) for every GET page without URL parameters that declares a call budget,
+    and the endpoints of GET pages that do not declare one.
+    """
+    pages, unbudgeted = [], []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.arguments or rule.endpoint == 'static':
+            continue
+        budget = getattr(app.view_functions[rule.endpoint], 'call_budget', None)
+        if budget is None:
+            unbudgeted.append(rule.endpoint)
+        elif rule.endpoint not in [p[0] for p in pages]:
+            pages.append((rule.endpoint, rule.rule, budget))
+    return pages, sorted(set(unbudgeted))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when a page exceeds its Supabase call budget or repeats queries.")
+    parser.add_argument('--admin', default=os.getenv("CALL_BUDGET_ADMIN"), help="student ID of an admin account")
+    parser.add_argument('--president', default=os.getenv("CALL_BUDGET_PRESIDENT"), help="student ID of a president account")
+    parser.add_argument('--student', default=os.getenv("CALL_BUDGET_STUDENT"), help="student ID of a student account")
+    parser.add_argument('--path', action='append', default=[], help="also check this URL (e.g. a page that needs query parameters)")
+    parser.add_argument('--standin', action='store_true', help="use the in-memory Supabase stand-in and its synthetic accounts")
+    parser.add_argument('--students', type=int, default=2000, help="synthetic students loaded with --standin")
+    args = parser.parse_args()
+
+    accounts = {'admin': args.admin, 'president': args.president, 'student': args.student}
+    if args.standin:
+        accounts, paths = use_standin(args.students)
+        args.path = paths + args.path
+
+    from config import Config
+    Config.PERF_TRACING = True
+    Config.PERF_STRICT_BUDGETS = False  # collect every problem instead of failing on the first
+    from main import app
+    from extensions import supabase_admin
+    from perf import check_calls, request_budget
+
+    sessions = {role: session_for(supabase_admin, sid) for role, sid in accounts.items() if sid}
+    for role, sess in sessions.items():
+        if role != 'student' and sess['account_type'] != role:
+            parser.error(f"--{role} {accounts[role]} is a {sess['account_type']} account")
+
+    # Registered after perf's hook, so it runs first and still sees the request's calls
+    seen = {}
+
+    @app.after_request
+    def capture(response):
+        if 'perf_calls' in g:
+            seen['calls'] = list(g.perf_calls)
+            seen['budget'] = request_budget()
+        return response
+
+    pages, unbudgeted = budgeted_pages(app)
+    checks = [(endpoint, path) for endpoint, path, _ in pages] + [(None, path) for path in args.path]
+
+    failed = 0
+    for endpoint, path in checks:
+        explicit = endpoint is None
+        if explicit:
+            endpoint = app.url_map.bind('localhost').match(path.split('?')[0])[0]
+        role = ROLES.get(endpoint.split('.')[0], 'student')
+        if role not in sessions:
+            print(f"SKIP {path} (no {role} account given)")
+            continue
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess.update(sessions[role])
+        seen.clear()
+        response = client.get(path)
+        if not explicit and 300 <= response.status_code < 400:
+            # Accounts are checked above, so this page needs query parameters; check it with --path
+            print(f"SKIP {path} (redirects without query parameters; pass it with --path)")
+            continue
+        calls = seen.get('calls', [])
+        backend = [c for c in calls if c[0] in ('table', 'rpc', 'storage', 'auth')]
+        problems = check_calls(calls, seen.get('budget'))
+        if response.status_code >= 300:
+            # A redirect (usually to login) or an error means the page itself was never measured
+            problems.append(("not_measured", f"responded {response.status_code}"))
+        status = "FAIL" if problems else "ok  "
+        budget = seen.get('budget')
+        print(f"{status} {path} [{response.status_code}] {len(backend)} calls" + (f" (budget {budget})" if budget is not None else ""))
+        for _, detail in problems:
+            print(f"       {detail}")
+        failed += bool(problems)
+
+    if unbudgeted:
+        print(f"No call budget declared: {', '.join(unbudgeted)}")
+    print(f"{failed} page(s) failed" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
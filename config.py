@@ -17,9 +17,116 @@ class Config:
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
     
+    # Supabase HTTP: one pooled keep-alive client for every Supabase call, with explicit timeouts (seconds)
+    # and jittered retries for idempotent reads that time out or hit a 502/503/504
+    SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
+    SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 20))
+    SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", 10))
+    SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", 30))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", 5))
+    SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", 15))
+    SUPABASE_READ_RETRIES = int(os.getenv("SUPABASE_READ_RETRIES", 2))
+    SUPABASE_RETRY_BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", 0.2))
+    # Identical PostgREST reads in flight at the same time (same URL and headers) share one upstream call
+    SUPABASE_COALESCE_READS = os.getenv("SUPABASE_COALESCE_READS", "true").lower() == "true"
+    # Build the clients and open a connection in a background thread when the app starts (off by default:
+    # on Vercel the instance is frozen after each response, so a cron hitting /_warmup is used instead)
+    WARM_UP_ON_START = os.getenv("WARM_UP_ON_START", "false").lower() == "true"
+    # Cold start budget for `python import_budget.py`: importing main (Flask included) plus the first /_health request
+    IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", 150))
+
+    # Request tracing: Server-Timing headers, a JSON log line for requests slower than PERF_SLOW_REQUEST_MS,
+    # and the last PERF_SAMPLES timings per route and per backend call for /admin/_perf
+    PERF_TRACING = os.getenv("PERF_TRACING", "true").lower() == "true"
+    PERF_SLOW_REQUEST_MS = int(os.getenv("PERF_SLOW_REQUEST_MS", 1000))
+    PERF_SAMPLES = int(os.getenv("PERF_SAMPLES", 500))
+    # Call budgets (perf.call_budget) and repeated/N+1 query detection: always logged, and with
+    # PERF_STRICT_BUDGETS (development/CI) a violating request fails. N+1 = the same query shape this many times
+    PERF_STRICT_BUDGETS = os.getenv("PERF_STRICT_BUDGETS", "false").lower() == "true"
+    PERF_N_PLUS_ONE = int(os.getenv("PERF_N_PLUS_ONE", 3))
+
     # File size
     MAX_FILE_SIZE = 5 * 1024 * 1024 # 5 MB
 
+    # Upload intake: whole-request cap (two images plus form fields), cap per non-file field,
+    # and the size above which an uploaded file is spooled to a temp file instead of RAM
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 2 * MAX_FILE_SIZE + 1024 * 1024))
+    MAX_FORM_MEMORY_SIZE = int(os.getenv("MAX_FORM_MEMORY_SIZE", 100 * 1024))
+    UPLOAD_SPOOL_THRESHOLD = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", 512 * 1024))
+
+    # Concurrent fan-out of independent queries within a request (shared by all requests)
+    FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", 8))
+
+    # Stale-while-revalidate cache (page_cache.py) for the student list, archive list, activity logs and print settings:
+    # results are reused as-is for PAGE_CACHE_FRESH seconds, then served (marked stale) while they refresh
+    # for up to PAGE_CACHE_STALE seconds; at most PAGE_CACHE_MAX_ENTRIES results per process. Writes only drop
+    # results in the process that made them, so it is off by default where several processes serve the app
+    # (Vercel instances; gunicorn.conf.py turns it off for more than one worker)
+    PAGE_CACHE = os.getenv("PAGE_CACHE", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+    PAGE_CACHE_FRESH = float(os.getenv("PAGE_CACHE_FRESH", 5))
+    PAGE_CACHE_STALE = float(os.getenv("PAGE_CACHE_STALE", 120))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", 256))
+
+    # Local profile replica (profile_replica.py) for the student list, printing, print preview and president roster:
+    # off by default. Polls Supabase every PROFILE_REPLICA_POLL seconds (re-reading PROFILE_REPLICA_OVERLAP seconds
+    # of changes), checks for deleted rows every PROFILE_REPLICA_RECONCILE seconds, and pages read from Supabase
+    # while the last sync started more than PROFILE_REPLICA_MAX_LAG seconds ago
+    PROFILE_REPLICA = os.getenv("PROFILE_REPLICA", "false").lower() == "true"
+    PROFILE_REPLICA_POLL = float(os.getenv("PROFILE_REPLICA_POLL", 2))
+    PROFILE_REPLICA_OVERLAP = float(os.getenv("PROFILE_REPLICA_OVERLAP", 5))
+    PROFILE_REPLICA_RECONCILE = float(os.getenv("PROFILE_REPLICA_RECONCILE", 300))
+    PROFILE_REPLICA_MAX_LAG = float(os.getenv("PROFILE_REPLICA_MAX_LAG", 10))
+
+    # Bulk review: max students per request and grid page size
+    BULK_REVIEW_MAX = int(os.getenv("BULK_REVIEW_MAX", 200))
+    BULK_REVIEW_PAGE_SIZE = int(os.getenv("BULK_REVIEW_PAGE_SIZE", 40))
+
+    # Bulk delete: max students per request and parallel auth-user deletions
+    BULK_DELETE_MAX = int(os.getenv("BULK_DELETE_MAX", 500))
+    BULK_DELETE_AUTH_WORKERS = int(os.getenv("BULK_DELETE_AUTH_WORKERS", 4))
+
+    # Direct uploads: browsers upload images straight to storage through signed URLs and the server validates
+    # them in the background. A job still validating after UPLOAD_VALIDATION_TIMEOUT seconds is finished inline.
+    DIRECT_UPLOADS = os.getenv("DIRECT_UPLOADS", "true").lower() == "true"
+    UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", 2))
+    UPLOAD_VALIDATION_TIMEOUT = int(os.getenv("UPLOAD_VALIDATION_TIMEOUT", 60))
+
+    # Review queue: students served (and image-prefetched) ahead of the current one
+    REVIEW_QUEUE_PREFETCH = int(os.getenv("REVIEW_QUEUE_PREFETCH", 5))
+
+    # Cache lifetime (seconds) for uploaded images; keys are versioned by content hash, so this can be long
+    IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", 31536000))
+
+    # Storage GC: objects younger than this are never collected (their profile row may not be saved yet)
+    STORAGE_GC_MIN_AGE_HOURS = int(os.getenv("STORAGE_GC_MIN_AGE_HOURS", 24))
+    # Comma-separated "<bucket>/<path>" objects no table references but the app still serves (the status email logo)
+    STORAGE_GC_KEEP = [path.strip() for path in os.getenv("STORAGE_GC_KEEP", "pictures/lspu.png").split(",") if path.strip()]
+
+    # Archiving: parallel image downloads/compressions/uploads, retries on storage errors,
+    # and the seconds a semester archive may run inside one web request (the CLI has no limit)
+    ARCHIVE_CONCURRENCY = int(os.getenv("ARCHIVE_CONCURRENCY", 4))
+    ARCHIVE_RETRIES = int(os.getenv("ARCHIVE_RETRIES", 3))
+    ARCHIVE_RETRY_DELAY = float(os.getenv("ARCHIVE_RETRY_DELAY", 0.5))
+    ARCHIVE_TIME_BUDGET = int(os.getenv("ARCHIVE_TIME_BUDGET", 45))
+
+    # Image backfill (flask admin backfill-images): parallel downloads/uploads; compression uses the image workers
+    BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", 8))
+
+    # Image worker: processes for CPU-bound Pillow work (0 runs it inline on the calling thread, the default on
+    # Vercel), tasks that may wait for a free process, seconds a caller waits for room in that queue, seconds
+    # one task may take, and tasks per process before it is replaced
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 0 if os.getenv("VERCEL") else min(4, os.cpu_count() or 1)))
+    IMAGE_QUEUE_SIZE = int(os.getenv("IMAGE_QUEUE_SIZE", 16))
+    IMAGE_QUEUE_WAIT = float(os.getenv("IMAGE_QUEUE_WAIT", 5))
+    IMAGE_TASK_TIMEOUT = float(os.getenv("IMAGE_TASK_TIMEOUT", 30))
+    IMAGE_WORKER_MAX_TASKS = int(os.getenv("IMAGE_WORKER_MAX_TASKS", 500))
+
+    # Archived pictures: byte budget per image (0 turns target-size compression off), the lowest quality
+    # tried to meet it, and the shortest longest-side (px) the picture may be scaled down to after that
+    ARCHIVE_IMAGE_TARGET_KB = int(os.getenv("ARCHIVE_IMAGE_TARGET_KB", 150))
+    ARCHIVE_IMAGE_MIN_QUALITY = int(os.getenv("ARCHIVE_IMAGE_MIN_QUALITY", 40))
+    ARCHIVE_IMAGE_MIN_SIDE = int(os.getenv("ARCHIVE_IMAGE_MIN_SIDE", 600))
+
     if not SUPABASE_URL or not SUPABASE_KEY or not SUPABASE_SERVICE_KEY:
         raise ValueError("Error: Supabase environment variables must be set.")
     # Other configurations can be added here
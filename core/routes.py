@@ -1,9 +1,12 @@
 import os
-import io
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from extensions import supabase, supabase_admin  # Added supabase_admin
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from extensions import supabase, supabase_admin, user_client  # Added supabase_admin
 from config import Config
-from utils import login_required, check_transparency
+from utils import login_required, check_transparency, content_hash, versioned_filename, upload_options, remove_superseded, discard_uploads
+from upload_intake import upload_size, read_head, rewound, upload_body
+from perf import call_budget, extra_calls
+from page_cache import invalidate
+from direct_upload import sign_upload, upload_owner_id, get_job, queue_attach, job_status, open_jobs, mark_reported, JOB_VALIDATING
 
 core_bp = Blueprint('core', __name__, template_folder='../templates')
 
@@ -30,6 +33,7 @@ def terms():
 
 @core_bp.route('/profile')
 @login_required
+@call_budget(1)
 def profile():
     user_id = session.get('user_id')
     try:
@@ -43,7 +47,15 @@ def profile():
             session.clear() 
             return redirect(url_for('auth.login'))
 
-        return render_template('client/profile.html', profile=profile_data)
+        # Upload jobs only exist after this session submitted direct uploads, so usually this page is one query
+        upload_jobs = []
+        if session.get('upload_jobs_open'):
+            extra_calls(2, "open_jobs and mark_reported")
+            upload_jobs = open_jobs(supabase_admin, user_id)
+            mark_reported(supabase_admin, upload_jobs)
+            if not any(job['status'] == JOB_VALIDATING for job in upload_jobs):
+                session.pop('upload_jobs_open', None)
+        return render_template('client/profile.html', profile=profile_data, upload_jobs=upload_jobs)
         
     except Exception as e:
         flash(f"Error fetching profile: {str(e)}", "error")
@@ -80,13 +92,13 @@ def change_password():
             return redirect(url_for('auth.login'))
 
         # Verify current password by signing in
-        supabase.auth.sign_in_with_password({
+        user_client().auth.sign_in_with_password({
             "email": user_email,
             "password": current_password
         })
 
         # Update password
-        supabase.auth.update_user({"password": new_password})
+        user_client().auth.update_user({"password": new_password})
         
         flash("Password updated successfully.", "success")
     
@@ -157,54 +169,96 @@ def update_profile():
         picture_file = request.files.get('picture')
         signature_file = request.files.get('signature')
         
-        # Get student ID for filename
-        profile_res = supabase.table("profiles").select("student_id").eq("id", user_id).single().execute()
+        # Get student ID for filename and the hashes of the files already stored
+        profile_res = supabase.table("profiles").select("student_id, picture_url, signature_url, picture_hash, signature_hash").eq("id", user_id).single().execute()
         student_id_num = profile_res.data.get('student_id')
+        unchanged = []
+        uploaded = []
+
+        # Images already uploaded straight to storage; they are validated and attached in the background
+        direct_jobs = []
+        for kind in ('picture', 'signature'):
+            job_id = request.form.get(f'{kind}_upload')
+            if job_id:
+                job = get_job(supabase_admin, job_id, user_id, kind)
+                if not job or job['status'] != 'signed':
+                    flash(f"The uploaded {kind} could not be found. Please upload it again.", "error")
+                    return redirect(url_for('core.profile'))
+                direct_jobs.append(job)
 
         if picture_file and picture_file.filename:
-            picture_bytes = picture_file.read()
-            if len(picture_bytes) > Config.MAX_FILE_SIZE:
+            if upload_size(picture_file) > Config.MAX_FILE_SIZE:
                  flash("Picture is too large (max 5MB).", "error")
                  return redirect(url_for('core.profile'))
             
-            file_ext = os.path.splitext(picture_file.filename)[1]
-            file_name = f"{student_id_num}_picture{file_ext}"
-            
-            supabase.storage.from_("pictures").upload(
-                file_name, picture_bytes, {"content-type": picture_file.mimetype, "upsert": "true"}
-            )
-            update_data["picture_url"] = supabase.storage.from_("pictures").get_public_url(file_name)
-            update_data["picture_status"] = "pending" 
-            update_data["picture_disapproval_reason"] = None 
+            picture_hash = content_hash(picture_file.stream)
+            if picture_hash == profile_res.data.get('picture_hash'):
+                # Same photo re-submitted: keep the stored file and its review status
+                unchanged.append("Picture")
+            else:
+                file_ext = os.path.splitext(picture_file.filename)[1]
+                file_name = versioned_filename(student_id_num, "picture", picture_hash, file_ext)
+
+                supabase.storage.from_("pictures").upload(file_name, upload_body(picture_file), upload_options(picture_file.mimetype))
+                uploaded.append(("pictures", file_name))
+                update_data["picture_url"] = supabase.storage.from_("pictures").get_public_url(file_name)
+                update_data["picture_hash"] = picture_hash
+                update_data["picture_status"] = "pending" 
+                update_data["picture_disapproval_reason"] = None 
 
         if signature_file and signature_file.filename:
-            signature_bytes = signature_file.read()
-            if len(signature_bytes) > Config.MAX_FILE_SIZE:
+            if upload_size(signature_file) > Config.MAX_FILE_SIZE:
+                 discard_uploads(supabase, uploaded)
                  flash("Signature is too large (max 5MB).", "error")
                  return redirect(url_for('core.profile'))
             
-            if not signature_bytes.startswith(b'\x89PNG\r\n\x1a\n'):
+            if not read_head(signature_file, 8).startswith(b'\x89PNG\r\n\x1a\n'):
+                 discard_uploads(supabase, uploaded)
                  flash("Signature must be a PNG file.", "error")
                  return redirect(url_for('core.profile'))
 
-            signature_stream = io.BytesIO(signature_bytes)
-            if not check_transparency(signature_stream):
-                 flash("Signature must have a transparent background.", "error")
-                 return redirect(url_for('core.profile'))
-
-            file_ext = os.path.splitext(signature_file.filename)[1]
-            file_name = f"{student_id_num}_signature{file_ext}"
-            
-            supabase.storage.from_("signatures").upload(
-                file_name, signature_bytes, {"content-type": signature_file.mimetype, "upsert": "true"}
-            )
-            update_data["signature_url"] = supabase.storage.from_("signatures").get_public_url(file_name)
-            update_data["signature_status"] = "pending" 
-            update_data["signature_disapproval_reason"] = None 
-
-        supabase.table("profiles").update(update_data).eq("id", user_id).execute()
-        
-        flash("Profile updated successfully.", "success")
+            signature_hash = content_hash(signature_file.stream)
+            if signature_hash == profile_res.data.get('signature_hash'):
+                # Identical bytes were already validated when first uploaded
+                unchanged.append("Signature")
+            else:
+                if not check_transparency(rewound(signature_file)):
+                     discard_uploads(supabase, uploaded)
+                     flash("Signature must have a transparent background.", "error")
+                     return redirect(url_for('core.profile'))
+
+                file_ext = os.path.splitext(signature_file.filename)[1]
+                file_name = versioned_filename(student_id_num, "signature", signature_hash, file_ext)
+
+                supabase.storage.from_("signatures").upload(file_name, upload_body(signature_file), upload_options(signature_file.mimetype))
+                uploaded.append(("signatures", file_name))
+                update_data["signature_url"] = supabase.storage.from_("signatures").get_public_url(file_name)
+                update_data["signature_hash"] = signature_hash
+                update_data["signature_status"] = "pending" 
+                update_data["signature_disapproval_reason"] = None 
+
+        try:
+            supabase.table("profiles").update(update_data).eq("id", user_id).execute()
+            invalidate('students')
+        except Exception:
+            discard_uploads(supabase, uploaded)
+            raise
+
+        # The profile now points at the new versions; drop the ones they replaced
+        remove_superseded(supabase, "pictures", profile_res.data.get('picture_url'), update_data.get('picture_url'))
+        remove_superseded(supabase, "signatures", profile_res.data.get('signature_url'), update_data.get('signature_url'))
+
+        for job in direct_jobs:
+            queue_attach(supabase_admin, job)
+        if direct_jobs:
+            session['upload_jobs_open'] = True
+
+        if unchanged:
+            flash(f"Profile updated successfully. {' and '.join(unchanged)} unchanged, so the current review status was kept.", "success")
+        elif direct_jobs:
+            flash(f"Profile updated successfully. Your new {' and '.join(j['kind'] for j in direct_jobs)} {'are' if len(direct_jobs) > 1 else 'is'} being checked and will appear shortly.", "success")
+        else:
+            flash("Profile updated successfully.", "success")
         return redirect(url_for('core.profile'))
 
     except Exception as e:
@@ -212,6 +266,39 @@ def update_profile():
         flash(f"Error updating profile: {err_msg}", "error")
         return redirect(url_for('core.profile'))
 
+# --- Direct Uploads: signed URLs so image bytes go straight from the browser to storage ---
+@core_bp.route('/uploads/sign', methods=['POST'])
+def sign_direct_upload():
+    """
+    Issues a signed upload URL for one image. JSON body {kind, content_type, size, target?};
+    `target` (a student's profile id) is only honoured for admins editing that student.
+    Open to signed-out visitors so the registration form can upload before the account exists.
+    """
+    if not Config.DIRECT_UPLOADS:
+        return jsonify({"success": False, "message": "Direct uploads are disabled."}), 404
+    payload = request.get_json(silent=True) or {}
+    owner_id = upload_owner_id(payload.get('target'))
+    # Images an admin uploads for a student are approved on upload, as in the admin edit form
+    review_status = 'approved' if session.get('account_type') == 'admin' and owner_id != session.get('user_id') else 'pending'
+    try:
+        signed = sign_upload(supabase_admin, owner_id, payload.get('kind'), payload.get('content_type'), payload.get('size'), review_status)
+        return jsonify({"success": True, **signed})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        print(f"Error signing upload: {e}")
+        return jsonify({"success": False, "message": "Could not prepare the upload."}), 500
+
+@core_bp.route('/uploads/<job_id>')
+def direct_upload_status(job_id):
+    job = get_job(supabase_admin, job_id, upload_owner_id(request.args.get('target')))
+    if not job:
+        return jsonify({"success": False, "message": "Upload not found."}), 404
+    status = job_status(supabase_admin, job)
+    if status != job['status']:
+        job = get_job(supabase_admin, job_id, job['owner_id']) or job
+    return jsonify({"success": True, "status": job['status'], "error": job.get('error')})
+
 # --- NEW: Delete Account Route ---
 @core_bp.route('/delete_account', methods=['POST'])
 @login_required
@@ -226,7 +313,7 @@ def delete_account():
 
     try:
         # 1. Verify Password
-        auth = supabase.auth.sign_in_with_password({
+        auth = user_client().auth.sign_in_with_password({
             "email": user_email,
             "password": password
         })
@@ -265,6 +352,7 @@ def delete_account():
 
             # 4. Delete Profile Row
             supabase.table("profiles").delete().eq("id", user_id).execute()
+            invalidate('students')
 
         # 5. Delete Auth User (Requires Admin Privilege)
         supabase_admin.auth.admin.delete_user(user_id)
@@ -0,0 +1,250 @@
+import io
+import uuid
+from flask import session
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from page_cache import invalidate
+from utils import check_transparency, content_hash, versioned_filename, upload_options, remove_superseded
+
+# kind -> (bucket, content types the browser may declare)
+UPLOAD_KINDS = {
+    'picture': ('pictures', ('image/jpeg', 'image/png', 'image/webp')),
+    'signature': ('signatures', ('image/png',)),
+}
+
+# Browsers upload into this prefix; objects only move to their versioned key after validation
+STAGING_PREFIX = "incoming"
+
+# upload_jobs.status values
+JOB_SIGNED = 'signed'
+JOB_VALIDATING = 'validating'
+JOB_ATTACHED = 'attached'
+JOB_UNCHANGED = 'unchanged'
+JOB_REJECTED = 'rejected'
+JOB_REPORTED = 'reported'
+
+_validation_executor = ThreadPoolExecutor(max_workers=Config.UPLOAD_JOB_WORKERS, thread_name_prefix="upload-validation")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def sniff_image_type(data):
+    """
+    (content_type, extension) from the file's magic bytes, or (None, None) for anything that is not JPEG, PNG or WebP.
+    The type the browser declared is never trusted.
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png', '.png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg', '.jpg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp', '.webp'
+    return None, None
+
+
+def sign_upload(client, owner_id, kind, content_type, size, review_status='pending'):
+    """
+    Issues a signed upload URL for one image and records it as an upload job.
+    `owner_id` is the profile id the image is for, or "anon:<token>" during registration.
+    Returns {'job_id', 'signed_url', 'token', 'path'}; raises ValueError for a request that could never pass validation.
+    """
+    if kind not in UPLOAD_KINDS:
+        raise ValueError("Unknown upload type.")
+    bucket, allowed_types = UPLOAD_KINDS[kind]
+    if content_type not in allowed_types:
+        raise ValueError("Signature must be a PNG file." if kind == 'signature' else "Picture must be a JPEG, PNG or WebP image.")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError("File size is required.")
+    if size <= 0 or size > Config.MAX_FILE_SIZE:
+        raise ValueError(f"File size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
+
+    job_id = str(uuid.uuid4())
+    owner_key = owner_id.replace(':', '_')
+    path = f"{STAGING_PREFIX}/{owner_key}/{kind}_{job_id}"
+    signed = client.storage.from_(bucket).create_signed_upload_url(path)
+    client.table("upload_jobs").insert({
+        "id": job_id,
+        "owner_id": owner_id,
+        "kind": kind,
+        "path": path,
+        "status": JOB_SIGNED,
+        "review_status": review_status,
+        "created_at": _now(),
+        "updated_at": _now()
+    }).execute()
+    return {"job_id": job_id, "signed_url": signed.get('signed_url') or signed.get('signedUrl'),
+            "token": signed.get('token'), "path": path}
+
+
+def upload_owner_id(target=None):
+    """
+    Owner recorded on upload jobs for the current session: the profile being edited when an admin passes `target`,
+    the signed-in user, or a per-session anonymous token during registration.
+    """
+    if session.get('user_id'):
+        if target and session.get('account_type') == 'admin':
+            return target
+        return session['user_id']
+    if 'upload_owner' not in session:
+        session['upload_owner'] = uuid.uuid4().hex
+    return f"anon:{session['upload_owner']}"
+
+
+def get_job(client, job_id, owner_id, kind=None):
+    """
+    The upload job `job_id` if it belongs to `owner_id` (and is of `kind`), else None.
+    """
+    if not job_id:
+        return None
+    try:
+        res = client.table("upload_jobs").select("*").eq("id", job_id).eq("owner_id", owner_id).execute()
+    except Exception as e:
+        print(f"Error loading upload job {job_id}: {e}")
+        return None
+    job = (res.data or [None])[0]
+    if job and kind and job.get('kind') != kind:
+        return None
+    return job
+
+
+def set_job_status(client, job_id, status, error=None):
+    client.table("upload_jobs").update({"status": status, "error": error, "updated_at": _now()}).eq("id", job_id).execute()
+
+
+def validate_staged(client, job):
+    """
+    Downloads a staged object and checks what the browser could not be trusted with: size, real type and,
+    for signatures, transparency. Returns (bytes, sha256, content_type, ext); raises ValueError when invalid.
+    The bytes move between storage and the server only, never through the browser's request.
+    """
+    bucket = UPLOAD_KINDS[job['kind']][0]
+    try:
+        data = client.storage.from_(bucket).download(job['path'])
+    except Exception:
+        raise ValueError("The uploaded file was not found. Please upload it again.")
+    if not data:
+        raise ValueError("The uploaded file is empty.")
+    if len(data) > Config.MAX_FILE_SIZE:
+        raise ValueError(f"File size must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
+
+    content_type, ext = sniff_image_type(data)
+    if job['kind'] == 'signature':
+        if content_type != 'image/png':
+            raise ValueError("Signature must be a valid PNG file.")
+        if not check_transparency(io.BytesIO(data)):
+            raise ValueError("Signature PNG must have a transparent background.")
+    elif content_type is None:
+        raise ValueError("Picture must be a JPEG, PNG or WebP image.")
+    return data, content_hash(data), content_type, ext
+
+
+def promote(client, job, student_num, data, file_hash, content_type, ext):
+    """
+    Moves a validated staged object to its versioned key and returns (file_name, public_url).
+    If the move fails (e.g. the key already exists because the same bytes were uploaded before),
+    the validated bytes are written to the key instead.
+    """
+    bucket = UPLOAD_KINDS[job['kind']][0]
+    file_name = versioned_filename(student_num, job['kind'], file_hash, ext)
+    storage = client.storage.from_(bucket)
+    try:
+        storage.move(job['path'], file_name)
+    except Exception:
+        storage.upload(file_name, data, upload_options(content_type))
+        discard_staged(client, job)
+    return file_name, storage.get_public_url(file_name)
+
+
+def discard_staged(client, job):
+    try:
+        client.storage.from_(UPLOAD_KINDS[job['kind']][0]).remove([job['path']])
+    except Exception as e:
+        print(f"Failed to remove staged upload {job['path']}: {e}")
+
+
+def attach_upload(client, job):
+    """
+    Validates a staged upload and points the owner's profile at it. Runs on the validation pool.
+    Identical bytes leave the profile (and its review status) untouched, like a re-submitted multipart upload.
+    """
+    kind = job['kind']
+    try:
+        profile = client.table("profiles").select(f"student_id, {kind}_url, {kind}_hash").eq("id", job['owner_id']).single().execute().data
+        data, file_hash, content_type, ext = validate_staged(client, job)
+        if file_hash == profile.get(f'{kind}_hash'):
+            discard_staged(client, job)
+            set_job_status(client, job['id'], JOB_UNCHANGED)
+            return JOB_UNCHANGED
+
+        file_name, public_url = promote(client, job, profile['student_id'], data, file_hash, content_type, ext)
+        client.table("profiles").update({
+            f"{kind}_url": public_url,
+            f"{kind}_hash": file_hash,
+            f"{kind}_status": job.get('review_status') or 'pending',
+            f"{kind}_disapproval_reason": None
+        }).eq("id", job['owner_id']).execute()
+        invalidate('students')
+        remove_superseded(client, UPLOAD_KINDS[kind][0], profile.get(f'{kind}_url'), public_url)
+        set_job_status(client, job['id'], JOB_ATTACHED)
+        return JOB_ATTACHED
+    except ValueError as e:
+        discard_staged(client, job)
+        set_job_status(client, job['id'], JOB_REJECTED, str(e))
+        return JOB_REJECTED
+    except Exception as e:
+        print(f"Error attaching upload {job['id']}: {e}")
+        set_job_status(client, job['id'], JOB_REJECTED, "The upload could not be processed. Please try again.")
+        return JOB_REJECTED
+
+
+def queue_attach(client, job):
+    """
+    Marks a job as validating and attaches it in the background; the request that submitted it returns immediately.
+    """
+    set_job_status(client, job['id'], JOB_VALIDATING)
+    job = dict(job, status=JOB_VALIDATING)
+    _validation_executor.submit(attach_upload, client, job)
+
+
+def job_status(client, job):
+    """
+    Current status of a job. A job stuck in 'validating' past UPLOAD_VALIDATION_TIMEOUT (e.g. the serverless
+    instance was frozen before the background thread finished) is attached inline instead.
+    """
+    if job['status'] == JOB_VALIDATING:
+        try:
+            updated = datetime.fromisoformat(job['updated_at'].replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            updated = None
+        if updated is None or datetime.now(timezone.utc) - updated > timedelta(seconds=Config.UPLOAD_VALIDATION_TIMEOUT):
+            # Claim the job by bumping updated_at, so concurrent polls do not attach it twice
+            claimed = client.table("upload_jobs").update({"updated_at": _now()}).eq("id", job['id']).eq("updated_at", job['updated_at']).execute()
+            if claimed.data:
+                return attach_upload(client, job)
+    return job['status']
+
+
+def open_jobs(client, owner_id):
+    """
+    Jobs the owner should hear about: still validating, or rejected and not yet reported.
+    """
+    try:
+        res = client.table("upload_jobs").select("id, kind, status, error, updated_at").eq("owner_id", owner_id).in_("status", [JOB_VALIDATING, JOB_REJECTED]).execute()
+        return res.data or []
+    except Exception as e:
+        print(f"Error loading upload jobs: {e}")
+        return []
+
+
+def mark_reported(client, jobs):
+    ids = [j['id'] for j in jobs if j['status'] == JOB_REJECTED]
+    if ids:
+        try:
+            client.table("upload_jobs").update({"status": JOB_REPORTED, "updated_at": _now()}).in_("id", ids).execute()
+        except Exception as e:
+            print(f"Error marking upload jobs reported: {e}")
@@ -1,5 +1,6 @@
-import os
-from supabase import create_client, Client
+import time
+import threading
+from flask import g, has_request_context
 from config import Config # <-- Import the Config class
 
 # --- THIS IS THE FIX ---
@@ -9,8 +10,62 @@ SUPABASE_KEY = Config.SUPABASE_KEY
 SUPABASE_SERVICE_KEY = Config.SUPABASE_SERVICE_KEY
 # --- END OF FIX ---
 
-# Client for general use
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+class LazyClient:
+    """
+    Stands in for a Supabase client and builds the real one on first use.
+    Importing supabase/httpx is most of a cold start, and requests such as /_health or a static page
+    never touch the database, so the clients (and supabase_clients, which imports them) load only when needed.
+    """
+
+    def __init__(self, key):
+        self._key = key
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase_clients import build_client
+                    self._client = build_client(self._key)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+# Client for general use. It never signs in (see user_client), so its requests always carry the anon key.
+supabase = LazyClient(SUPABASE_KEY)
 # Admin client for protected actions like deleting users
-supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase_admin = LazyClient(SUPABASE_SERVICE_KEY)
+
+
+def user_client():
+    """
+    A client for auth calls that act as one user (sign in, sign up, password changes).
+    Signing in switches a client's Authorization header to that user's token, so each request gets
+    its own client instead of mutating the shared one. It is cheap: connections come from the shared pool.
+    """
+    from supabase_clients import build_client
+    if not has_request_context():
+        return build_client(SUPABASE_KEY)
+    if 'supabase_user_client' not in g:
+        g.supabase_user_client = build_client(SUPABASE_KEY)
+    return g.supabase_user_client
+
 
+def warm_up():
+    """
+    Builds both shared clients and opens a pooled connection, so the next request pays neither.
+    Returns the seconds it took; a failed connection is logged, not raised (the first query will retry it).
+    """
+    started = time.perf_counter()
+    supabase.get()
+    supabase_admin.get()
+    try:
+        from supabase_clients import open_connections
+        open_connections()
+    except Exception as e:
+        print(f"Warm-up could not reach Supabase: {e}")
+    return time.perf_counter() - started
@@ -0,0 +1,41 @@
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import Config
+
+# Shared by every request, so total concurrency stays bounded however many requests run at once
+_fanout_executor = ThreadPoolExecutor(max_workers=Config.FANOUT_WORKERS, thread_name_prefix="fanout")
+_in_worker = threading.local()
+
+
+def _bind(call):
+    # Flask keeps the app/request context in context variables; running in a copy of the caller's
+    # lets workers use request, session and url_for as the view does. Unlike copy_current_request_context,
+    # nothing is pushed or popped, so the request (and its uploaded files) is not closed when a worker ends.
+    context = contextvars.copy_context()
+
+    def run():
+        _in_worker.active = True
+        try:
+            return context.run(call)
+        finally:
+            _in_worker.active = False
+    return run
+
+
+def gather(*calls):
+    """
+    Runs independent zero-argument callables (typically a query builder's `.execute`) concurrently
+    and returns their results in the same order, so a route waits for its slowest query instead of their sum.
+
+        count_res, page_res = gather(count_query.execute, page_query.execute)
+
+    Every call finishes before gather returns; if any raised, the first failure (in argument order) is re-raised.
+    Calls made from inside a gather worker run inline, so nested gathers cannot exhaust the pool and deadlock.
+    """
+    if len(calls) <= 1 or getattr(_in_worker, 'active', False):
+        return [call() for call in calls]
+
+    futures = [_fanout_executor.submit(_bind(call)) for call in calls]
+    wait(futures)
+    return [future.result() for future in futures]
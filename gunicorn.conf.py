@@ -0,0 +1,69 @@
+"""
+Gunicorn settings for self-hosting (exam weeks). Vercel does not use this file.
+
+    gunicorn main:app                      # picks this file up from the working directory
+    GUNICORN_WORKERS=4 GUNICORN_THREADS=16 gunicorn main:app
+
+Requests spend most of their time waiting on Supabase, so each worker runs many threads (gthread) rather than
+the server running many single-threaded processes. Every worker has its own Supabase connection pool of
+SUPABASE_MAX_CONNECTIONS, so keep GUNICORN_THREADS at or below it.
+"""
+import os
+import multiprocessing
+
+wsgi_app = "main:app"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 8000)}")
+
+# gthread: workers x threads concurrent requests; gevent (pip install gevent): one greenlet per request
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("GUNICORN_WORKERS", max(2, multiprocessing.cpu_count())))
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# A write drops page_cache results only in the worker that handled it, so other workers would keep serving the
+# old student list until it expires: with more than one worker the cache is off unless PAGE_CACHE says otherwise
+if workers > 1:
+    os.environ.setdefault("PAGE_CACHE", "false")
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 100))  # gevent only
+
+# Import the app once in the master so workers fork with code, templates and libraries already loaded
+# (shared copy-on-write). gevent must patch the standard library before the app imports it, so it loads per worker.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true" if worker_class == "gthread" else "false").lower() == "true"
+
+# Longer than ARCHIVE_TIME_BUDGET, so an archive run is never killed mid-group
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+# On HUP/TERM, workers get this long to finish in-flight requests before they are killed
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+# Recycle workers now and then (jittered so they do not all restart together) to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None  # empty: no access log
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    """
+    Fills the caches workers inherit from the master: compiled Jinja templates and the modules the app imports
+    lazily. Supabase clients are not built here; a connection pool must not be shared across fork.
+    """
+    if not preload_app:
+        return
+    from main import app
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            server.log.warning(f"Could not precompile template {name}: {e}")
+    import supabase, httpx, PIL.Image  # noqa: F401
+    server.log.info("Templates and libraries preloaded for workers")
+
+
+def post_worker_init(worker):
+    """
+    Each worker builds its own Supabase clients and opens a connection before its first request arrives.
+    """
+    import threading
+    from extensions import warm_up
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import Config
+from image_optimizer import compress_image_with_report
+import image_worker
+from archive_scheduler import _with_retry
+from storage_gc import list_bucket, scan_table, format_size
+from utils import storage_filename, versioned_filename, upload_options
+
+# Profile pictures are the only large, lossy-compressible uploads; signatures are transparent PNGs and the
+# archive bucket is already compressed when it is written.
+BACKFILL_BUCKET = 'pictures'
+
+# Totals kept in backfill stats (see summarize_backfill)
+BACKFILL_KEYS = ('scanned', 'compressed', 'skipped', 'errors', 'before_bytes', 'after_bytes')
+
+
+def _profile_pictures(client):
+    """
+    Maps object name -> (profile id, student_id, picture_url) for every profile picture in the bucket.
+    """
+    refs = {}
+    for row in scan_table(client, "profiles", "id, student_id, picture_url"):
+        name = storage_filename(row.get('picture_url'))
+        if name:
+            refs[name] = (row['id'], row['student_id'], row['picture_url'])
+    return refs
+
+
+class Checkpoint:
+    """
+    Append-only JSON-lines progress file: one line per finished object, flushed as soon as it is written,
+    so an interrupted run (Ctrl-C, crash, lost connection) resumes after the last object it finished.
+    Objects that failed are not recorded as done and are retried on the next run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.totals = dict.fromkeys(BACKFILL_KEYS, 0)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash; that object is simply redone
+                    self._count(entry)
+        self._file = open(path, 'a', encoding='utf-8') if path else None
+
+    def _count(self, entry):
+        if entry['status'] == 'error':
+            return
+        self.done.add(entry['path'])
+        # Objects written by the backfill itself are never compressed again
+        if entry.get('output'):
+            self.done.add(entry['output'])
+        self.totals[entry['status']] += 1
+        self.totals['before_bytes'] += entry.get('before', 0)
+        self.totals['after_bytes'] += entry.get('after', entry.get('before', 0))
+
+    def record(self, entry):
+        with self._lock:
+            if entry['status'] == 'error':
+                self.totals['errors'] += 1
+            self._count(entry)
+            if self._file:
+                self._file.write(json.dumps(entry) + "\n")
+                self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def _backfill_object(client, path, size, refs, options):
+    """
+    Downloads, recompresses and stores one object. Returns its checkpoint entry.
+    """
+    entry = {'path': path, 'before': size}
+    file_data = _with_retry(client.storage.from_(BACKFILL_BUCKET).download, path)
+    entry['before'] = len(file_data or b'')
+    if not file_data:
+        return {**entry, 'status': 'skipped', 'reason': 'empty'}
+
+    # Download threads only wait here; the compression itself runs on the image worker processes
+    compressed, report = image_worker.run(
+        compress_image_with_report, file_data, wait=None, timeout=None,
+        quality=options['quality'], max_size=(options['max_side'], options['max_side']),
+        target_bytes=options['target_bytes'], min_quality=Config.ARCHIVE_IMAGE_MIN_QUALITY)
+    if not compressed:
+        return {**entry, 'status': 'skipped', 'reason': 'not an image'}
+    if len(compressed) > len(file_data) * (1 - options['min_saving']):
+        return {**entry, 'status': 'skipped', 'reason': 'already small'}
+
+    entry.update(after=len(compressed), quality=report.get('quality'), status='compressed')
+    if options['dry_run']:
+        return entry
+
+    storage = client.storage.from_(BACKFILL_BUCKET)
+    if options['derivative_prefix'] is not None:
+        # Derivative mode: originals and profiles are left untouched
+        output = f"{options['derivative_prefix']}/{os.path.splitext(path)[0]}.jpg"
+        _with_retry(storage.upload, output, compressed, upload_options("image/jpeg"))
+        return {**entry, 'output': output}
+
+    # Replace mode: a new versioned key (URLs are cached for a year, so the old key must never change bytes),
+    # then the profile is repointed only if it still shows the picture that was compressed
+    profile_id, student_id, old_url = refs[path]
+    new_hash = hashlib.sha256(compressed).hexdigest()
+    output = versioned_filename(student_id, "picture", new_hash, ".jpg")
+    _with_retry(storage.upload, output, compressed, upload_options("image/jpeg"))
+    updated = client.table("profiles").update({
+        "picture_url": storage.get_public_url(output),
+        "picture_hash": new_hash,
+    }).eq("id", profile_id).eq("picture_url", old_url).execute()
+    if not updated.data:
+        # The student uploaded a new picture meanwhile; theirs wins
+        storage.remove([output])
+        return {**entry, 'status': 'skipped', 'reason': 'picture changed', 'after': entry['before']}
+    try:
+        storage.remove([path])
+    except Exception as e:
+        print(f"Failed to remove replaced {BACKFILL_BUCKET}/{path}: {e}")  # left for the storage GC
+    return {**entry, 'output': output}
+
+
+def backfill_images(client, checkpoint_path, concurrency=None, quality=75, max_side=1024, target_kb=None,
+                    min_kb=200, min_saving=0.1, derivative_prefix=None, limit=None, dry_run=False, on_progress=None):
+    """
+    Recompresses existing profile pictures larger than `min_kb` to JPEG (longest side `max_side`,
+    at `quality`, or binary-searched down to `target_kb` when set).
+
+    By default each compressed picture is uploaded under a new versioned key, the profile is repointed at it
+    (keeping its review status) and the original is removed. With `derivative_prefix` the compressed copy is
+    written to "<prefix>/<name>.jpg" instead and nothing else changes. Results that do not save at least
+    `min_saving` of the original size are skipped.
+
+    The bucket listing is read in full before anything is written, so new and removed objects do not shift
+    the listing pages. Downloads and uploads run on `concurrency` threads (default BACKFILL_CONCURRENCY);
+    compression runs on the image worker pool. Progress is appended to `checkpoint_path`, and a re-run
+    with the same file skips every object already done. Stops after `limit` objects when set.
+    Returns the totals over every run recorded in the checkpoint (see BACKFILL_KEYS).
+    """
+    concurrency = concurrency or Config.BACKFILL_CONCURRENCY
+    if derivative_prefix is not None:
+        derivative_prefix = derivative_prefix.strip('/')
+        if not derivative_prefix:
+            raise ValueError("The derivative prefix must name a folder.")
+    options = {
+        'quality': quality, 'max_side': max_side, 'target_bytes': target_kb * 1024 if target_kb else None,
+        'min_saving': min_saving, 'derivative_prefix': derivative_prefix, 'dry_run': dry_run,
+    }
+    checkpoint = Checkpoint(None if dry_run else checkpoint_path)
+    # Only replace mode needs the profiles; unreferenced pictures are orphans for the storage GC
+    refs = _profile_pictures(client) if derivative_prefix is None else None
+
+    pending = []
+    for path, size, _ in list_bucket(client, BACKFILL_BUCKET):
+        checkpoint.totals['scanned'] += 1
+        if path in checkpoint.done:
+            continue
+        if derivative_prefix is not None and path.startswith(derivative_prefix + '/'):
+            continue
+        if size < min_kb * 1024 or (refs is not None and path not in refs):
+            continue
+        pending.append((path, size))
+    if limit:
+        pending = pending[:limit]
+
+    def finished(future, path):
+        if future.cancelled():
+            return
+        try:
+            entry = future.result()
+        except Exception as e:
+            entry = {'path': path, 'status': 'error', 'reason': str(e)}
+        checkpoint.record(entry)
+        if on_progress:
+            on_progress(entry, len(pending))
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image-backfill")
+    try:
+        futures = []
+        for path, size in pending:
+            future = executor.submit(_backfill_object, client, path, size, refs, options)
+            future.add_done_callback(lambda f, path=path: finished(f, path))
+            futures.append(future)
+        wait(futures)
+    finally:
+        # On Ctrl-C, drop the objects not started yet; the ones in flight finish and are still recorded
+        executor.shutdown(wait=True, cancel_futures=True)
+        checkpoint.close()
+    return checkpoint.totals
+
+
+def summarize_backfill(totals, dry_run=False):
+    """
+    One-line audit summary for the activity log.
+    """
+    saved = totals['before_bytes'] - totals['after_bytes']
+    percent = 100 * saved / totals['before_bytes'] if totals['before_bytes'] else 0
+    prefix = "Image backfill dry run" if dry_run else "Image backfill"
+    return (f"{prefix}: {totals['scanned']} objects listed, {totals['compressed']} recompressed, "
+            f"{totals['skipped']} skipped, {totals['errors']} errors. "
+            f"{format_size(totals['before_bytes'])} -> {format_size(totals['after_bytes'])} "
+            f"({'would save' if dry_run else 'saved'} {format_size(saved)}, {percent:.0f}%).")
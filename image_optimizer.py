@@ -1,21 +1,77 @@
 import os
 import io
-from PIL import Image, ImageOps
 
-def compress_image_bytes(image_data, quality=60, max_size=(1024, 1024), output_format='JPEG'):
+# Pillow is imported inside the functions: most requests never touch an image, so it stays off the cold start.
+# Callers on request paths run these through image_worker, so the pixel work happens in worker processes.
+
+# Target-size mode: quality is searched to within this many points, and each resize step scales the sides by this factor
+QUALITY_PRECISION = 2
+RESIZE_STEP = 0.8
+
+
+def _encode(img, output_format, quality):
+    output_buffer = io.BytesIO()
+    if output_format == 'JPEG':
+        # progressive=True: Loads gradually on slow connections & often smaller
+        # optimize=True: Extra pass to find best encoding
+        img.save(output_buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    elif output_format == 'WEBP':
+        # WebP is generally 25-34% smaller than JPEG
+        img.save(output_buffer, format='WEBP', quality=quality, optimize=True)
+    return output_buffer.getvalue()
+
+
+def _search_quality(img, output_format, target_bytes, min_quality, max_quality, encodes):
+    """
+    Highest quality in [min_quality, max_quality] (to within QUALITY_PRECISION) whose output fits target_bytes.
+    Returns (data, quality, fits); when even min_quality is too big, that smallest output with fits=False.
+    """
+    def attempt(quality):
+        encodes[0] += 1
+        return _encode(img, output_format, quality)
+
+    data = attempt(max_quality)
+    if len(data) <= target_bytes or max_quality <= min_quality:
+        return data, max_quality, len(data) <= target_bytes
+    best, best_quality = attempt(min_quality), min_quality
+    if len(best) > target_bytes:
+        return best, min_quality, False
+
+    # min_quality fits and max_quality does not: bisect between them
+    low, high = min_quality, max_quality
+    while high - low > QUALITY_PRECISION:
+        mid = (low + high) // 2
+        data = attempt(mid)
+        if len(data) <= target_bytes:
+            best, best_quality, low = data, mid, mid
+        else:
+            high = mid
+    return best, best_quality, True
+
+
+def compress_image_bytes(image_data, quality=60, max_size=(1024, 1024), output_format='JPEG',
+                         target_bytes=None, min_quality=30, min_side=None, report=None):
     """
     Compresses image bytes (e.g. from a database/cloud storage).
     
     Args:
         image_data (bytes): The raw image data.
-        quality (int): Compression quality (1-95).
+        quality (int): Compression quality (1-95); the highest quality tried in target-size mode.
         max_size (tuple): Max (width, height).
         output_format (str): 'JPEG' (default) or 'WEBP'.
+        target_bytes (int): Optional byte budget. Quality is binary-searched down to min_quality to fit it.
+        min_quality (int): Quality floor in target-size mode.
+        min_side (int): If set and min_quality still does not fit, the image is also scaled down
+            (RESIZE_STEP per step) while its longest side stays at least this many pixels.
+        report (dict): If given, filled with 'bytes', 'quality', 'width', 'height', 'encodes' and
+            'on_target' (False when nothing within the limits fit target_bytes).
         
     Returns:
         bytes: Compressed image data, or None if compression failed.
     """
+    from PIL import Image, ImageOps
     try:
+        output_format = output_format.upper()
         # Open image from bytes
         img = Image.open(io.BytesIO(image_data))
         
@@ -25,35 +81,72 @@ def compress_image_bytes(image_data, quality=60, max_size=(1024, 1024), output_f
         
         # 2. Convert mode
         # Convert to RGB if saving as JPEG, or if image is Palette based
-        if output_format.upper() == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
+        if output_format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
             img = img.convert('RGB')
-        elif output_format.upper() == 'WEBP' and img.mode == 'P':
+        elif output_format == 'WEBP' and img.mode == 'P':
             img = img.convert('RGBA') # WebP handles transparency
             
         # 3. Resize with High Quality Downsampling
         img.thumbnail(max_size, Image.Resampling.LANCZOS)
         
-        output_buffer = io.BytesIO()
-        
         # 4. Save with Optimizations
-        if output_format.upper() == 'JPEG':
-            # progressive=True: Loads gradually on slow connections & often smaller
-            # optimize=True: Extra pass to find best encoding
-            img.save(output_buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
-        elif output_format.upper() == 'WEBP':
-            # WebP is generally 25-34% smaller than JPEG
-            img.save(output_buffer, format='WEBP', quality=quality, optimize=True)
-            
-        return output_buffer.getvalue()
+        encodes = [0]
+        if not target_bytes:
+            encodes[0] = 1
+            data, used_quality, fits = _encode(img, output_format, quality), quality, True
+        else:
+            # Every attempt encodes the image decoded and resized above; smaller sizes are scaled from it too
+            resized = img
+            while True:
+                data, used_quality, fits = _search_quality(resized, output_format, target_bytes,
+                                                           min(min_quality, quality), quality, encodes)
+                longest = int(max(resized.size) * RESIZE_STEP)
+                if fits or not min_side or longest < min_side:
+                    break
+                scale = longest / max(img.size)
+                resized = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                                     Image.Resampling.LANCZOS)
+            img = resized
+
+        if report is not None:
+            report.update({'bytes': len(data), 'quality': used_quality, 'width': img.width, 'height': img.height,
+                           'encodes': encodes[0], 'on_target': fits})
+        return data
         
     except Exception as e:
         print(f"Error compressing image bytes: {e}")
         return None
 
+def compress_image_with_report(image_data, **options):
+    """
+    compress_image_bytes(image_data, **options) returning (bytes or None, report dict).
+    For the image worker pool, where a `report` argument would be filled in the worker process, not the caller's.
+    """
+    report = {}
+    return compress_image_bytes(image_data, report=report, **options), report
+
+
+def has_transparency(image_data):
+    """
+    True if the image (bytes) has at least one non-opaque pixel.
+    """
+    from PIL import Image
+    try:
+        img = Image.open(io.BytesIO(image_data))
+        if img.mode != 'RGBA':
+            img = img.convert('RGBA')
+        # Smallest alpha value, computed in C instead of collecting every pixel in Python
+        return img.getchannel('A').getextrema()[0] < 255
+    except Exception as e:
+        print(f"Error checking transparency: {e}")
+        return False
+
+
 def compress_and_archive_image(source_path, destination_path, quality=60, max_size=(1024, 1024)):
     """
     Compresses an image from a file path and saves it to a destination path.
     """
+    from PIL import Image, ImageOps
     try:
         # Check if source exists
         if not os.path.exists(source_path):
@@ -0,0 +1,142 @@
+import threading
+from concurrent.futures import Future, BrokenExecutor, TimeoutError as FutureTimeout
+from flask import request, flash, redirect, url_for, jsonify
+from werkzeug.exceptions import ServiceUnavailable
+from config import Config
+from perf import timed
+
+# CPU-bound Pillow work (decoding, resampling, encoding) runs in these processes instead of on request threads,
+# so it uses every core and never holds the GIL that the web threads need.
+# Created on first use in each server process (never in gunicorn's master), and forked from a clean server
+# process rather than from a threaded web worker.
+_pool = None
+_pool_lock = threading.Lock()
+# Tasks running or waiting for a process; a caller that finds no room waits, then gets ImageWorkerBusy
+_slots = threading.BoundedSemaphore(max(1, Config.IMAGE_WORKERS + Config.IMAGE_QUEUE_SIZE))
+# Default for `wait` and `timeout`: the configured value
+DEFAULT = object()
+
+
+class ImageWorkerError(ServiceUnavailable):
+    """
+    Image work could not be done right now. A 503, so requests that do not catch it get the handler below.
+    """
+
+
+class ImageWorkerBusy(ImageWorkerError):
+    description = "The server is busy processing images. Please try again in a moment."
+
+
+class ImageTaskTimeout(ImageWorkerError):
+    description = "Processing the image took too long. Please try again, or use a smaller image."
+
+
+def _executor():
+    global _pool
+    import multiprocessing  # deferred: most requests never process an image
+    from concurrent.futures import ProcessPoolExecutor
+    with _pool_lock:
+        if _pool is None and Config.IMAGE_WORKERS > 0:
+            try:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                context = multiprocessing.get_context(method)
+                if method == 'forkserver':
+                    context.set_forkserver_preload(['PIL.Image', 'image_optimizer'])
+                _pool = ProcessPoolExecutor(max_workers=Config.IMAGE_WORKERS, mp_context=context,
+                                            max_tasks_per_child=Config.IMAGE_WORKER_MAX_TASKS or None)
+            except (OSError, NotImplementedError, ValueError) as e:
+                # e.g. no /dev/shm for the pool's locks on serverless platforms
+                print(f"Image worker pool unavailable, processing images inline: {e}")
+                Config.IMAGE_WORKERS = 0
+        return _pool
+
+
+def _reset(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(fn, *args, wait=DEFAULT, **kwargs):
+    """
+    Queues fn(*args, **kwargs) on the image worker pool and returns a Future.
+    `fn` must be a module-level function (e.g. from image_optimizer) and its arguments picklable.
+    Waits up to `wait` seconds (default IMAGE_QUEUE_WAIT; None: as long as it takes) for room in the queue,
+    then raises ImageWorkerBusy. With IMAGE_WORKERS=0 the call runs inline and the returned Future is already done.
+    """
+    if wait is DEFAULT:
+        wait = Config.IMAGE_QUEUE_WAIT
+    pool = _executor()
+    if pool is None:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    if not _slots.acquire(timeout=wait):
+        raise ImageWorkerBusy()
+    try:
+        future = pool.submit(fn, *args, **kwargs)
+    except BrokenExecutor:
+        _slots.release()
+        _reset(pool)
+        raise ImageWorkerBusy()
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def run(fn, *args, wait=DEFAULT, timeout=DEFAULT, **kwargs):
+    """
+    Runs fn(*args, **kwargs) on the image worker pool and returns its result, timed as an `image` call
+    in the request's Server-Timing.
+
+        data = image_worker.run(compress_image_bytes, image_data, quality=60)
+
+    Raises ImageWorkerBusy when the queue stays full for `wait` seconds, and ImageTaskTimeout when the task
+    has not finished after `timeout` seconds (default IMAGE_TASK_TIMEOUT). A timed-out task keeps its process
+    (and queue slot) until it ends.
+    """
+    if timeout is DEFAULT:
+        timeout = Config.IMAGE_TASK_TIMEOUT
+    with timed('image', fn.__name__):
+        future = submit(fn, *args, wait=wait, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            raise ImageTaskTimeout()
+        except BrokenExecutor:
+            # A worker died (e.g. out of memory); start a fresh pool for the next task
+            pool = _pool
+            if pool is not None:
+                _reset(pool)
+            raise ImageWorkerBusy()
+
+
+def _unavailable(error):
+    message = error.description
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        response = jsonify({"success": False, "message": message})
+        response.status_code = 503
+    else:
+        flash(message, "error")
+        target = request.referrer or ''
+        if not target.startswith(request.host_url):
+            target = url_for('core.index')
+        response = redirect(target)
+    response.headers['Retry-After'] = '5'
+    return response
+
+
+def init_image_worker(app):
+    """
+    Sends a request whose image work was refused (queue full) or timed out back to its page with a message,
+    or answers 503 with Retry-After for JSON requests.
+    """
+    app.register_error_handler(ImageWorkerError, _unavailable)
@@ -0,0 +1,113 @@
+"""
+Cold start check for the Vercel entry point.
+
+Starts a fresh interpreter, imports main and serves one /_health request, and fails (exit code 1) when that takes
+longer than Config.IMPORT_TIME_BUDGET_MS or when it loads a module that should stay lazy. Flask is imported first so
+its share of the total (most of it) is reported separately, but the budget covers the whole cold start.
+Run it before deploying, or in CI:
+
+    python import_budget.py                # best of 3 runs against IMPORT_TIME_BUDGET_MS
+    python import_budget.py --budget 200 --runs 5 --top 20
+"""
+import os
+import sys
+import argparse
+import subprocess
+from config import Config
+
+# Only routes that need these may import them; /_health must not
+LAZY_MODULES = ('supabase', 'httpx', 'PIL', 'smtplib', 'email.mime')
+
+# Runs in the child interpreter: times the Flask import, then import main + first request, and lists any lazy
+# module that was loaded
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import flask
+baseline = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+import main
+main.app.test_client().get('/_health')
+elapsed = (time.perf_counter() - started) * 1000
+loaded = sorted({name for name in sys.modules for lazy in %r if name == lazy or name.startswith(lazy + '.')})
+print(f"{baseline:.1f} {elapsed:.1f}")
+print(",".join(loaded))
+"""
+
+
+def run_probe(importtime=False):
+    """
+    (Flask import ms, app ms, loaded lazy modules, importtime report lines) for one cold start.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', PROBE % (LAZY_MODULES,)]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{result.stderr}")
+    timings, loaded = result.stdout.splitlines()[-2:]
+    baseline, elapsed = (float(value) for value in timings.split())
+    report = [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+    return baseline, elapsed, [name for name in loaded.split(',') if name], report
+
+
+def slowest_imports(report, top):
+    """
+    The `top` modules main imports directly, by cumulative import time, as (microseconds, module).
+    Each includes everything it pulls in, so this points at the import line in main (or a blueprint) to defer.
+    """
+    children = []
+    for line in report:
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        if not cumulative_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # -X importtime prints a module after everything it imported, so main's children precede it
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            if name.strip() == 'main':
+                return sorted(children, reverse=True)[:top]
+            children = []
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when the cold start of main.py exceeds its budget.")
+    parser.add_argument('--budget', type=int, default=Config.IMPORT_TIME_BUDGET_MS, help="milliseconds (default: IMPORT_TIME_BUDGET_MS)")
+    parser.add_argument('--runs', type=int, default=3, help="cold starts to time; the fastest counts")
+    parser.add_argument('--top', type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    baselines = []
+    timings = []
+    loaded = []
+    for _ in range(max(1, args.runs)):
+        baseline, elapsed, loaded, _ = run_probe()
+        baselines.append(baseline)
+        timings.append(baseline + elapsed)
+    best = min(timings)
+    flask_share = baselines[timings.index(best)]
+
+    _, _, _, report = run_probe(importtime=True)
+    print(f"Cold start (import main + GET /_health): {best:.0f} ms best of {len(timings)}, budget {args.budget} ms")
+    print(f"  of which importing Flask: {flask_share:.0f} ms, the app: {best - flask_share:.0f} ms")
+    print("Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(report, args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: /_health loaded modules that should be imported lazily: {', '.join(loaded)}")
+        failed = True
+    if best > args.budget:
+        print(f"FAIL: cold start is {best - args.budget:.0f} ms over budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Load-test profile for the self-hosted (gunicorn) setup.
+
+For each worker count, starts gunicorn with gunicorn.conf.py, drives the login, profile and admin students
+pages with concurrent keep-alive clients for a fixed time, and prints requests per second and latency.
+Run it against a staging Supabase project; login calls count against Supabase Auth rate limits.
+
+    LOADTEST_STUDENT_ID=... LOADTEST_PASSWORD=... LOADTEST_ADMIN_ID=... LOADTEST_ADMIN_PASSWORD=... \\
+        python loadtest.py --workers 1 2 4 --threads 8 --concurrency 32 --duration 20
+
+    python loadtest.py --url https://staging.example.com    # an already running server, no worker sweep
+
+Scenarios whose credentials are not set are skipped.
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+import statistics
+import httpx
+
+SCENARIOS = ('login', 'profile', 'admin_students')
+
+
+def credentials(scenario):
+    if scenario == 'admin_students':
+        return os.getenv("LOADTEST_ADMIN_ID"), os.getenv("LOADTEST_ADMIN_PASSWORD")
+    return os.getenv("LOADTEST_STUDENT_ID"), os.getenv("LOADTEST_PASSWORD")
+
+
+def log_in(client, student_id, password):
+    """
+    Logs `client` in; the session cookie stays on it. Login redirects on success and re-renders (200) on failure.
+    """
+    res = client.post("/login", data={"student_id": student_id, "password": password})
+    return res.status_code == 302
+
+
+def prepare(base_url, scenario):
+    """
+    A logged-in client and the request it repeats, or (None, None) when the scenario cannot run.
+    """
+    student_id, password = credentials(scenario)
+    if not student_id or not password:
+        return None, None
+    client = httpx.Client(base_url=base_url, timeout=30)
+    if scenario == 'login':
+        return client, lambda: client.post("/login", data={"student_id": student_id, "password": password}).status_code == 302
+    if not log_in(client, student_id, password):
+        client.close()
+        raise RuntimeError(f"{scenario}: could not log in as {student_id}")
+    path = "/profile" if scenario == 'profile' else "/admin/students"
+    return client, lambda: client.get(path).status_code == 200
+
+
+def run_scenario(base_url, scenario, concurrency, duration):
+    """
+    Runs `concurrency` clients for `duration` seconds. Returns a result dict, or None when skipped.
+    """
+    clients = [prepare(base_url, scenario) for _ in range(concurrency)]
+    if clients[0][0] is None:
+        return None
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def loop(call):
+        mine, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = call()
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                mine.append(time.perf_counter() - started)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=loop, args=(call,)) for _, call in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for client, _ in clients:
+        client.close()
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        "errors": errors[0],
+    }
+
+
+def start_server(app, workers, threads, port):
+    env = dict(os.environ, GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads),
+               GUNICORN_BIND=f"127.0.0.1:{port}", GUNICORN_ACCESS_LOG="")
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", app],
+                              env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if server.poll() is not None:
+            break
+        try:
+            if httpx.get(f"{base_url}/_health", timeout=1).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def print_results(label, results):
+    for scenario, result in results.items():
+        if result is None:
+            print(f"{label:<12} {scenario:<16} skipped (no credentials)")
+        else:
+            print(f"{label:<12} {scenario:<16} {result['rps']:8.1f} req/s  p50 {result['p50']:7.1f} ms  "
+                  f"p95 {result['p95']:7.1f} ms  errors {result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests per second for login, profile and admin students.")
+    parser.add_argument('--url', help="test a running server instead of starting gunicorn")
+    parser.add_argument('--app', default="main:app", help="WSGI app gunicorn serves")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="worker counts to compare")
+    parser.add_argument('--threads', type=int, default=8, help="threads per gthread worker")
+    parser.add_argument('--concurrency', type=int, default=32, help="concurrent clients per scenario")
+    parser.add_argument('--duration', type=float, default=20, help="seconds per scenario")
+    parser.add_argument('--scenario', choices=SCENARIOS, nargs='+', default=list(SCENARIOS))
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.url:
+        print_results("running", {s: run_scenario(args.url, s, args.concurrency, args.duration) for s in args.scenario})
+        return 0
+
+    for workers in args.workers:
+        server, base_url = start_server(args.app, workers, args.threads, args.port)
+        try:
+            results = {s: run_scenario(base_url, s, args.concurrency, args.duration) for s in args.scenario}
+        finally:
+            server.terminate()
+            server.wait()
+        print_results(f"{workers}w x {args.threads}t", results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
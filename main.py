@@ -1,9 +1,14 @@
 from flask import Flask
 from config import Config
-from extensions import supabase, supabase_admin
+from extensions import warm_up
 from utils import inject_user_roles
+from upload_intake import init_upload_intake
+from image_worker import init_image_worker
+from page_cache import init_page_cache
+from profile_replica import init_profile_replica
+from perf import init_perf
 import os # <-- Need this for the app.run port
-import pytz
+import threading
 
 # Import Blueprints
 from auth.routes import auth_bp
@@ -26,6 +31,21 @@ def create_app(config_class=Config):
     # Register context processors
     app.context_processor(inject_user_roles)
 
+    # Size-capped, disk-spooled multipart parsing
+    init_upload_intake(app)
+
+    # Image work on a process pool; a full queue or a timed-out task sends the user back with a message
+    init_image_worker(app)
+
+    # Server-Timing headers, slow-request log and /admin/_perf statistics
+    init_perf(app)
+
+    # Last good results of read-only pages, served while they refresh; tracks each user's last form post
+    init_page_cache(app)
+
+    # Optional local copy of profiles for the read-heavy pages (PROFILE_REPLICA)
+    init_profile_replica(app)
+
     # Register Blueprints
     app.register_blueprint(auth_bp, url_prefix='/')
     app.register_blueprint(core_bp, url_prefix='/')
@@ -37,6 +57,16 @@ def create_app(config_class=Config):
     def health_check():
         return "App is running!"
 
+    # Builds the Supabase clients and opens a pooled connection; point an uptime check or cron at it
+    # so real requests land on a warm instance. /_health stays free of any Supabase work.
+    @app.route('/_warmup')
+    def warm_up_check():
+        return f"Warm ({warm_up() * 1000:.0f} ms)"
+
+    # Long-running servers can warm up in the background at startup instead
+    if config_class.WARM_UP_ON_START:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
     return app
 
 # --- THIS IS THE FIX ---
@@ -0,0 +1,102 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, session, request
+from config import Config
+
+# Last good results of read-only page queries, in this process only: key -> (value, fetched_at)
+_entries = OrderedDict()
+_lock = threading.Lock()
+# Keys being refreshed in the background, so a burst of requests starts one refresh, not one each
+_refreshing = set()
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="page-cache")
+_stats = {'fresh': 0, 'stale': 0, 'miss': 0, 'refresh_errors': 0}
+
+
+def last_write():
+    """
+    time.time() of this user's last form post (any POST may change what the admin pages show), or 0.
+    """
+    return session.get('written_at', 0)
+
+
+def _mark_writes(response):
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and session.get('user_id'):
+        session['written_at'] = time.time()
+    return response
+
+
+def _store(key, value):
+    with _lock:
+        _entries[key] = (value, time.time())
+        _entries.move_to_end(key)
+        while len(_entries) > Config.PAGE_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def _refresh(key, fetch):
+    try:
+        _store(key, fetch())
+    except Exception as e:
+        _stats['refresh_errors'] += 1
+        print(f"Background refresh of {key[0]} failed: {e}")
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+
+def cached(key, fetch):
+    """
+    fetch(), or its last good result for `key` (a tuple starting with a namespace, e.g. ("archive", page)).
+
+    Results younger than PAGE_CACHE_FRESH seconds are returned as they are. Results up to PAGE_CACHE_STALE
+    seconds old are returned at once while fetch() runs again in the background, and the page is marked stale
+    (see g.stale_data_age). Anything older, and anything fetched before this user's last form post, waits for
+    fetch(); its exceptions propagate as without the cache. `fetch` must not need the request context.
+    """
+    if not Config.PAGE_CACHE:
+        return fetch()
+    with _lock:
+        entry = _entries.get(key)
+    if entry is not None and entry[1] > last_write():
+        value, fetched_at = entry
+        age = time.time() - fetched_at
+        if age <= Config.PAGE_CACHE_FRESH:
+            _stats['fresh'] += 1
+            return value
+        if age <= Config.PAGE_CACHE_STALE:
+            _stats['stale'] += 1
+            with _lock:
+                start = key not in _refreshing
+                _refreshing.add(key)
+            if start:
+                _refresh_executor.submit(_refresh, key, fetch)
+            g.stale_data_age = max(age, g.get('stale_data_age', 0))
+            return value
+    _stats['miss'] += 1
+    value = fetch()
+    _store(key, value)
+    return value
+
+
+def invalidate(namespace):
+    """
+    Drops every result cached under `namespace` in this process, e.g. after saving print settings.
+    Other processes keep theirs until they expire, hence PAGE_CACHE is off by default with several workers.
+    """
+    with _lock:
+        for key in [k for k in _entries if k[0] == namespace]:
+            del _entries[key]
+
+
+def cache_stats():
+    with _lock:
+        return {**_stats, 'entries': len(_entries), 'refreshing': len(_refreshing)}
+
+
+def init_page_cache(app):
+    """
+    Remembers when each user last submitted a form, so nobody is shown cached data from before their own change.
+    """
+    app.after_request(_mark_writes)
@@ -0,0 +1,300 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict, deque, OrderedDict
+from urllib.parse import urlsplit, parse_qsl, unquote
+from flask import g, request, current_app, has_request_context, before_render_template, template_rendered
+from config import Config
+
+# Recent samples kept per route and per backend call, in this process only (each Vercel instance has its own)
+_lock = threading.Lock()
+_route_samples = defaultdict(lambda: deque(maxlen=Config.PERF_SAMPLES))
+_call_samples = defaultdict(lambda: deque(maxlen=Config.PERF_SAMPLES))
+# Reads shared by concurrent identical requests (supabase_clients.CoalescingTransport), per query:
+# query -> [upstream calls that had followers, callers served by them without a call of their own]
+_coalesced = OrderedDict()
+COALESCED_KEYS = 200
+
+# Kinds that count against a route's call budget (render and smtp do not)
+SUPABASE_KINDS = ('table', 'rpc', 'storage', 'auth')
+READ_METHODS = ('GET', 'HEAD')
+
+
+class CallBudgetExceeded(RuntimeError):
+    """
+    Raised after a request that broke its call budget or repeated queries, when PERF_STRICT_BUDGETS is on.
+    """
+
+
+def classify(method, url):
+    """
+    (kind, name) of a Supabase HTTP call from its URL: ('table', 'GET profiles'), ('rpc', 'bulk_review'),
+    ('storage', 'POST pictures'), ('auth', 'POST token'), or ('http', host) for anything else.
+    """
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split('/') if s]
+    if segments[:3] == ['rest', 'v1', 'rpc'] and len(segments) > 3:
+        return 'rpc', segments[3]
+    if segments[:2] == ['rest', 'v1'] and len(segments) > 2:
+        return 'table', f"{method} {segments[2]}"
+    if segments[:3] == ['storage', 'v1', 'object'] and len(segments) > 3:
+        # /object/<bucket>/..., or /object/<public|list|sign|move|upload>/...
+        return 'storage', f"{method} {segments[3]}"
+    if segments[:2] == ['auth', 'v1'] and len(segments) > 2:
+        return 'auth', f"{method} {'/'.join(segments[2:4])}"
+    return 'http', parts.netloc
+
+
+def record(kind, name, seconds, target=None):
+    """
+    Records one backend call for the current request (if any) and for the /admin/_perf statistics.
+    `target` is (method, url) for HTTP calls and is used to spot repeated queries.
+    Safe from fan-out workers: they run in a copy of the request's context and share its `g`.
+    """
+    if not Config.PERF_TRACING:
+        return
+    if has_request_context() and 'perf_calls' in g:
+        g.perf_calls.append((kind, name, seconds, target))
+    with _lock:
+        _call_samples[(kind, name)].append(seconds * 1000)
+
+
+def record_coalesced(method, url, followers):
+    """
+    Records one upstream read whose response also served `followers` identical concurrent requests.
+    """
+    if not Config.PERF_TRACING:
+        return
+    kind, name = classify(method, url)
+    query = unquote(urlsplit(url).query)
+    key = f"{name}?{query}" if query else name
+    with _lock:
+        counts = _coalesced.pop(key, [0, 0])
+        counts[0] += 1
+        counts[1] += followers
+        _coalesced[key] = counts
+        while len(_coalesced) > COALESCED_KEYS:
+            _coalesced.popitem(last=False)
+
+
+def record_http(method, url, seconds):
+    kind, name = classify(method, url)
+    record(kind, name, seconds, (method, url))
+
+
+@contextmanager
+def timed(kind, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, name, time.perf_counter() - started)
+
+
+def call_budget(limit):
+    """
+    Declares the most Supabase calls (table, RPC, storage and auth) one request to this view may make.
+
+        @admin_bp.route('/students')
+        @admin_required
+        @call_budget(3)
+        def admin_students(): ...
+
+    A request over budget is logged as a `call_budget_exceeded` record, and fails when PERF_STRICT_BUDGETS is on.
+    """
+    def decorate(view):
+        view.call_budget = limit
+        return view
+    return decorate
+
+
+def extra_calls(count, reason):
+    """
+    Raises this request's call budget by `count` for a path the common case skips, e.g. upload jobs in flight:
+
+        if session.get('upload_jobs_open'):
+            extra_calls(2, "upload jobs")
+
+    so the budget on the view stays at what the common path needs and still catches regressions there.
+    """
+    if 'perf_extra_calls' not in g:
+        g.perf_extra_calls = []
+    g.perf_extra_calls.append((count, reason))
+
+
+def request_budget():
+    """
+    The call budget of the current request: its view's call_budget plus any extra_calls, or None.
+    """
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'call_budget', None)
+    if budget is None:
+        return None
+    return budget + sum(count for count, _ in g.get('perf_extra_calls', []))
+
+
+def _query_shape(method, url):
+    # Same endpoint, filter columns and select list; only the filter values may differ
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if any(value.startswith('in.') for _, value in params):
+        return None  # a batched in_() query, which is the fix for N+1 rather than an instance of it
+    select = next((value for key, value in params if key == 'select'), '')
+    return method, parts.path, tuple(sorted(key for key, _ in params)), select
+
+
+def check_calls(calls, budget=None):
+    """
+    Problems with one request's calls: [(kind of problem, detail)]. Finds
+    - more Supabase calls than `budget`
+    - identical reads sent more than once (the result could have been reused)
+    - the same query shape (same table, filter columns and select, different values) at least
+      PERF_N_PLUS_ONE times: one query per row of an earlier result, where one in_() query would do
+    """
+    problems = []
+    backend = [c for c in calls if c[0] in SUPABASE_KINDS]
+    if budget is not None and len(backend) > budget:
+        problems.append(("call_budget_exceeded", f"{len(backend)} Supabase calls, budget {budget}"))
+
+    reads, shapes = {}, {}
+    for kind, name, _, target in backend:
+        if target is None:
+            continue
+        method, url = target
+        if method in READ_METHODS:
+            reads[target] = reads.get(target, 0) + 1
+        if kind in ('table', 'rpc'):
+            shape = _query_shape(method, url)
+            if shape:
+                shapes.setdefault(shape, set()).add(url)
+    for (method, url), count in reads.items():
+        if count > 1:
+            problems.append(("repeated_query", f"{method} {url} sent {count} times"))
+    for (method, path, _, _), urls in shapes.items():
+        if len(urls) >= Config.PERF_N_PLUS_ONE:
+            problems.append(("n_plus_one", f"{method} {path} sent {len(urls)} times with different filter values"))
+    return problems
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _summarize(samples):
+    rows = []
+    with _lock:
+        snapshot = {key: list(values) for key, values in samples.items()}
+    for key, values in snapshot.items():
+        if not values:
+            continue
+        ordered = sorted(v[0] if isinstance(v, tuple) else v for v in values)
+        row = {"key": key, "samples": len(ordered), "p50": _percentile(ordered, 0.5), "p95": _percentile(ordered, 0.95)}
+        if isinstance(values[0], tuple):
+            row["calls"] = sum(v[1] for v in values) / len(values)
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["p95"], reverse=True)
+
+
+def route_stats():
+    """
+    Per-endpoint p50/p95 (ms) and average backend calls per request, slowest p95 first.
+    """
+    return _summarize(_route_samples)
+
+
+def call_stats():
+    """
+    Per backend call (kind, name) p50/p95 (ms), slowest p95 first.
+    """
+    return _summarize(_call_samples)
+
+
+def coalesce_stats():
+    """
+    Queries that concurrent requests shared, most collapsed callers first: upstream calls shared and
+    callers that waited for one of them instead of sending their own.
+    """
+    with _lock:
+        rows = [{"key": key, "shared": shared, "collapsed": collapsed} for key, (shared, collapsed) in _coalesced.items()]
+    return sorted(rows, key=lambda r: r["collapsed"], reverse=True)
+
+
+def _by_kind(calls):
+    totals = {}
+    for kind, _, seconds, _ in calls:
+        count, ms = totals.get(kind, (0, 0.0))
+        totals[kind] = (count + 1, ms + seconds * 1000)
+    return totals
+
+
+def _server_timing(by_kind, total_ms):
+    # Durations of fanned-out calls overlap, so a kind's sum can exceed the request's total
+    entries = [f'{kind};dur={ms:.1f};desc="{count} call{"s" if count != 1 else ""}"' for kind, (count, ms) in by_kind.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+def _start_request():
+    g.perf_started = time.perf_counter()
+    g.perf_calls = []
+    g.perf_render = []
+
+
+def _finish_request(response):
+    if 'perf_started' not in g:
+        return response
+    total_ms = (time.perf_counter() - g.perf_started) * 1000
+    calls = list(g.perf_calls)
+    by_kind = _by_kind(calls)
+    response.headers['Server-Timing'] = _server_timing(by_kind, total_ms)
+
+    endpoint = request.endpoint or '<unmatched>'
+    if endpoint != 'static':
+        with _lock:
+            _route_samples[endpoint].append((total_ms, len(calls)))
+
+    if total_ms >= Config.PERF_SLOW_REQUEST_MS:
+        slowest = sorted(calls, key=lambda c: c[2], reverse=True)[:10]
+        print(json.dumps({
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": endpoint,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "by_kind": {kind: {"count": count, "ms": round(ms, 1)} for kind, (count, ms) in by_kind.items()},
+            "slowest_calls": [{"kind": kind, "name": name, "ms": round(seconds * 1000, 1)} for kind, name, seconds, _ in slowest],
+        }))
+
+    problems = check_calls(calls, request_budget())
+    for problem, detail in problems:
+        print(json.dumps({"event": problem, "method": request.method, "path": request.path, "endpoint": endpoint, "detail": detail}))
+    if problems and Config.PERF_STRICT_BUDGETS:
+        raise CallBudgetExceeded(f"{endpoint}: " + "; ".join(detail for _, detail in problems))
+    return response
+
+
+def _render_started(sender, template, context, **extra):
+    if has_request_context() and 'perf_render' in g:
+        g.perf_render.append(time.perf_counter())
+
+
+def _render_finished(sender, template, context, **extra):
+    if has_request_context() and g.get('perf_render'):
+        record('render', template.name or '<string>', time.perf_counter() - g.perf_render.pop())
+
+
+def init_perf(app):
+    """
+    Times every request, adds a Server-Timing header (backend time and call count per kind: table, rpc, storage,
+    auth, smtp, render) and prints a JSON record for requests slower than PERF_SLOW_REQUEST_MS.
+    Supabase calls are timed by the shared HTTP client (supabase_clients.TimingTransport).
+    Each request is also checked against its view's call_budget and for repeated or N+1 queries.
+    """
+    if not Config.PERF_TRACING:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
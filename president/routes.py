@@ -1,9 +1,13 @@
 import os
 import io
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from extensions import supabase
-from utils import president_required, send_status_email
+from utils import president_required, send_status_email, REVIEW_ACTIONS, build_review_decision
 from config import Config
+from review_queue import fetch_review_queue, cursor_from_args
+from perf import call_budget
+from profile_replica import local_profiles
+from page_cache import invalidate
 import pytz
 from datetime import datetime
 president_bp = Blueprint('president', __name__, template_folder='../templates')
@@ -14,12 +18,15 @@ def log_activity(action, target_user_id=None, target_user_name=None, details=Non
         if not admin_id:
             return 
 
-        admin_res = supabase.table("profiles").select("first_name, last_name, email").eq("id", admin_id).single().execute()
-        admin_name = "Unknown Admin"
-        if admin_res.data:
-            admin_name = f"{admin_res.data.get('first_name', '')} {admin_res.data.get('last_name', '')}".strip()
-            if not admin_name:
-                admin_name = admin_res.data.get('email', 'Unknown Admin')
+        # login() keeps the signed-in user's name in the session, so no profile lookup is needed
+        admin_name = (session.get('full_name') or '').strip()
+        if not admin_name:
+            admin_res = supabase.table("profiles").select("first_name, last_name, email").eq("id", admin_id).single().execute()
+            admin_name = "Unknown Admin"
+            if admin_res.data:
+                admin_name = f"{admin_res.data.get('first_name', '')} {admin_res.data.get('last_name', '')}".strip()
+                if not admin_name:
+                    admin_name = admin_res.data.get('email', 'Unknown Admin')
 
         # Get current time in Philippines timezone
         ph_tz = pytz.timezone('Asia/Manila')
@@ -38,9 +45,32 @@ def log_activity(action, target_user_id=None, target_user_name=None, details=Non
     except Exception as e:
         print(f"Failed to log activity: {e}")
 
+def in_president_scope(student):
+    """
+    True when the student belongs to the logged-in president's class (program, year, section, major).
+    """
+    pres_major = session.get('major')
+    stud_major = student.get('major')
+    majors_match = (pres_major == stud_major) or (not pres_major and not stud_major)
+    return (
+        student.get('program') == session.get('program') and
+        student.get('year_level') == session.get('year_level') and
+        student.get('section') == session.get('section') and
+        majors_match
+    )
+
+def president_queue_scope():
+    return {
+        'program': session.get('program'),
+        'year_level': session.get('year_level'),
+        'section': session.get('section'),
+        'major': session.get('major') or None
+    }
+
 @president_bp.route('/')
 @president_bp.route('/dashboard')
 @president_required
+@call_budget(2)
 def president_dashboard():
     try:
         program = session.get('program')
@@ -48,16 +78,21 @@ def president_dashboard():
         section = session.get('section')
         major = session.get('major') 
 
-        query = supabase.table("profiles").select("*")
-        query = query.eq("program", program)
-        query = query.eq("year_level", year_level)
-        query = query.eq("section", section)
-        if major: query = query.eq("major", major)
-        else: query = query.is_("major", "null")
-        query = query.neq("id", session['user_id'])
-        
-        response = query.order("last_name", desc=False).execute()
-        classmates = response.data
+        replica = local_profiles()
+        if replica:
+            where = {'program': program, 'year_level': year_level, 'section': section, 'major': major or None}
+            classmates = [p for p in replica.select(where, order=[('last_name', False)]) if p['id'] != session['user_id']]
+        else:
+            query = supabase.table("profiles").select("*")
+            query = query.eq("program", program)
+            query = query.eq("year_level", year_level)
+            query = query.eq("section", section)
+            if major: query = query.eq("major", major)
+            else: query = query.is_("major", "null")
+            query = query.neq("id", session['user_id'])
+
+            response = query.order("last_name", desc=False).execute()
+            classmates = response.data
 
         class_name_parts = [program, f"{year_level} {section}"]
         if major: class_name_parts.append(major)
@@ -113,16 +148,7 @@ def president_review_student(student_id):
         student = student_res.data
 
         # --- VALIDATE PRESIDENT CAN REVIEW THIS STUDENT ---
-        pres_major = session.get('major')
-        stud_major = student.get('major')
-        majors_match = (pres_major == stud_major) or (not pres_major and not stud_major)
-
-        if not (
-            student.get('program') == session.get('program') and
-            student.get('year_level') == session.get('year_level') and
-            student.get('section') == session.get('section') and
-            majors_match
-        ):
+        if not in_president_scope(student):
             flash("You do not have permission to review this student.", "error")
             return redirect(url_for('president.president_dashboard'))
 
@@ -136,84 +162,30 @@ def president_review_student(student_id):
     if request.method == 'POST':
         try:
             action = request.form.get('action')
-            update_data = {}
-            email_subject = ""
-            email_body = ""
-
-            # ========= APPROVALS =========
-
-            if action == 'approve_picture':
-                update_data = {
-                    'picture_status': 'approved',
-                    'picture_disapproval_reason': None,
-                    'is_locked': True
-                }
-                email_subject = "CCS SBO: Picture Approved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    "Your profile picture has been APPROVED by the Class President."
-                )
+            reason = None
 
-            elif action == 'approve_signature':
-                update_data = {
-                    'signature_status': 'approved',
-                    'signature_disapproval_reason': None,
-                    'is_locked': True
-                }
-                email_subject = "CCS SBO: Signature Approved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    "Your digital signature has been APPROVED by the Class President."
-                )
-
-            # ========= DISAPPROVALS =========
+            # ========= APPROVALS / DISAPPROVALS =========
 
-            elif action == 'disapprove_picture':
-                reason = request.form.get('picture_disapproval_reason', '').strip()
-                if not reason:
-                    flash("A reason is required.", "error")
-                    return render_template('president/review_student.html', student=student)
-
-                update_data = {
-                    'picture_status': 'disapproved',
-                    'picture_disapproval_reason': reason,
-                    'is_locked': False
-                }
-                email_subject = "CCS SBO: Picture Disapproved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    "Your profile picture was DISAPPROVED by the Class President.\n"
-                    f"Reason: {reason}\n\n"
-                    "Please login and update your picture."
-                )
+            if action not in REVIEW_ACTIONS:
+                flash("Invalid action.", "error")
+                return render_template('president/review_student.html', student=student)
 
-            elif action == 'disapprove_signature':
-                reason = request.form.get('signature_disapproval_reason', '').strip()
+            if action.startswith('disapprove_'):
+                field = action.replace('disapprove_', '')
+                reason = request.form.get(f'{field}_disapproval_reason', '').strip()
                 if not reason:
                     flash("A reason is required.", "error")
                     return render_template('president/review_student.html', student=student)
 
-                update_data = {
-                    'signature_status': 'disapproved',
-                    'signature_disapproval_reason': reason,
-                    'is_locked': False
-                }
-                email_subject = "CCS SBO: Signature Disapproved"
-                email_body = (
-                    f"Hello {student.get('first_name')},\n\n"
-                    "Your digital signature was DISAPPROVED by the Class President.\n"
-                    f"Reason: {reason}\n\n"
-                    "Please login and update your signature."
-                )
-
-            else:
-                flash("Invalid action.", "error")
-                return render_template('president/review_student.html', student=student)
+            update_data, email_subject, email_body = build_review_decision(
+                action, student.get('first_name'), reason, reviewer="the Class President"
+            )
 
             # ========= SAVE TO DB & SEND EMAIL =========
 
             if update_data:
                 supabase.table("profiles").update(update_data).eq("id", student_id).execute()
+                invalidate('students')
 
                 # Email the student
                 if student.get('email'):
@@ -239,6 +211,97 @@ def president_review_student(student_id):
 
     return render_template('president/review_student.html', student=student)
 
+# --- Review Queue: walk the class's pending students without reloading ---
+@president_bp.route('/review_queue')
+@president_required
+@call_budget(1)
+def president_review_queue():
+    try:
+        queue = fetch_review_queue(supabase, scope=president_queue_scope(), exclude_id=session['user_id'])
+    except Exception as e:
+        flash(f"Error loading review queue: {str(e)}", "error")
+        queue = []
+    return render_template(
+        'president/review_queue.html',
+        queue=queue,
+        queue_window=Config.REVIEW_QUEUE_PREFETCH,
+        next_url=url_for('president.president_review_queue_next'),
+        decide_url=url_for('president.president_review_queue_decide'),
+        back_url=url_for('president.president_dashboard')
+    )
+
+@president_bp.route('/review_queue/next')
+@president_required
+@call_budget(1)
+def president_review_queue_next():
+    limit = min(request.args.get('limit', Config.REVIEW_QUEUE_PREFETCH, type=int), Config.BULK_REVIEW_PAGE_SIZE)
+    try:
+        students = fetch_review_queue(
+            supabase, after=cursor_from_args(request.args), limit=limit,
+            scope=president_queue_scope(), exclude_id=session['user_id']
+        )
+        return jsonify({"success": True, "students": students, "has_more": len(students) == limit}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@president_bp.route('/review_queue/decide', methods=['POST'])
+@president_required
+def president_review_queue_decide():
+    """
+    JSON counterpart of president_review_student's POST, used by the review queue.
+    Body: {"student_ids": [id], "action": ..., "reason": ...}
+    """
+    payload = request.get_json(silent=True) or {}
+    student_ids = payload.get('student_ids') or []
+    student_id = student_ids[0] if len(student_ids) == 1 else None
+    action = payload.get('action')
+    reason = (payload.get('reason') or '').strip()
+
+    if not student_id:
+        return jsonify({"success": False, "message": "Exactly one student must be selected."}), 400
+    if student_id == session['user_id']:
+        return jsonify({"success": False, "message": "You cannot review your own profile."}), 403
+    if action not in REVIEW_ACTIONS:
+        return jsonify({"success": False, "message": "Invalid action."}), 400
+    if action.startswith('disapprove_') and not reason:
+        return jsonify({"success": False, "message": "A reason is required."}), 400
+
+    try:
+        student_res = (
+            supabase.table("profiles")
+            .select("id, first_name, last_name, email, program, year_level, section, major")
+            .eq("id", student_id)
+            .single()
+            .execute()
+        )
+        student = student_res.data
+        if not student:
+            return jsonify({"success": False, "message": "Student not found."}), 404
+        if not in_president_scope(student):
+            return jsonify({"success": False, "message": "You do not have permission to review this student."}), 403
+
+        update_data, email_subject, email_body = build_review_decision(
+            action, student.get('first_name'), reason, reviewer="the Class President"
+        )
+        supabase.table("profiles").update(update_data).eq("id", student_id).execute()
+        invalidate('students')
+
+        email_sent = False
+        if student.get('email'):
+            email_sent = send_status_email(student.get('email'), email_subject, email_body)
+
+        student_name = f"{student.get('first_name')} {student.get('last_name')}"
+        log_activity(
+            f"{action.replace('_', ' ').title()}",
+            target_user_id=student_id,
+            target_user_name=student_name,
+            details=f"Updated student status: {action}."
+        )
+        return jsonify({"success": True, "message": "Student status updated.", "updated": [student_id],
+                        "email_failed": [student['email']] if student.get('email') and not email_sent else []}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error updating student status: {str(e)}"}), 500
+
 @president_bp.route('/notify_admin', methods=['POST'])
 @president_required
 def notify_admin():
@@ -0,0 +1,296 @@
+import json
+import time
+import threading
+from collections import Counter
+from flask import g, session, request
+from config import Config
+from perf import timed
+from page_cache import last_write
+
+# Columns mirrored locally: everything the student list, printing groups, print preview and president roster read
+REPLICA_COLUMNS = (
+    'id', 'email', 'student_id', 'first_name', 'middle_name', 'suffix_name', 'last_name',
+    'program', 'year_level', 'section', 'semester', 'major', 'graduating_year', 'account_type', 'email_verified',
+    'picture_url', 'signature_url', 'picture_status', 'signature_status', 'updated_at',
+)
+# Matched (case-insensitively, anywhere) by the student list's search box
+SEARCH_COLUMNS = ('first_name', 'last_name', 'middle_name', 'student_id', 'email')
+# Indexes for the filters and sorts the routes use. Sorts put nulls last (as PostgreSQL does), so a sort index
+# starts with "<column> IS NULL"; the first index also covers the printing page's group list
+INDEXES = (
+    '"email_verified", "program", "year_level", "section", "major", "semester", "graduating_year"',
+    '"program", "year_level", "section", "major"',
+    '"last_name" IS NULL, "last_name"',
+    '"student_id" IS NULL, "student_id"',
+)
+# Rows per request while loading and polling
+PAGE_SIZE = 1000
+
+
+class ProfileReplica:
+    """
+    An in-memory SQLite copy of the REPLICA_COLUMNS of `profiles`, for the read-heavy admin and president pages.
+
+    A background thread loads the table page by page, then every PROFILE_REPLICA_POLL seconds fetches the rows
+    whose `updated_at` is at or after the high-water mark (minus PROFILE_REPLICA_OVERLAP, for transactions that
+    commit late). Deleted rows have no `updated_at` to find, so every PROFILE_REPLICA_RECONCILE seconds the ids
+    are compared with Supabase and missing ones dropped. Writes always go to Supabase.
+
+    Each server process keeps its own copy; on Vercel, where an instance is frozen between requests, leave it off.
+    """
+
+    def __init__(self):
+        self._db = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+        self.ready = False
+        self.rows = 0
+        self.high_water = None
+        # time.time() at the start of the last poll that succeeded: every change committed before it is here
+        self.synced_from = None
+        self.reconciled_at = 0
+        self.last_error = None
+        self.fallbacks = Counter()
+
+    # --- Sync ---
+
+    def start(self):
+        """
+        Starts the sync thread on first use in each server process (never in gunicorn's master).
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="profile-replica", daemon=True)
+                    self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def lag(self):
+        """
+        Seconds since the start of the last successful sync, or None before the first one.
+        """
+        return None if self.synced_from is None else time.time() - self.synced_from
+
+    def _run(self):
+        from extensions import supabase
+        while True:
+            try:
+                if not self.ready:
+                    self._bootstrap(supabase)
+                elif time.time() - self.reconciled_at > Config.PROFILE_REPLICA_RECONCILE:
+                    self._reconcile(supabase)
+                else:
+                    self._poll(supabase)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Profile replica sync failed: {e}")
+            self._wake.wait(Config.PROFILE_REPLICA_POLL)
+            self._wake.clear()
+
+    def _connect(self):
+        import sqlite3  # deferred: the replica is optional
+        db = sqlite3.connect(':memory:', check_same_thread=False)
+        columns = ", ".join(f'"{c}"' for c in REPLICA_COLUMNS if c != 'id')
+        db.execute(f'CREATE TABLE profiles ("id" TEXT PRIMARY KEY, {columns}, "_row" TEXT)')
+        for i, index in enumerate(INDEXES):
+            db.execute(f'CREATE INDEX profiles_{i} ON profiles ({index})')
+        return db
+
+    def _store(self, db, rows):
+        names = REPLICA_COLUMNS + ('_row',)
+        db.executemany(
+            f'INSERT OR REPLACE INTO profiles ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+            [tuple(row.get(c) for c in REPLICA_COLUMNS) + (json.dumps(row),) for row in rows])
+        for row in rows:
+            if row.get('updated_at') and (self.high_water is None or row['updated_at'] > self.high_water):
+                self.high_water = row['updated_at']
+
+    def _bootstrap(self, client):
+        started = time.time()
+        # Rows changed while the pages below are read are fetched again by the first poll, which starts here
+        latest = client.table("profiles").select("updated_at").order("updated_at", desc=True).limit(1).execute().data
+        start_mark = latest[0]['updated_at'] if latest else None
+
+        db, last_id, count = self._connect(), None, 0
+        while True:
+            query = client.table("profiles").select(", ".join(REPLICA_COLUMNS)).order("id").limit(PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data or []
+            self._store(db, rows)
+            count += len(rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+        # Statistics let SQLite walk a sort index for a page instead of sorting every verified student
+        db.execute("ANALYZE")
+        db.commit()
+
+        with self._lock:
+            self._db, self.rows = db, count
+            self.high_water = start_mark
+            self.synced_from, self.reconciled_at, self.ready = started, started, True
+        print(f"Profile replica loaded {count} rows in {time.time() - started:.1f}s")
+
+    def _poll(self, client):
+        started = time.time()
+        if self.high_water is None:
+            # Empty table (or no timestamps yet): nothing to resume from
+            self._bootstrap(client)
+            return
+        cursor_at = _shift(self.high_water, -Config.PROFILE_REPLICA_OVERLAP)
+        cursor_id = ''
+        while True:
+            # Keyset on (updated_at, id): one UPDATE can give thousands of rows the same timestamp
+            rows = (client.table("profiles").select(", ".join(REPLICA_COLUMNS))
+                    .or_(f'updated_at.gt."{cursor_at}",and(updated_at.eq."{cursor_at}",id.gt."{cursor_id}")')
+                    .order("updated_at").order("id").limit(PAGE_SIZE).execute().data or [])
+            if rows:
+                with self._lock:
+                    self._store(self._db, rows)
+                    self._db.commit()
+                    self.rows = self._db.execute("SELECT count(*) FROM profiles").fetchone()[0]
+            if len(rows) < PAGE_SIZE:
+                break
+            cursor_at, cursor_id = rows[-1]['updated_at'], rows[-1]['id']
+        self.synced_from = started
+
+    def _reconcile(self, client):
+        started = time.time()
+        self._poll(client)
+        ids, last_id = set(), None
+        while True:
+            query = client.table("profiles").select("id").order("id").limit(PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data or []
+            ids.update(row['id'] for row in rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+        with self._lock:
+            local = {row[0] for row in self._db.execute("SELECT id FROM profiles")}
+            gone = local - ids
+            self._db.executemany("DELETE FROM profiles WHERE id = ?", [(i,) for i in gone])
+            self._db.commit()
+            self.rows = len(local) - len(gone)
+        self.reconciled_at = started
+
+    # --- Queries ---
+
+    def _where(self, where, search):
+        clauses, params = [], []
+        for column, value in (where or {}).items():
+            _check(column)
+            if value is None:
+                clauses.append(f'"{column}" IS NULL')
+            else:
+                clauses.append(f'"{column}" = ?')
+                params.append(value)
+        if search:
+            clauses.append("(" + " OR ".join(f'"{c}" LIKE ?' for c in SEARCH_COLUMNS) + ")")
+            params.extend([f"%{search}%"] * len(SEARCH_COLUMNS))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql, params):
+        with timed('replica', 'profiles'), self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def select(self, where=None, search=None, order=(), limit=None, offset=0):
+        """
+        Profiles (dicts of REPLICA_COLUMNS) matching `where` ({column: value}, None meaning IS NULL) and `search`,
+        sorted by `order` ([(column, desc)], nulls last ascending and first descending, as in PostgreSQL).
+        """
+        sql, params = self._where(where, search)
+        terms = []
+        for column, desc in order:
+            _check(column)
+            direction = "DESC" if desc else "ASC"
+            terms.append(f'"{column}" IS NULL {direction}, "{column}" {direction}')
+        sql = "SELECT _row FROM profiles" + sql + (" ORDER BY " + ", ".join(terms) if terms else "")
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [json.loads(row[0]) for row in self._query(sql, params)]
+
+    def count(self, where=None, search=None):
+        sql, params = self._where(where, search)
+        return self._query("SELECT count(*) FROM profiles" + sql, params)[0][0]
+
+    def distinct(self, columns, where=None):
+        """
+        Each distinct combination of `columns` among the matching profiles, as dicts: filter dropdowns and groups.
+        """
+        for column in columns:
+            _check(column)
+        sql, params = self._where(where, None)
+        names = ", ".join(f'"{c}"' for c in columns)
+        return [dict(zip(columns, row)) for row in self._query(f"SELECT DISTINCT {names} FROM profiles" + sql, params)]
+
+    def status(self):
+        lag = self.lag()
+        return {
+            'enabled': Config.PROFILE_REPLICA, 'ready': self.ready, 'rows': self.rows,
+            'lag': lag, 'max_lag': Config.PROFILE_REPLICA_MAX_LAG, 'high_water': self.high_water,
+            'last_error': self.last_error, 'fallbacks': dict(self.fallbacks),
+        }
+
+
+def _check(column):
+    if column not in REPLICA_COLUMNS:
+        raise ValueError(f"Column {column!r} is not in the profile replica")
+
+
+def _shift(timestamp, seconds):
+    from datetime import datetime, timedelta
+    shifted = datetime.fromisoformat(timestamp.replace('Z', '+00:00')) + timedelta(seconds=seconds)
+    return shifted.isoformat()
+
+
+profiles_replica = ProfileReplica()
+
+
+def local_profiles():
+    """
+    The profile replica if this request may read from it, else None (read from Supabase instead):
+    when PROFILE_REPLICA is off, the replica is still loading, it lags more than PROFILE_REPLICA_MAX_LAG seconds,
+    or this user changed something after its last sync (so they always see their own writes).
+    """
+    if not Config.PROFILE_REPLICA:
+        return None
+    replica = profiles_replica
+    replica.start()
+    lag = replica.lag()
+    if not replica.ready:
+        reason = 'loading'
+    elif lag > Config.PROFILE_REPLICA_MAX_LAG:
+        reason = 'lagging'
+    elif last_write() > replica.synced_from:
+        reason = 'own_write'
+        replica.wake()
+    else:
+        g.profile_replica_lag = lag
+        return replica
+    replica.fallbacks[reason] += 1
+    return None
+
+
+def _track(response):
+    if getattr(g, 'profile_replica_lag', None) is not None:
+        response.headers['X-Profile-Replica-Lag'] = f"{g.profile_replica_lag:.1f}"
+    # Any form post may have changed a profile; the next page this user loads waits for a sync that covers it
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and session.get('user_id'):
+        profiles_replica.wake()
+    return response
+
+
+def init_profile_replica(app):
+    """
+    Reports the lag of replica reads in an X-Profile-Replica-Lag header, and syncs right after a form post.
+    """
+    if Config.PROFILE_REPLICA:
+        app.after_request(_track)
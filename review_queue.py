@@ -0,0 +1,98 @@
+from config import Config
+
+# Projection served to the review queue: enough to render and prefetch, nothing more
+QUEUE_COLUMNS = (
+    "id, first_name, middle_name, last_name, student_id, email, program, year_level, section, major, "
+    "picture_url, signature_url, picture_status, signature_status, "
+    "picture_disapproval_reason, signature_disapproval_reason"
+)
+
+# Stable walk order; 'id' is the tie-breaker so the cursor is unique
+QUEUE_ORDER = ('program', 'year_level', 'section', 'last_name', 'id')
+
+PENDING_FILTER = "picture_status.eq.pending,signature_status.eq.pending"
+
+
+def _quote(value):
+    """
+    Quotes a value for a PostgREST logic tree so commas, dots and parentheses are safe.
+    """
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{value}"'
+
+
+def cursor_from_student(student):
+    """
+    Returns the queue cursor (the QUEUE_ORDER values) for a student row.
+    """
+    return {col: student.get(col) for col in QUEUE_ORDER}
+
+
+def cursor_from_args(args):
+    """
+    Reads a cursor from request args; returns None when there is none (no after_id).
+    A missing after_<col> is a NULL value, and an empty one an empty string; both are valid cursors.
+    """
+    if args.get('after_id') is None:
+        return None
+    return {col: args.get(f'after_{col}') for col in QUEUE_ORDER}
+
+
+def _after_filter(cursor):
+    """
+    Builds the keyset condition "(program, year_level, section, last_name, id) > cursor"
+    as a PostgREST or() tree: a > x OR (a = x AND b > y) OR ...
+
+    NULL-aware to match the nulls-last order: NULL sorts after every value, so "> x" also takes NULLs,
+    "> NULL" takes nothing, and "= NULL" is "is null".
+    """
+    branches = []
+    for i, col in enumerate(QUEUE_ORDER):
+        parts = [f"{prev}.is.null" if cursor[prev] is None else f"{prev}.eq.{_quote(cursor[prev])}"
+                 for prev in QUEUE_ORDER[:i]]
+        if cursor[col] is None:
+            continue
+        parts.append(f"or({col}.gt.{_quote(cursor[col])},{col}.is.null)")
+        branches.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+    return f"or({','.join(branches)})"
+
+
+def fetch_review_queue(client, after=None, limit=None, scope=None, exclude_id=None):
+    """
+    Fetches the next pending students in queue order with a single query.
+
+    Args:
+        client: Supabase client to query with.
+        after (dict): Cursor of the last student already served, or None to start at the top.
+        limit (int): Number of students to return (defaults to the current one plus the prefetch window).
+        scope (dict): Extra equality filters, e.g. a president's class. A None value matches NULL.
+        exclude_id (str): Profile id to leave out (a president never reviews themself).
+
+    Returns:
+        list: Student rows in queue order.
+    """
+    if limit is None:
+        limit = Config.REVIEW_QUEUE_PREFETCH + 1
+
+    query = client.table("profiles").select(QUEUE_COLUMNS)
+    query = query.eq('email_verified', True)
+    query = query.not_.is_('program', 'null').not_.is_('year_level', 'null').not_.is_('section', 'null')
+
+    for col, value in (scope or {}).items():
+        if value is None:
+            query = query.is_(col, 'null')
+        else:
+            query = query.eq(col, value)
+    if exclude_id:
+        query = query.neq('id', exclude_id)
+
+    # PostgREST ANDs a single or() parameter with the other filters, so the
+    # pending check and the keyset condition are combined into one tree
+    if after:
+        query = query.or_(f"and(or({PENDING_FILTER}),{_after_filter(after)})")
+    else:
+        query = query.or_(PENDING_FILTER)
+
+    for col in QUEUE_ORDER:
+        query = query.order(col, nullsfirst=False)
+    return query.limit(limit).execute().data or []
@@ -0,0 +1,133 @@
+from datetime import datetime
+import pytz
+from config import Config
+
+# Programs whose 3rd/4th year students must pick a major (same rule as register/edit)
+MAJOR_PROGRAMS = ('BSIT', 'BSCS')
+
+
+def current_academic_year(now=None):
+    """
+    Returns the academic year label ("2025-2026") for a date; the year runs August 1 - July 31.
+    """
+    now = now or datetime.now(pytz.timezone(Config.TIMEZONE))
+    start = now.year if now.month >= 8 else now.year - 1
+    return f"{start}-{start + 1}"
+
+
+def build_rollover_plan(from_semester, graduating_year=None, unlock=True):
+    """
+    Builds the ordered list of set-based steps that close `from_semester`.
+
+    Each step is a dict with a 'label', equality filters in 'match' and the column values in 'update'.
+    Closing the 2nd semester promotes from the top year down, so no row is moved twice.
+    Raises ValueError on an unknown semester or a missing graduating year.
+    """
+    lock = {"is_locked": False} if unlock else {}
+
+    if from_semester == '1st':
+        return [{
+            'label': "1st Sem -> 2nd Sem (all year levels)",
+            'match': {'semester': '1st'},
+            'exclude_graduates': True,
+            'update': {"semester": "2nd", **lock},
+        }]
+
+    if from_semester != '2nd':
+        raise ValueError("Semester to close must be '1st' or '2nd'.")
+    if not graduating_year:
+        raise ValueError("Graduating academic year is required when closing the 2nd semester.")
+
+    return [
+        {
+            'label': "4th Year -> Graduate",
+            'match': {'semester': '2nd', 'year_level': '4th Year'},
+            'update': {"year_level": "Graduate", "semester": "1st", "major": None,
+                       "graduating_year": graduating_year, **lock},
+        },
+        {
+            'label': "3rd Year -> 4th Year",
+            'match': {'semester': '2nd', 'year_level': '3rd Year'},
+            'update': {"year_level": "4th Year", "semester": "1st", "graduating_year": None, **lock},
+        },
+        {
+            # Majors are cleared; BSIT/BSCS students are unlocked below so they can pick one
+            'label': "2nd Year -> 3rd Year",
+            'match': {'semester': '2nd', 'year_level': '2nd Year'},
+            'update': {"year_level": "3rd Year", "semester": "1st", "major": None,
+                       "graduating_year": None, **lock},
+            'needs_major': True,
+        },
+        {
+            'label': "1st Year -> 2nd Year",
+            'match': {'semester': '2nd', 'year_level': '1st Year'},
+            'update': {"year_level": "2nd Year", "semester": "1st", "major": None,
+                       "graduating_year": None, **lock},
+        },
+    ]
+
+
+def _apply_filters(query, step):
+    # Admin accounts are never rolled over (same rule as lock_all_students)
+    query = query.neq("account_type", "admin")
+    for col, value in step['match'].items():
+        query = query.eq(col, value)
+    if step.get('exclude_graduates'):
+        query = query.neq("year_level", "Graduate")
+    return query
+
+
+def preview_rollover(client, plan):
+    """
+    Dry run: counts the rows each step would move, without writing anything.
+    Returns a list of {'label', 'count', 'changes', 'needs_major'} dicts.
+    """
+    diff = []
+    for step in plan:
+        query = _apply_filters(client.table("profiles").select("id", count='exact', head=True), step)
+        count = query.execute().count or 0
+
+        needs_major = 0
+        if step.get('needs_major') and count:
+            major_query = _apply_filters(client.table("profiles").select("id", count='exact', head=True), step)
+            needs_major = major_query.in_("program", list(MAJOR_PROGRAMS)).execute().count or 0
+
+        diff.append({'label': step['label'], 'count': count, 'changes': step['update'], 'needs_major': needs_major})
+    return diff
+
+
+def apply_rollover(client, plan):
+    """
+    Runs each step as one UPDATE ... WHERE over the profiles table.
+    Returns a list of {'label', 'count', 'needs_major'} dicts with the rows actually moved.
+    """
+    results = []
+    for step in plan:
+        res = _apply_filters(client.table("profiles").update(step['update']), step).execute()
+        count = len(res.data or [])
+
+        needs_major = 0
+        if step.get('needs_major') and res.data:
+            needs_major = sum(1 for row in res.data if row.get('program') in MAJOR_PROGRAMS)
+            if needs_major and 'is_locked' not in step['update']:
+                # Students who must now choose a major cannot stay locked
+                moved_ids = [row['id'] for row in res.data if row.get('program') in MAJOR_PROGRAMS]
+                client.table("profiles").update({"is_locked": False}).in_("id", moved_ids).execute()
+
+        results.append({'label': step['label'], 'count': count, 'needs_major': needs_major})
+    return results
+
+
+def summarize_rollover(from_semester, results, graduating_year=None):
+    """
+    One-line audit summary for the activity log.
+    """
+    moved = ", ".join(f"{r['label']}: {r['count']}" for r in results)
+    total = sum(r['count'] for r in results)
+    needs_major = sum(r.get('needs_major', 0) for r in results)
+    summary = f"Closed {from_semester} semester; {total} students moved ({moved})."
+    if graduating_year and from_semester == '2nd':
+        summary += f" Graduating year set to {graduating_year}."
+    if needs_major:
+        summary += f" {needs_major} BSIT/BSCS students must now select a major."
+    return summary
@@ -3,6 +3,8 @@
  * 1. Prevents double-submission.
  * 2. Shows a spinner for standard forms.
  * 3. Shows a PROGRESS BAR for forms with file uploads.
+ * 4. For forms with data-direct-upload="<sign url>", sends files straight to storage
+ *    through signed URLs and posts only their upload ids to the server.
  */
 
 document.addEventListener('DOMContentLoaded', function() {
@@ -55,6 +57,9 @@ document.addEventListener('DOMContentLoaded', function() {
         form.addEventListener('submit', function(event) {
             const submitter = event.submitter;
 
+            // Another handler (e.g. client-side validation) already stopped this submit
+            if (event.defaultPrevented) return;
+
             // Only proceed if a submit button triggered the event
             if (submitter && submitter.tagName === 'BUTTON' && submitter.type === 'submit') {
                 event.preventDefault(); // Stop standard submit immediately
@@ -70,7 +75,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Check if form has files
                 const hasFiles = form.querySelector('input[type="file"]');
 
-                if (hasFiles) {
+                if (hasFiles && form.hasAttribute('data-direct-upload')) {
+                    // === SCENARIO A0: FILES STRAIGHT TO STORAGE, THEN A SMALL FORM POST ===
+                    handleDirectUpload(form, submitter);
+                } else if (hasFiles) {
                     // === SCENARIO A: AJAX UPLOAD WITH PROGRESS BAR ===
                     handleFileUpload(form, submitter);
                 } else {
@@ -96,6 +104,85 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    function handleDirectUpload(form, submitter) {
+        const modal = document.getElementById('upload-progress-modal');
+        const fill = document.getElementById('progress-bar-fill');
+        const text = document.getElementById('progress-text');
+        const percent = document.getElementById('progress-percent');
+        const target = form.dataset.uploadTarget || null;
+        const inputs = Array.from(form.querySelectorAll('input[type="file"]')).filter(input => input.files.length);
+        const total = inputs.reduce((sum, input) => sum + input.files[0].size, 0) || 1;
+        let sent = 0;
+
+        modal.style.display = 'flex';
+
+        function fail(message) {
+            alert(message);
+            modal.style.display = 'none';
+            inputs.forEach(input => input.disabled = false);
+            form.querySelectorAll('input[data-direct-upload-id]').forEach(input => input.remove());
+            form.querySelectorAll('button').forEach(btn => { btn.disabled = false; btn.style.opacity = ''; btn.style.cursor = ''; });
+        }
+
+        function sign(input) {
+            const file = input.files[0];
+            return fetch(form.dataset.directUpload, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ kind: input.name, content_type: file.type, size: file.size, target: target })
+            }).then(response => response.json().then(data => ({ status: response.status, data: data })));
+        }
+
+        function put(signedUrl, file) {
+            return new Promise(function (resolve, reject) {
+                const xhr = new XMLHttpRequest();
+                xhr.open('PUT', signedUrl, true);
+                xhr.setRequestHeader('Content-Type', file.type);
+                xhr.upload.onprogress = function (e) {
+                    if (e.lengthComputable) {
+                        const percentComplete = Math.round(((sent + e.loaded) / total) * 100);
+                        fill.style.width = percentComplete + '%';
+                        percent.textContent = percentComplete + '%';
+                        text.textContent = "Uploading...";
+                    }
+                };
+                xhr.onload = () => (xhr.status >= 200 && xhr.status < 300) ? resolve() : reject();
+                xhr.onerror = reject;
+                xhr.send(file);
+            });
+        }
+
+        // Files go one at a time; the form itself is posted once every file is in storage
+        let chain = Promise.resolve(true);
+        inputs.forEach(function (input) {
+            chain = chain.then(function (ok) {
+                if (!ok) return false;
+                return sign(input).then(function (res) {
+                    if (res.status === 404) return false; // Direct uploads disabled: send the files with the form
+                    if (!res.data.success) throw new Error(res.data.message);
+                    return put(res.data.signed_url, input.files[0]).then(function () {
+                        sent += input.files[0].size;
+                        const hidden = document.createElement('input');
+                        hidden.type = 'hidden';
+                        hidden.name = input.name + '_upload';
+                        hidden.value = res.data.job_id;
+                        hidden.setAttribute('data-direct-upload-id', '');
+                        form.appendChild(hidden);
+                        input.disabled = true; // Disabled inputs are left out of the form post
+                        return true;
+                    }, function () { throw new Error('Upload failed. Please try again.'); });
+                });
+            });
+        });
+
+        chain.then(function () {
+            text.textContent = "Saving...";
+            handleFileUpload(form, submitter);
+        }).catch(function (err) {
+            fail(err.message || 'Upload failed. Please try again.');
+        });
+    }
+
     function handleFileUpload(form, submitter) {
         // Show Modal
         const modal = document.getElementById('upload-progress-modal');
@@ -0,0 +1,158 @@
+/**
+ * review_queue.js
+ * 1. Shows the current student from a locally buffered queue.
+ * 2. Prefetches images for the next students (<link rel="prefetch">).
+ * 3. Submits decisions with fetch() and advances without reloading the page.
+ * 4. Refills the buffer from the server using the last student as a cursor.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const root = document.getElementById('reviewQueue');
+    if (!root) return;
+
+    const nextUrl = root.dataset.nextUrl;
+    const decideUrl = root.dataset.decideUrl;
+    const windowSize = parseInt(root.dataset.window, 10) || 5;
+    const ORDER = ['program', 'year_level', 'section', 'last_name', 'id'];
+
+    let buffer = JSON.parse(document.getElementById('rqData').textContent || '[]');
+    let lastCursor = buffer.length ? buffer[buffer.length - 1] : null;
+    let exhausted = buffer.length < windowSize + 1;
+    let loading = false;
+    let busy = false;
+    let reviewed = 0;
+    const prefetched = new Set();
+
+    // Links rendered server-side already count as prefetched
+    document.querySelectorAll('link[rel="prefetch"]').forEach(function(link) {
+        prefetched.add(link.href);
+    });
+
+    const STATUS_CLASSES = {
+        approved: 'bg-green-100 text-green-800',
+        pending: 'bg-yellow-100 text-yellow-800',
+        disapproved: 'bg-red-100 text-red-800'
+    };
+
+    function prefetch(url) {
+        if (!url || prefetched.has(url)) return;
+        const link = document.createElement('link');
+        link.rel = 'prefetch';
+        link.as = 'image';
+        link.href = url;
+        document.head.appendChild(link);
+        prefetched.add(url);
+    }
+
+    function setStatus(field, status) {
+        const badge = document.getElementById('rq_' + field + '_status');
+        badge.className = 'font-bold px-3 py-1 rounded-full text-sm ' + (STATUS_CLASSES[status] || STATUS_CLASSES.disapproved);
+        badge.textContent = status ? status.charAt(0).toUpperCase() + status.slice(1) : 'N/A';
+    }
+
+    function showMessage(text, ok) {
+        const box = document.getElementById('rqMessage');
+        box.textContent = text;
+        box.className = 'mb-6 px-4 py-3 rounded-lg ' + (ok ? 'bg-green-100 border border-green-400 text-green-700' : 'bg-red-100 border border-red-400 text-red-700');
+        box.style.display = text ? 'block' : 'none';
+    }
+
+    function render() {
+        const student = buffer[0];
+        document.getElementById('rqPanel').style.display = student ? 'block' : 'none';
+        document.getElementById('rqEmpty').style.display = student ? 'none' : 'block';
+        if (!student) return;
+
+        const name = [student.first_name, student.middle_name, student.last_name].filter(Boolean).join(' ');
+        document.getElementById('rqName').textContent = name;
+        document.getElementById('rqStudentId').textContent = student.student_id || '';
+        document.getElementById('rqCourse').textContent =
+            student.program + ' - ' + student.year_level + ' ' + student.section + (student.major ? ' (' + student.major + ')' : '');
+        document.getElementById('rq_picture_img').src = student.picture_url || 'https://placehold.co/150x150/e2e8f0/718096?text=No+Image';
+        document.getElementById('rq_signature_img').src = student.signature_url || 'https://placehold.co/300x150/e2e8f0/718096?text=No+Signature';
+        document.getElementById('rq_picture_reason').value = student.picture_disapproval_reason || '';
+        document.getElementById('rq_signature_reason').value = student.signature_disapproval_reason || '';
+        setStatus('picture', student.picture_status);
+        setStatus('signature', student.signature_status);
+
+        buffer.slice(1).forEach(function(s) {
+            prefetch(s.picture_url);
+            prefetch(s.signature_url);
+        });
+    }
+
+    function refill() {
+        if (loading || exhausted || !lastCursor || buffer.length > windowSize) return;
+        loading = true;
+        const params = new URLSearchParams({ limit: windowSize });
+        // A NULL column is sent as a missing parameter, which the server reads back as NULL
+        ORDER.forEach(function(col) {
+            if (lastCursor[col] !== null && lastCursor[col] !== undefined) params.append('after_' + col, lastCursor[col]);
+        });
+
+        fetch(nextUrl + '?' + params.toString(), { credentials: 'same-origin' })
+            .then(function(res) { return res.json(); })
+            .then(function(data) {
+                if (!data.success) throw new Error(data.error || 'Failed to load queue.');
+                const known = new Set(buffer.map(function(s) { return s.id; }));
+                data.students.forEach(function(s) { if (!known.has(s.id)) buffer.push(s); });
+                if (data.students.length) lastCursor = data.students[data.students.length - 1];
+                exhausted = !data.has_more;
+                render();
+            })
+            .catch(function(err) { showMessage(err.message, false); })
+            .finally(function() { loading = false; });
+    }
+
+    function advance() {
+        buffer.shift();
+        showMessage('', true);
+        render();
+        refill();
+    }
+
+    function decide(action) {
+        const student = buffer[0];
+        if (!student || busy) return;
+        const field = action.split('_')[1];
+        const reason = document.getElementById('rq_' + field + '_reason').value.trim();
+        if (action.indexOf('disapprove_') === 0 && !reason) {
+            showMessage('A reason is required.', false);
+            return;
+        }
+
+        busy = true;
+        fetch(decideUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ student_ids: [student.id], action: action, reason: reason })
+        })
+            .then(function(res) { return res.json(); })
+            .then(function(data) {
+                if (!data.success) throw new Error(data.message || 'Update failed.');
+                student[field + '_status'] = action.indexOf('disapprove_') === 0 ? 'disapproved' : 'approved';
+                student[field + '_disapproval_reason'] = action.indexOf('disapprove_') === 0 ? reason : null;
+                reviewed++;
+                document.getElementById('rqReviewed').textContent = reviewed;
+
+                // Move on once nothing is left pending for this student
+                if (student.picture_status !== 'pending' && student.signature_status !== 'pending') {
+                    advance();
+                } else {
+                    setStatus(field, student[field + '_status']);
+                    showMessage(data.message, true);
+                }
+            })
+            .catch(function(err) { showMessage(err.message, false); })
+            .finally(function() { busy = false; });
+    }
+
+    document.querySelectorAll('.rq-action').forEach(function(btn) {
+        btn.addEventListener('click', function() { decide(btn.dataset.action); });
+    });
+    document.getElementById('rqSkip').addEventListener('click', advance);
+
+    render();
+    refill();
+});
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, timezone
+from config import Config
+from utils import storage_filename
+
+# Buckets scanned by the collector
+GC_BUCKETS = ('pictures', 'signatures', 'archive')
+
+# Page sizes for storage listings, table scans and remove() batches
+LIST_PAGE_SIZE = 1000
+TABLE_PAGE_SIZE = 1000
+REMOVE_BATCH_SIZE = 100
+
+
+def list_bucket(client, bucket, prefix=''):
+    """
+    Yields every object in a bucket as (path, size, updated_at), paging through listings and descending into folders.
+    Folders come back from the listing API as entries without an id.
+    """
+    offset = 0
+    while True:
+        entries = client.storage.from_(bucket).list(prefix or None, {"limit": LIST_PAGE_SIZE, "offset": offset}) or []
+        for entry in entries:
+            path = f"{prefix}/{entry['name']}" if prefix else entry['name']
+            if entry.get('id') is None:
+                yield from list_bucket(client, bucket, path)
+            else:
+                metadata = entry.get('metadata') or {}
+                yield path, metadata.get('size') or 0, entry.get('updated_at') or entry.get('created_at')
+        if len(entries) < LIST_PAGE_SIZE:
+            break
+        offset += LIST_PAGE_SIZE
+
+
+def _object_path(url, bucket):
+    """
+    Path inside `bucket` referenced by a public URL, or None if the URL points elsewhere.
+    """
+    marker = f"/object/public/{bucket}/"
+    if not url or marker not in url:
+        return None
+    return url.split(marker, 1)[1].split('?')[0]
+
+
+def scan_table(client, table, columns, filters=None):
+    """
+    Yields every row of `table` matching `filters` ({column: value}) in keyset pages on id (`columns` must include it).
+    Offset pages without an order can overlap or skip rows, since PostgreSQL keeps no row order between requests.
+    """
+    last_id = None
+    while True:
+        query = client.table(table).select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        query = query.order("id").limit(TABLE_PAGE_SIZE)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data or []
+        yield from rows
+        if len(rows) < TABLE_PAGE_SIZE:
+            break
+        last_id = rows[-1]['id']
+
+
+def _scan_counted(client, table, columns, verify):
+    """
+    scan_table over a whole table. With `verify`, raises when fewer rows came back than the table held before
+    the scan (e.g. a max-rows setting below TABLE_PAGE_SIZE ending it early), since a missed row would make
+    the objects it references look like orphans.
+    """
+    expected = client.table(table).select("id", count='exact', head=True).execute().count if verify else None
+    rows = list(scan_table(client, table, columns))
+    if expected is not None and len(rows) < expected:
+        raise RuntimeError(f"Read {len(rows)} of {expected} {table} rows; refusing to delete.")
+    return rows
+
+
+def referenced_paths(client, verify=False):
+    """
+    Object paths still referenced, per bucket: profile pictures/signatures, every image in archived_groups
+    (including the live picture/signature a member falls back to when their image could not be archived).
+    With `verify`, raises unless every row of both tables was read (see _scan_counted).
+    """
+    refs = {bucket: set() for bucket in GC_BUCKETS}
+    for row in _scan_counted(client, "profiles", "id, picture_url, signature_url", verify):
+        if row.get('picture_url'):
+            refs['pictures'].add(storage_filename(row['picture_url']))
+        if row.get('signature_url'):
+            refs['signatures'].add(storage_filename(row['signature_url']))
+
+    for row in _scan_counted(client, "archived_groups", "id, student_data", verify):
+        for member in row.get('student_data') or []:
+            for key, live_bucket in (('picture_url', 'pictures'), ('signature_url', 'signatures')):
+                for bucket in ('archive', live_bucket):
+                    path = _object_path(member.get(key), bucket)
+                    if path:
+                        refs[bucket].add(path)
+    return refs
+
+
+def _is_recent(updated_at, cutoff):
+    # Unknown timestamps are treated as recent, so they are never collected by mistake
+    if not updated_at:
+        return True
+    try:
+        return datetime.fromisoformat(updated_at.replace('Z', '+00:00')) > cutoff
+    except ValueError:
+        return True
+
+
+def collect_garbage(client, dry_run=True, min_age_hours=None, buckets=GC_BUCKETS):
+    """
+    Finds objects no profile or archive references and (unless dry_run) removes them in batches.
+
+    Objects younger than `min_age_hours` are kept: they may belong to an upload whose profile row is not saved yet.
+    Removed archive objects are also dropped from archive_objects so they are not reused.
+    Returns {bucket: {'scanned', 'orphans', 'orphan_bytes', 'removed', 'errors', 'sample'}}.
+    """
+    min_age_hours = Config.STORAGE_GC_MIN_AGE_HOURS if min_age_hours is None else min_age_hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+    refs = referenced_paths(client, verify=not dry_run)
+    if not dry_run and not any(refs.values()):
+        # An empty reference set almost always means the tables could not be read (e.g. RLS), not an empty system
+        raise RuntimeError("No referenced objects found; refusing to delete. Check the service key.")
+    # Assets no table points at, such as the logo in every status email
+    for kept in Config.STORAGE_GC_KEEP:
+        bucket, _, path = kept.partition('/')
+        refs.setdefault(bucket, set()).add(path)
+
+    report = {}
+    for bucket in buckets:
+        stats = {'scanned': 0, 'scanned_bytes': 0, 'orphans': 0, 'orphan_bytes': 0, 'removed': 0, 'errors': 0, 'sample': []}
+        orphans = []
+        for path, size, updated_at in list_bucket(client, bucket):
+            stats['scanned'] += 1
+            stats['scanned_bytes'] += size
+            if path in refs[bucket] or _is_recent(updated_at, cutoff):
+                continue
+            orphans.append(path)
+            stats['orphan_bytes'] += size
+        stats['orphans'] = len(orphans)
+        stats['sample'] = orphans[:10]
+
+        if not dry_run:
+            for i in range(0, len(orphans), REMOVE_BATCH_SIZE):
+                batch = orphans[i:i + REMOVE_BATCH_SIZE]
+                try:
+                    client.storage.from_(bucket).remove(batch)
+                    stats['removed'] += len(batch)
+                    if bucket == 'archive':
+                        client.table("archive_objects").delete().in_("path", batch).execute()
+                except Exception as e:
+                    stats['errors'] += 1
+                    print(f"Error removing {len(batch)} objects from {bucket}: {e}")
+        report[bucket] = stats
+    return report
+
+
+def format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.1f} {unit}" if unit != 'B' else f"{num_bytes} B"
+        num_bytes /= 1024.0
+
+
+def summarize_gc(report, dry_run):
+    """
+    One-line audit summary for the activity log.
+    """
+    parts = []
+    for bucket, stats in report.items():
+        done = f"{stats['orphans']} orphans" if dry_run else f"{stats['removed']}/{stats['orphans']} orphans removed"
+        parts.append(f"{bucket}: {stats['scanned']} objects, {done} ({format_size(stats['orphan_bytes'])})")
+    total = sum(stats['orphan_bytes'] for stats in report.values())
+    prefix = "Storage GC dry run" if dry_run else "Storage GC"
+    return f"{prefix}: " + "; ".join(parts) + f". {'Reclaimable' if dry_run else 'Reclaimed'}: {format_size(total)}."
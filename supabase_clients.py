@@ -0,0 +1,223 @@
+import time
+import random
+import threading
+import httpx
+from supabase import create_client
+from supabase.lib.client_options import SyncClientOptions
+from config import Config
+from perf import record_http, record_coalesced
+
+# Requests that are safe to send twice; PostgREST selects and storage downloads/lists (GET) are among them
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+RETRY_STATUSES = (502, 503, 504)
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    Retries idempotent requests that failed with a timeout, a dropped connection or a 502/503/504,
+    waiting base * 2^attempt with full jitter so retries from many workers do not arrive together.
+    Writes are never retried here: a timed-out insert may already have been applied.
+    """
+
+    def __init__(self, transport, retries, backoff):
+        self._transport = transport
+        self._retries = retries
+        self._backoff = backoff
+
+    def handle_request(self, request):
+        attempt = 0
+        while True:
+            retryable = request.method in IDEMPOTENT_METHODS and attempt < self._retries
+            try:
+                response = self._transport.handle_request(request)
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError):
+                if not retryable:
+                    raise
+            else:
+                if not (retryable and response.status_code in RETRY_STATUSES):
+                    return response
+                response.close()
+            time.sleep(random.uniform(0, self._backoff * (2 ** attempt)))
+            attempt += 1
+
+    def close(self):
+        self._transport.close()
+
+
+class _SharedRead:
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.started = time.monotonic()
+        self.result = None   # (status, headers, raw body)
+        self.error = None
+
+    def response(self, request):
+        status, headers, body = self.result
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+
+class CoalescingTransport(httpx.BaseTransport):
+    """
+    Lets identical concurrent PostgREST reads share one upstream call (singleflight): while a GET/HEAD is in
+    flight, requests with the same URL (table, filters, projection, order, range) and the same headers (so the
+    same key/token and Prefer) wait for it and get a copy of its response, or its exception.
+    Only requests that overlap are shared; nothing is kept once the call completes.
+
+    A read never joins a call that started before a write to its table (or any RPC, which may write anything)
+    finished: whoever saw that write complete, e.g. the page a form redirects to, must not get older data.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        # Table name (or '*' for RPCs) -> time.monotonic() when the last write to it completed
+        self._written = {}
+
+    def handle_request(self, request):
+        path = request.url.path
+        if not path.startswith('/rest/v1/'):
+            return self._transport.handle_request(request)
+        table = path.split('/')[3] if path.count('/') >= 3 else ''
+        if table == 'rpc' or request.method not in IDEMPOTENT_METHODS:
+            try:
+                return self._transport.handle_request(request)
+            finally:
+                with self._lock:
+                    self._written['*' if table == 'rpc' else table] = time.monotonic()
+        key = (request.method, str(request.url), tuple(sorted(request.headers.multi_items())))
+        with self._lock:
+            shared = self._in_flight.get(key)
+            written = max(self._written.get(table, 0), self._written.get('*', 0))
+            if shared is not None and shared.started < written:
+                shared = None  # started before a write this caller may have seen; read afresh
+            leader = shared is None
+            if leader:
+                shared = _SharedRead()
+                # A newer call takes over the key; the older one finishes for its own callers only
+                self._in_flight[key] = shared
+            else:
+                shared.followers += 1
+        if not leader:
+            shared.done.wait()
+            if shared.error is not None:
+                raise shared.error
+            return shared.response(request)
+
+        try:
+            response = self._transport.handle_request(request)
+            try:
+                # Raw (still encoded) bytes, so every copy decodes them as the original would have been
+                shared.result = (response.status_code, response.headers.multi_items(), b"".join(response.stream))
+            finally:
+                response.close()
+        except Exception as e:
+            shared.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is shared:
+                    del self._in_flight[key]
+            shared.done.set()
+            if shared.followers:
+                record_coalesced(request.method, str(request.url), shared.followers)
+        return shared.response(request)
+
+    def close(self):
+        self._transport.close()
+
+
+class _TimedStream(httpx.SyncByteStream):
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._on_close()
+
+
+class TimingTransport(httpx.BaseTransport):
+    """
+    Reports every Supabase call (table, RPC, storage, auth) to perf, from sending the request until its
+    body has been read, retries included.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    def handle_request(self, request):
+        started = time.perf_counter()
+        method, url = request.method, str(request.url)
+        try:
+            response = self._transport.handle_request(request)
+        except Exception:
+            record_http(method, url, time.perf_counter() - started)
+            raise
+        if isinstance(response.stream, httpx.ByteStream):
+            # Body already in memory (nothing left to read)
+            record_http(method, url, time.perf_counter() - started)
+            return response
+        done = []
+
+        def finished():
+            if not done:
+                done.append(True)
+                record_http(method, url, time.perf_counter() - started)
+        response.stream = _TimedStream(response.stream, finished)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+def build_http_client(transport=None):
+    """
+    One pooled keep-alive HTTP client (HTTP/2 when the server offers it) shared by every Supabase client,
+    so PostgREST, Storage and Auth calls reuse connections instead of opening new TLS sessions.
+    `transport` replaces the network transport (the benchmarks pass the in-memory stand-in, bench/standin.py).
+    """
+    transport = transport or httpx.HTTPTransport(
+        http2=Config.SUPABASE_HTTP2,
+        limits=httpx.Limits(
+            max_connections=Config.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=Config.SUPABASE_KEEPALIVE_EXPIRY
+        ),
+        retries=1  # reconnect once when a pooled connection turns out to be closed
+    )
+    transport = RetryTransport(transport, Config.SUPABASE_READ_RETRIES, Config.SUPABASE_RETRY_BACKOFF)
+    if Config.SUPABASE_COALESCE_READS:
+        transport = CoalescingTransport(transport)
+    return httpx.Client(
+        transport=TimingTransport(transport),
+        timeout=httpx.Timeout(Config.SUPABASE_READ_TIMEOUT, connect=Config.SUPABASE_CONNECT_TIMEOUT),
+        follow_redirects=True
+    )
+
+
+http_client = build_http_client()
+
+
+def build_client(key, **options):
+    """
+    A Supabase client on the shared connection pool. Sessions are never persisted or refreshed:
+    the app keeps tokens in the Flask session, not on the client.
+    """
+    options.setdefault('auto_refresh_token', False)
+    options.setdefault('persist_session', False)
+    return create_client(Config.SUPABASE_URL, key, options=SyncClientOptions(httpx_client=http_client, **options))
+
+
+def open_connections():
+    """
+    Opens a pooled connection to the project (the auth health endpoint is cheap and needs only the anon key),
+    so the first real query skips DNS, TCP and TLS setup.
+    """
+    http_client.get(f"{Config.SUPABASE_URL}/auth/v1/health", headers={"apikey": Config.SUPABASE_KEY})
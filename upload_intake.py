@@ -0,0 +1,139 @@
+import io
+import tempfile
+from flask import Request, request, flash, redirect, url_for, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from config import Config
+
+# Read size for hashing and copying uploads
+CHUNK_SIZE = 64 * 1024
+
+
+class CappedSpooledFile(io.RawIOBase):
+    """
+    Destination for one uploaded file while the multipart body is parsed.
+    Kept in memory up to Config.UPLOAD_SPOOL_THRESHOLD, then moved to a named temporary file.
+    Writing more than Config.MAX_FILE_SIZE raises 413 at once, so an oversized part is never read to the end.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._file = io.BytesIO()
+        self._size = 0
+        self.name = None  # path on disk once spooled
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        self._size += len(data)
+        if self._size > Config.MAX_FILE_SIZE:
+            raise RequestEntityTooLarge(f"Each file must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB.")
+        if self.name is None and self._size > Config.UPLOAD_SPOOL_THRESHOLD:
+            spooled = tempfile.NamedTemporaryFile(prefix="upload-")
+            spooled.write(self._file.getvalue())
+            self._file = spooled
+            self.name = spooled.name
+        return self._file.write(data)
+
+    def readinto(self, buffer):
+        data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class UploadRequest(Request):
+    """
+    Request class whose multipart file parts go to CappedSpooledFile instead of Werkzeug's default stream.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return CappedSpooledFile()
+
+
+def upload_size(file_storage):
+    """
+    Size in bytes of an uploaded file, without reading it.
+    """
+    stream = file_storage.stream
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def read_head(file_storage, length):
+    """
+    First `length` bytes of an upload (e.g. magic bytes), leaving the stream rewound.
+    """
+    stream = file_storage.stream
+    stream.seek(0)
+    head = stream.read(length)
+    stream.seek(0)
+    return head
+
+
+def rewound(file_storage):
+    """
+    The upload's stream positioned at the start, for validators that read it (e.g. PIL).
+    """
+    file_storage.stream.seek(0)
+    return file_storage.stream
+
+
+def upload_body(file_storage):
+    """
+    What to hand the Supabase upload: the temp file path for spooled uploads (storage3 streams it from disk),
+    otherwise the small in-memory bytes.
+    """
+    stream = rewound(file_storage)
+    path = getattr(stream, 'name', None)
+    if isinstance(stream, CappedSpooledFile) and path:
+        stream.flush()
+        return path
+    return stream.read()
+
+
+def _too_large(error):
+    message = f"Upload too large. Each file must be less than {Config.MAX_FILE_SIZE // 1024 // 1024}MB."
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        return jsonify({"success": False, "message": message}), 413
+    flash(message, "error")
+    target = request.referrer or ''
+    if not target.startswith(request.host_url):
+        target = url_for('core.index')
+    return redirect(target)
+
+
+def init_upload_intake(app):
+    """
+    Installs the capped request class, parses multipart bodies before the view runs
+    (so a 413 reaches the handler below instead of a view's generic except) and registers that handler.
+    """
+    app.request_class = UploadRequest
+
+    @app.before_request
+    def _parse_uploads():
+        if request.method == 'POST' and request.mimetype == 'multipart/form-data':
+            request.files
+
+    app.register_error_handler(RequestEntityTooLarge, _too_large)
@@ -1,12 +1,13 @@
 import os
 import io
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import hashlib
 from flask import session, redirect, url_for, flash, current_app
 from functools import wraps
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+from perf import timed
+from image_optimizer import has_transparency
+import image_worker
 from datetime import datetime # Added for the copyright year in the email footer
 
 # --- Decorators for Role-Based Access ---
@@ -57,27 +58,286 @@ def inject_user_roles():
     return dict(is_admin=is_admin, is_president=is_president)
 
 
+# --- Review Decisions (shared by admin and president review, single and bulk) ---
+REVIEW_ACTIONS = ('approve_picture', 'approve_signature', 'disapprove_picture', 'disapprove_signature')
+
+def build_review_decision(action, first_name, reason=None, reviewer="the Admin"):
+    """
+    Returns (update_data, email_subject, email_body) for a review action.
+    Disapprovals require a non-empty reason; returns (None, None, None) when the action is invalid.
+    """
+    if action == 'approve_picture':
+        update_data = {
+            'picture_status': 'approved',
+            'picture_disapproval_reason': None,
+            'is_locked': True
+        }
+        email_subject = "CCS SBO: Picture Approved"
+        email_body = (
+            f"Hello {first_name},\n\n"
+            f"Your profile picture has been APPROVED by {reviewer}."
+        )
+    elif action == 'approve_signature':
+        update_data = {
+            'signature_status': 'approved',
+            'signature_disapproval_reason': None,
+            'is_locked': True
+        }
+        email_subject = "CCS SBO: Signature Approved"
+        email_body = (
+            f"Hello {first_name},\n\n"
+            f"Your digital signature has been APPROVED by {reviewer}."
+        )
+    elif action == 'disapprove_picture' and reason:
+        update_data = {
+            'picture_status': 'disapproved',
+            'picture_disapproval_reason': reason,
+            'is_locked': False
+        }
+        email_subject = "CCS SBO: Picture Disapproved"
+        email_body = (
+            f"Hello {first_name},\n\n"
+            f"Your profile picture was DISAPPROVED by {reviewer}.\nReason: {reason}\n\n"
+            "Please login and update your picture."
+        )
+    elif action == 'disapprove_signature' and reason:
+        update_data = {
+            'signature_status': 'disapproved',
+            'signature_disapproval_reason': reason,
+            'is_locked': False
+        }
+        email_subject = "CCS SBO: Signature Disapproved"
+        email_body = (
+            f"Hello {first_name},\n\n"
+            f"Your digital signature was DISAPPROVED by {reviewer}.\nReason: {reason}\n\n"
+            "Please login and update your signature."
+        )
+    else:
+        return None, None, None
+    return update_data, email_subject, email_body
+
+
 # --- Helper Function to Check PNG Transparency ---
 def check_transparency(file_stream):
     """
     Checks if a PNG image stream has at least one non-opaque pixel.
+    The image is decoded on the image worker pool; raises ImageWorkerError (a 503) when the pool is saturated.
+    """
+    return image_worker.run(has_transparency, file_stream.read())
+
+# --- Helper Function for Upload Change Detection ---
+def content_hash(file_bytes):
+    """
+    SHA-256 hex digest of an uploaded file. Stored on the profile (picture_hash / signature_hash)
+    so re-submitting identical bytes can skip the upload and keep the current review status.
+    Accepts bytes or a file-like object, which is hashed in chunks from the start and left rewound.
+    """
+    if not hasattr(file_bytes, 'read'):
+        return hashlib.sha256(file_bytes).hexdigest()
+    digest = hashlib.sha256()
+    file_bytes.seek(0)
+    for chunk in iter(lambda: file_bytes.read(64 * 1024), b''):
+        digest.update(chunk)
+    file_bytes.seek(0)
+    return digest.hexdigest()
+
+# --- Helpers for Versioned Storage Keys ---
+# Object names include the content hash, so a URL always points at the same bytes and can be cached for a year.
+_cleanup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="storage-cleanup")
+
+def versioned_filename(student_id, kind, file_hash, ext):
+    """
+    Storage key for an upload, e.g. "0123_picture_1a2b3c4d5e6f7a8b.jpg".
+    """
+    return f"{student_id}_{kind}_{file_hash[:16]}{ext.lower()}"
+
+def storage_filename(url):
+    """
+    Object name (at the bucket root) referenced by a public URL.
+    """
+    return url.split('/')[-1].split('?')[0] if url else None
+
+def upload_options(content_type):
     """
+    File options for versioned uploads: long-lived caching, since the key changes whenever the bytes do.
+    """
+    return {"content-type": content_type, "cache-control": str(Config.IMAGE_CACHE_MAX_AGE), "upsert": "true"}
+
+def remove_superseded(client, bucket, old_url, new_url):
+    """
+    Deletes the object behind old_url in the background once the profile points at new_url.
+    Anything missed here (e.g. the process exits first) is left for the storage GC.
+    """
+    old_name, new_name = storage_filename(old_url), storage_filename(new_url)
+    if not old_name or not new_name or old_name == new_name:
+        return
+
+    def _remove():
+        try:
+            client.storage.from_(bucket).remove([old_name])
+        except Exception as e:
+            print(f"Failed to remove superseded {bucket}/{old_name}: {e}")
+
+    _cleanup_executor.submit(_remove)
+
+def discard_uploads(client, uploaded):
+    """
+    Removes objects uploaded for a profile update that was not saved, so the old profile stays consistent.
+    `uploaded` is a list of (bucket, file_name).
+    """
+    for bucket, file_name in uploaded:
+        try:
+            client.storage.from_(bucket).remove([file_name])
+        except Exception as e:
+            print(f"Failed to discard upload {bucket}/{file_name}: {e}")
+
+# --- Helper Function to Build the Notification Email (Professional Design) ---
+def build_status_message(to_email, subject, body):
+    """
+    Builds the multipart (plain text + HTML) notification message for one recipient.
+    """
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    # 'alternative' allows sending both HTML and Plain Text
+    msg = MIMEMultipart('alternative')
+    # Set the sender name explicitly to 'CCS SBO' followed by the email in brackets
+    msg['From'] = f"CCS SBO <{Config.SENDER_EMAIL}>"
+    msg['To'] = to_email
+    msg['Subject'] = subject
+
+    # --- DESIGN LOGIC ---
+    # Determine color scheme and icon based on subject keywords
+    # Default is Blue (#2563EB) matching the sample design
+    header_color = "#2563EB" 
+    status_icon = "🔔"
+    
+    if "Disapproved" in subject:
+        header_color = "#DC2626" # Red for disapproval
+        status_icon = "⚠️"
+    elif "Approved" in subject:
+        header_color = "#16A34A" # Green for approval
+        status_icon = "✅"
+
+    # Try to generate a link back to the portal login page
     try:
-        img = Image.open(file_stream)
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-        alpha = img.getchannel('A')
-        unique_alphas = set(alpha.getdata())
-        if len(unique_alphas) > 1:
-            return True 
-        if len(unique_alphas) == 1 and 255 not in unique_alphas:
-            return True 
-        return False
-    except Exception as e:
-        print(f"Error checking transparency: {e}")
-        return False
+        portal_link = url_for('auth.login', _external=True)
+    except:
+        portal_link = "#"
+
+    # Format body content: Convert newlines to breaks for HTML
+    formatted_body = body.replace("\n", "<br>")
+
+    # URL for the logo (Using the specific LSPU URL from your sample)
+    logo_url = "https://lnbjifvircxceupkcpnl.supabase.co/storage/v1/object/public/pictures/lspu.png"
+
+    # Professional HTML Template (Matching the provided Verify Email design)
+    html_template = f"""
+    <!DOCTYPE html>
+    <html lang="en" xmlns="http://www.w3.org/1999/xhtml" xmlns:v="urn:schemas-microsoft-com:vml" xmlns:o="urn:schemas-microsoft-com:office:office">
+    <head>
+        <meta charset="UTF-8" />
+        <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+        <title>{subject}</title>
+        <style>
+            /* Reset styles */
+            body {{ margin: 0; padding: 0; width: 100%; -webkit-text-size-adjust: 100%; -ms-text-size-adjust: 100%; }}
+            table, td {{ border-collapse: collapse; mso-table-lspace: 0pt; mso-table-rspace: 0pt; }}
+            img {{ border: 0; height: auto; line-height: 100%; outline: none; text-decoration: none; -ms-interpolation-mode: bicubic; }}
+            
+            /* Dark Mode Support */
+            @media (prefers-color-scheme: dark) {{
+                .body-bg {{ background-color: #1a1a1a !important; }}
+                .container-bg {{ background-color: #2d2d2d !important; }}
+                .text-content {{ color: #e0e0e0 !important; }}
+                .text-secondary {{ color: #b0b0b0 !important; }}
+                .border-color {{ border-color: #444444 !important; }}
+            }}
+        </style>
+    </head>
+    <body class="body-bg" style="margin:0; padding:0; background-color:#f4f6f8; font-family:'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;">
+
+        <div style="display:none; font-size:1px; color:#f4f6f8; line-height:1px; max-height:0px; max-width:0px; opacity:0; overflow:hidden;">
+            {subject} - Notification from CCS-SBO.
+        </div>
+
+        <table width="100%" border="0" cellspacing="0" cellpadding="0" role="presentation">
+            <tr>
+                <td align="center" style="padding: 40px 15px;">
+                    
+                    <table width="100%" class="container-bg" style="max-width:600px; background-color:#ffffff; border-radius:12px; overflow:hidden; box-shadow:0 8px 30px rgba(0,0,0,0.08);" cellspacing="0" cellpadding="0" role="presentation">
+
+                        <tr>
+                            <!-- Dynamic Accent Color Bar -->
+                            <td style="background-color:{header_color}; height: 8px;"></td>
+                        </tr>
+
+                        <tr>
+                            <td align="center" style="padding: 40px 40px 20px 40px;">
+                                <img src="{logo_url}" alt="LSPU CCS-SBO Logo" width="100" style="display:block; width:100px; height:auto;" />
+                            </td>
+                        </tr>
+
+                        <tr>
+                            <td align="center" style="padding: 0 40px;">
+                                <h1 class="text-content" style="margin: 0 0 20px 0; font-size:24px; color:#1f2937; font-weight:700; font-family:'Segoe UI', sans-serif;">
+                                    {status_icon} {subject}
+                                </h1>
+                                <div class="text-secondary" style="margin: 0 0 24px 0; font-size:16px; color:#4b5563; line-height:1.6; text-align: left;">
+                                    {formatted_body}
+                                </div>
+                            </td>
+                        </tr>
+
+                        <tr>
+                            <td align="center" style="padding-bottom: 30px;">
+                                <table border="0" cellspacing="0" cellpadding="0" role="presentation">
+                                    <tr>
+                                        <td align="center" style="border-radius: 6px;" bgcolor="{header_color}">
+                                            <a href="{portal_link}" target="_blank" style="display: inline-block; padding: 16px 36px; font-family:'Segoe UI', sans-serif; font-size: 16px; color: #ffffff; text-decoration: none; border-radius: 6px; font-weight: 600; letter-spacing: 0.5px;">
+                                                Login to Portal
+                                            </a>
+                                        </td>
+                                    </tr>
+                                </table>
+                            </td>
+                        </tr>
+
+                        <tr>
+                            <td style="padding: 0 40px;">
+                                <div class="border-color" style="height: 1px; background-color: #e5e7eb; line-height: 1px;">&nbsp;</div>
+                            </td>
+                        </tr>
+
+                        <tr>
+                            <td align="center" class="container-bg" style="background-color:#f9fafb; padding: 20px 40px; border-top: 1px solid #e5e7eb;">
+                                <p class="text-secondary" style="margin: 0; font-size:12px; color:#9ca3af; line-height:1.5;">
+                                    This is an automated notification from the CCS Student Body Organization System.<br>Please do not reply to this email.
+                                </p>
+                                <p class="text-secondary" style="margin: 10px 0 0 0; font-size:12px; color:#9ca3af; font-weight: 600;">
+                                    © {datetime.now().year} CCS-SBO Management System
+                                </p>
+                            </td>
+                        </tr>
+
+                    </table>
+                </td>
+            </tr>
+        </table>
+    </body>
+    </html>
+    """
+
+    # Attach parts: Text first, then HTML (clients usually display the last supported part)
+    part1 = MIMEText(body, 'plain')
+    part2 = MIMEText(html_template, 'html')
+
+    msg.attach(part1)
+    msg.attach(part2)
+
+    return msg
 
 # --- Helper Function to Send Email Notifications (SMTP + Professional Design) ---
+@timed('smtp', 'send')
 def send_status_email(to_email, subject, body):
     """
     Sends an email notification using the configured SMTP server with a professional HTML template.
@@ -86,144 +346,11 @@ def send_status_email(to_email, subject, body):
         # Validate required SMTP configuration
         if not Config.SMTP_EMAIL or not Config.SMTP_PASSWORD:
             raise ValueError("SMTP_EMAIL and SMTP_PASSWORD environment variables must be set.")
-        
-        # 'alternative' allows sending both HTML and Plain Text
-        msg = MIMEMultipart('alternative')
-        # Set the sender name explicitly to 'CCS SBO' followed by the email in brackets
-        msg['From'] = f"CCS SBO <{Config.SENDER_EMAIL}>"
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        # --- DESIGN LOGIC ---
-        # Determine color scheme and icon based on subject keywords
-        # Default is Blue (#2563EB) matching the sample design
-        header_color = "#2563EB" 
-        status_icon = "🔔"
-        
-        if "Disapproved" in subject:
-            header_color = "#DC2626" # Red for disapproval
-            status_icon = "⚠️"
-        elif "Approved" in subject:
-            header_color = "#16A34A" # Green for approval
-            status_icon = "✅"
-
-        # Try to generate a link back to the portal login page
-        try:
-            portal_link = url_for('auth.login', _external=True)
-        except:
-            portal_link = "#"
-
-        # Format body content: Convert newlines to breaks for HTML
-        formatted_body = body.replace("\n", "<br>")
-
-        # URL for the logo (Using the specific LSPU URL from your sample)
-        logo_url = "https://lnbjifvircxceupkcpnl.supabase.co/storage/v1/object/public/pictures/lspu.png"
-
-        # Professional HTML Template (Matching the provided Verify Email design)
-        html_template = f"""
-        <!DOCTYPE html>
-        <html lang="en" xmlns="http://www.w3.org/1999/xhtml" xmlns:v="urn:schemas-microsoft-com:vml" xmlns:o="urn:schemas-microsoft-com:office:office">
-        <head>
-            <meta charset="UTF-8" />
-            <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-            <title>{subject}</title>
-            <style>
-                /* Reset styles */
-                body {{ margin: 0; padding: 0; width: 100%; -webkit-text-size-adjust: 100%; -ms-text-size-adjust: 100%; }}
-                table, td {{ border-collapse: collapse; mso-table-lspace: 0pt; mso-table-rspace: 0pt; }}
-                img {{ border: 0; height: auto; line-height: 100%; outline: none; text-decoration: none; -ms-interpolation-mode: bicubic; }}
-                
-                /* Dark Mode Support */
-                @media (prefers-color-scheme: dark) {{
-                    .body-bg {{ background-color: #1a1a1a !important; }}
-                    .container-bg {{ background-color: #2d2d2d !important; }}
-                    .text-content {{ color: #e0e0e0 !important; }}
-                    .text-secondary {{ color: #b0b0b0 !important; }}
-                    .border-color {{ border-color: #444444 !important; }}
-                }}
-            </style>
-        </head>
-        <body class="body-bg" style="margin:0; padding:0; background-color:#f4f6f8; font-family:'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;">
-
-            <div style="display:none; font-size:1px; color:#f4f6f8; line-height:1px; max-height:0px; max-width:0px; opacity:0; overflow:hidden;">
-                {subject} - Notification from CCS-SBO.
-            </div>
-
-            <table width="100%" border="0" cellspacing="0" cellpadding="0" role="presentation">
-                <tr>
-                    <td align="center" style="padding: 40px 15px;">
-                        
-                        <table width="100%" class="container-bg" style="max-width:600px; background-color:#ffffff; border-radius:12px; overflow:hidden; box-shadow:0 8px 30px rgba(0,0,0,0.08);" cellspacing="0" cellpadding="0" role="presentation">
-
-                            <tr>
-                                <!-- Dynamic Accent Color Bar -->
-                                <td style="background-color:{header_color}; height: 8px;"></td>
-                            </tr>
-
-                            <tr>
-                                <td align="center" style="padding: 40px 40px 20px 40px;">
-                                    <img src="{logo_url}" alt="LSPU CCS-SBO Logo" width="100" style="display:block; width:100px; height:auto;" />
-                                </td>
-                            </tr>
-
-                            <tr>
-                                <td align="center" style="padding: 0 40px;">
-                                    <h1 class="text-content" style="margin: 0 0 20px 0; font-size:24px; color:#1f2937; font-weight:700; font-family:'Segoe UI', sans-serif;">
-                                        {status_icon} {subject}
-                                    </h1>
-                                    <div class="text-secondary" style="margin: 0 0 24px 0; font-size:16px; color:#4b5563; line-height:1.6; text-align: left;">
-                                        {formatted_body}
-                                    </div>
-                                </td>
-                            </tr>
-
-                            <tr>
-                                <td align="center" style="padding-bottom: 30px;">
-                                    <table border="0" cellspacing="0" cellpadding="0" role="presentation">
-                                        <tr>
-                                            <td align="center" style="border-radius: 6px;" bgcolor="{header_color}">
-                                                <a href="{portal_link}" target="_blank" style="display: inline-block; padding: 16px 36px; font-family:'Segoe UI', sans-serif; font-size: 16px; color: #ffffff; text-decoration: none; border-radius: 6px; font-weight: 600; letter-spacing: 0.5px;">
-                                                    Login to Portal
-                                                </a>
-                                            </td>
-                                        </tr>
-                                    </table>
-                                </td>
-                            </tr>
-
-                            <tr>
-                                <td style="padding: 0 40px;">
-                                    <div class="border-color" style="height: 1px; background-color: #e5e7eb; line-height: 1px;">&nbsp;</div>
-                                </td>
-                            </tr>
-
-                            <tr>
-                                <td align="center" class="container-bg" style="background-color:#f9fafb; padding: 20px 40px; border-top: 1px solid #e5e7eb;">
-                                    <p class="text-secondary" style="margin: 0; font-size:12px; color:#9ca3af; line-height:1.5;">
-                                        This is an automated notification from the CCS Student Body Organization System.<br>Please do not reply to this email.
-                                    </p>
-                                    <p class="text-secondary" style="margin: 10px 0 0 0; font-size:12px; color:#9ca3af; font-weight: 600;">
-                                        © {datetime.now().year} CCS-SBO Management System
-                                    </p>
-                                </td>
-                            </tr>
-
-                        </table>
-                    </td>
-                </tr>
-            </table>
-        </body>
-        </html>
-        """
-
-        # Attach parts: Text first, then HTML (clients usually display the last supported part)
-        part1 = MIMEText(body, 'plain')
-        part2 = MIMEText(html_template, 'html')
-
-        msg.attach(part1)
-        msg.attach(part2)
+
+        msg = build_status_message(to_email, subject, body)
 
         # Connect to server
+        import smtplib
         server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT)
         server.starttls() # Secure the connection
         server.login(Config.SMTP_EMAIL, Config.SMTP_PASSWORD)
@@ -234,4 +361,41 @@ def send_status_email(to_email, subject, body):
         return True
     except Exception as e:
         print(f"Failed to send email: {e}")
-        return False
\ No newline at end of file
+        return False
+
+# --- Helper Function to Send Many Notifications Over One SMTP Session ---
+@timed('smtp', 'batch')
+def send_status_emails(messages):
+    """
+    Sends a batch of (to_email, subject, body) notifications over a single SMTP connection.
+    Returns the list of recipient addresses that could not be sent.
+    """
+    failed = []
+    if not messages:
+        return failed
+    try:
+        if not Config.SMTP_EMAIL or not Config.SMTP_PASSWORD:
+            raise ValueError("SMTP_EMAIL and SMTP_PASSWORD environment variables must be set.")
+
+        import smtplib
+        server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT)
+        server.starttls()
+        server.login(Config.SMTP_EMAIL, Config.SMTP_PASSWORD)
+        try:
+            for to_email, subject, body in messages:
+                try:
+                    msg = build_status_message(to_email, subject, body)
+                    server.sendmail(Config.SENDER_EMAIL, to_email, msg.as_string())
+                except Exception as e:
+                    print(f"Failed to send email to {to_email}: {e}")
+                    failed.append(to_email)
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                pass
+        print(f"Batch email sent: {len(messages) - len(failed)}/{len(messages)} delivered")
+    except Exception as e:
+        print(f"Failed to send batch email: {e}")
+        failed = [to_email for to_email, _, _ in messages]
+    return failed